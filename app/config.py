@@ -0,0 +1,74 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings, read from RECIPE_* environment variables"""
+    db_path: str = "recipes.db"
+    db_pool_size: int = 5
+    db_pool_timeout: float = 30.0
+    db_performance_profile: bool = False
+    db_group_commit: bool = False
+    db_group_commit_interval: float = 0.002
+    db_group_commit_max_batch: int = 200
+    db_group_commit_queue_size: int = 1000
+    # "sqlite", or "tiered" for a memory tier of hot recipes in front of SQLite
+    repository_backend: str = "sqlite"
+    tier_capacity: int = 10000
+    tier_write_mode: str = "write-through"
+    tier_eviction: str = "lru"
+    tier_admission: str = "always"
+    tier_flush_interval: float = 0.05
+    tier_max_pending: int = 1000
+    tier_warm_up: bool = True
+    cache_backend: str = "none"
+    cache_max_size: int = 1024
+    cache_ttl: float = 60.0
+    redis_url: str = "redis://localhost:6379/0"
+    coalesce_reads: bool = True
+    json_fast_path: bool = False
+    metrics_enabled: bool = False
+    profiling_enabled: bool = False
+    profiling_token: str = ""
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            db_path=os.getenv("RECIPE_DB_PATH", cls.db_path),
+            db_pool_size=int(os.getenv("RECIPE_DB_POOL_SIZE", cls.db_pool_size)),
+            db_pool_timeout=float(os.getenv("RECIPE_DB_POOL_TIMEOUT", cls.db_pool_timeout)),
+            db_performance_profile=_env_flag("RECIPE_DB_PERFORMANCE_PROFILE", cls.db_performance_profile),
+            db_group_commit=_env_flag("RECIPE_DB_GROUP_COMMIT", cls.db_group_commit),
+            db_group_commit_interval=float(os.getenv("RECIPE_DB_GROUP_COMMIT_INTERVAL", cls.db_group_commit_interval)),
+            db_group_commit_max_batch=int(os.getenv("RECIPE_DB_GROUP_COMMIT_MAX_BATCH", cls.db_group_commit_max_batch)),
+            db_group_commit_queue_size=int(os.getenv("RECIPE_DB_GROUP_COMMIT_QUEUE_SIZE", cls.db_group_commit_queue_size)),
+            repository_backend=os.getenv("RECIPE_REPOSITORY_BACKEND", cls.repository_backend).lower(),
+            tier_capacity=int(os.getenv("RECIPE_TIER_CAPACITY", cls.tier_capacity)),
+            tier_write_mode=os.getenv("RECIPE_TIER_WRITE_MODE", cls.tier_write_mode).lower(),
+            tier_eviction=os.getenv("RECIPE_TIER_EVICTION", cls.tier_eviction).lower(),
+            tier_admission=os.getenv("RECIPE_TIER_ADMISSION", cls.tier_admission).lower(),
+            tier_flush_interval=float(os.getenv("RECIPE_TIER_FLUSH_INTERVAL", cls.tier_flush_interval)),
+            tier_max_pending=int(os.getenv("RECIPE_TIER_MAX_PENDING", cls.tier_max_pending)),
+            tier_warm_up=_env_flag("RECIPE_TIER_WARM_UP", cls.tier_warm_up),
+            cache_backend=os.getenv("RECIPE_CACHE_BACKEND", cls.cache_backend).lower(),
+            cache_max_size=int(os.getenv("RECIPE_CACHE_MAX_SIZE", cls.cache_max_size)),
+            cache_ttl=float(os.getenv("RECIPE_CACHE_TTL", cls.cache_ttl)),
+            redis_url=os.getenv("RECIPE_REDIS_URL", cls.redis_url),
+            coalesce_reads=_env_flag("RECIPE_COALESCE_READS", cls.coalesce_reads),
+            json_fast_path=_env_flag("RECIPE_JSON_FAST_PATH", cls.json_fast_path),
+            metrics_enabled=_env_flag("RECIPE_METRICS_ENABLED", cls.metrics_enabled),
+            profiling_enabled=_env_flag("RECIPE_PROFILING_ENABLED", cls.profiling_enabled),
+            profiling_token=os.getenv("RECIPE_PROFILING_TOKEN", cls.profiling_token)
+        )
+
+@lru_cache
+def get_settings() -> Settings:
+    """Settings are read from the environment once per process"""
+    return Settings.from_env()
@@ -1,17 +1,130 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import Depends
+from app.config import get_settings
+from app.metrics import METRICS
 from app.repositories.recipe_repository import RecipeRepository
+from app.repositories.async_repository import AsyncRecipeRepository, as_async_repository
 from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from app.repositories.tiered_repository import TieredRecipeRepository
+from app.repositories.instrumentation import instrument_repository
+from app.services.cache import CacheBackend, LRUCache, RedisCache
+from app.services.single_flight import AsyncSingleFlight
+
+# Providers are coroutines so FastAPI resolves them on the event loop; sync
+# dependencies would each cost a threadpool hop per request. The exception is
+# get_recipe_repository, which keeps its original sync signature for direct
+# callers and dependency_overrides that expect the sync repository.
 
 # Create a global instance that will be shared across requests
 _recipe_repository_instance = None
+_recipe_cache_instance = None
+_db_executor_instance = None
+_single_flight_instance = None
+
+# get_recipe_repository runs on threadpool workers, so concurrent first requests race
+_recipe_repository_lock = threading.Lock()
 
 def get_recipe_repository() -> RecipeRepository:
     """Dependency provider for recipe repository"""
     global _recipe_repository_instance
-    if _recipe_repository_instance is None:
-        _recipe_repository_instance = SQLiteRecipeRepository()
+    if _recipe_repository_instance is not None:
+        return _recipe_repository_instance
+    with _recipe_repository_lock:
+        if _recipe_repository_instance is None:
+            _recipe_repository_instance = _create_recipe_repository()
     return _recipe_repository_instance
 
+def _create_recipe_repository() -> RecipeRepository:
+    settings = get_settings()
+    repository = SQLiteRecipeRepository(
+        db_path=settings.db_path,
+        pool_size=settings.db_pool_size,
+        pool_timeout=settings.db_pool_timeout,
+        performance_profile=settings.db_performance_profile,
+        group_commit=settings.db_group_commit,
+        group_commit_interval=settings.db_group_commit_interval,
+        group_commit_max_batch=settings.db_group_commit_max_batch,
+        group_commit_queue_size=settings.db_group_commit_queue_size
+    )
+    if settings.repository_backend == "tiered":
+        repository = TieredRecipeRepository(
+            repository,
+            capacity=settings.tier_capacity,
+            write_mode=settings.tier_write_mode,
+            eviction=settings.tier_eviction,
+            admission=settings.tier_admission,
+            flush_interval=settings.tier_flush_interval,
+            max_pending=settings.tier_max_pending,
+            warm_up=settings.tier_warm_up
+        )
+    if METRICS.enabled:
+        instrument_repository(repository, backend="tiered" if isinstance(repository, TieredRecipeRepository) else "sqlite")
+    return repository
+
+async def get_db_executor() -> ThreadPoolExecutor:
+    """Dedicated threads for blocking database calls made by async handlers"""
+    global _db_executor_instance
+    if _db_executor_instance is None:
+        # One worker per pooled connection, so workers never wait on the pool
+        _db_executor_instance = ThreadPoolExecutor(
+            max_workers=get_settings().db_pool_size,
+            thread_name_prefix="recipe-db"
+        )
+    return _db_executor_instance
+
+async def get_async_recipe_repository(
+    repository: RecipeRepository = Depends(get_recipe_repository),
+    executor: ThreadPoolExecutor = Depends(get_db_executor)
+) -> AsyncRecipeRepository:
+    """Dependency provider for the async view of the recipe repository"""
+    return as_async_repository(repository, executor)
+
+async def get_recipe_cache() -> Optional[CacheBackend]:
+    """Dependency provider for the response cache (None when caching is off)"""
+    global _recipe_cache_instance
+    if _recipe_cache_instance is None:
+        settings = get_settings()
+        if settings.cache_backend == "memory":
+            _recipe_cache_instance = LRUCache(
+                max_size=settings.cache_max_size,
+                ttl=settings.cache_ttl
+            )
+        elif settings.cache_backend == "redis":
+            # redis is an optional dependency, only needed for this backend
+            import redis
+            _recipe_cache_instance = RedisCache(
+                redis.Redis.from_url(settings.redis_url),
+                ttl=settings.cache_ttl
+            )
+    return _recipe_cache_instance
+
+async def get_single_flight() -> Optional[AsyncSingleFlight]:
+    """Dependency provider for read coalescing (None when disabled)"""
+    global _single_flight_instance
+    if _single_flight_instance is None and get_settings().coalesce_reads:
+        _single_flight_instance = AsyncSingleFlight()
+    return _single_flight_instance
+
+def close_recipe_repository():
+    """Shut down the DB executor, then close the repository
+
+    The executor goes first so in-flight calls finish and no new ones
+    start; closing then flushes the tier's write-behind queue and saves its
+    read counts, and commits whatever is queued for group commit.
+    """
+    global _recipe_repository_instance, _db_executor_instance
+    if _db_executor_instance is not None:
+        _db_executor_instance.shutdown(wait=True)
+        _db_executor_instance = None
+    if _recipe_repository_instance is not None:
+        _recipe_repository_instance.close()
+        _recipe_repository_instance = None
+
 def reset_recipe_repository():
-    """Reset the repository instance - useful for testing"""
-    global _recipe_repository_instance
-    _recipe_repository_instance = None
\ No newline at end of file
+    """Close and reset the shared instances - useful for testing"""
+    global _recipe_cache_instance, _single_flight_instance
+    close_recipe_repository()
+    _recipe_cache_instance = None
+    _single_flight_instance = None
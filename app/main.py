@@ -1,16 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import health, recipes
+from app.config import get_settings
+from app.dependencies import close_recipe_repository
+from app.metrics import METRICS, MetricsMiddleware
+from app.profiling import ProfileStore, ProfilingMiddleware
+from app.responses import FastJSONResponse
+from app.routers import health, metrics, profiles, recipes
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Writes already acknowledged may still be queued; commit them before exit
+    close_recipe_repository()
 
 def create_app() -> FastAPI:
+    settings = get_settings()
     app = FastAPI(
         title="Recipe Discovery API",
         description="A simple API for managing recipes",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan
     )
     
     # Include routers
     app.include_router(health.router)
     app.include_router(recipes.router)
+
+    # Instrumentation is only installed when enabled, so it costs nothing otherwise
+    if settings.metrics_enabled:
+        METRICS.enabled = True
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics.router)
+
+    # Requests opt in to profiling per request, but only if the deployment allows it
+    if settings.profiling_enabled:
+        if not settings.profiling_token:
+            raise ValueError("RECIPE_PROFILING_TOKEN must be set when RECIPE_PROFILING_ENABLED is")
+        app.state.profile_store = ProfileStore()
+        app.add_middleware(ProfilingMiddleware, store=app.state.profile_store, token=settings.profiling_token)
+        app.include_router(profiles.router)
     
     return app
 
@@ -0,0 +1,282 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency bucket upper bounds in seconds, from sub-millisecond lookups to slow scans
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Route label for requests that matched no route, so unknown paths cannot grow label sets
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric(ABC):
+    """A named metric family whose samples are keyed by a tuple of label values"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._samples: Dict[Labels, object] = {}
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    @abstractmethod
+    def _lines(self) -> List[str]:
+        pass
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self._lines()
+        ]
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        with self._lock:
+            self._samples[labels] = self._samples.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        with self._lock:
+            return self._samples.get(labels, 0)
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            samples = sorted(self._samples.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in samples
+        ]
+
+class Gauge(Counter):
+    """Value that can go up and down; here set from component stats at scrape time"""
+
+    type = "gauge"
+
+    def set(self, labels: Labels = (), value: float = 0):
+        with self._lock:
+            self._samples[labels] = value
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets, with their sum and count"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float):
+        # Index len(buckets) is the +Inf bucket
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._samples.get(labels)
+            if sample is None:
+                sample = self._samples[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            sample[0][index] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        with self._lock:
+            sample = self._samples.get(labels)
+            return sample[2] if sample else 0
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            samples = sorted((labels, ([*s[0]], s[1], s[2])) for labels, s in self._samples.items())
+        names = (*self.labelnames, "le")
+        lines = []
+        for labels, (counts, total, count) in samples:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(names, (*labels, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format
+
+    `enabled` is the single flag hot paths check before recording anything;
+    when it is off, instrumentation is not installed at all and the only
+    remaining cost is that attribute read.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def clear(self):
+        """Drop every recorded sample - useful for testing"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = METRICS.histogram(
+    "recipe_http_request_duration_seconds",
+    "Time from receiving a request to sending its last body chunk",
+    ("method", "route", "status")
+)
+REPOSITORY_OPERATION_SECONDS = METRICS.histogram(
+    "recipe_repository_operation_duration_seconds",
+    "Time spent inside RecipeRepository methods, including row decoding",
+    ("method", "backend")
+)
+REPOSITORY_ROWS_RETURNED = METRICS.counter(
+    "recipe_repository_rows_returned_total",
+    "Recipes (or documents) returned by RecipeRepository read methods",
+    ("method", "backend")
+)
+SQLITE_VM_STEPS = METRICS.counter(
+    "recipe_sqlite_vm_steps_total",
+    "SQLite virtual machine instructions executed, a proxy for rows scanned",
+    ("method",)
+)
+DB_CONNECT_SECONDS = METRICS.histogram(
+    "recipe_db_connect_duration_seconds",
+    "Time to open a database connection and apply its PRAGMAs"
+)
+DB_CHECKOUT_SECONDS = METRICS.histogram(
+    "recipe_db_checkout_duration_seconds",
+    "Time to check a connection out of the pool, including any wait"
+)
+DB_POOL = METRICS.gauge(
+    "recipe_db_pool",
+    "Connection pool state and cumulative counters from SQLiteConnectionPool.stats()",
+    ("stat",)
+)
+CACHE = METRICS.gauge(
+    "recipe_cache",
+    "Response cache counters from CacheBackend.stats()",
+    ("backend", "stat")
+)
+COALESCING = METRICS.gauge(
+    "recipe_coalescing",
+    "Read coalescing counters from AsyncSingleFlight.stats()",
+    ("stat",)
+)
+
+def _numeric_stats(stats: Optional[Dict]) -> Iterable[Tuple[str, float]]:
+    for key, value in (stats or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield key, value
+
+def collect_component_stats(
+    pool_stats: Optional[Dict] = None,
+    cache_stats: Optional[Dict] = None,
+    coalescing_stats: Optional[Dict] = None
+):
+    """Copy component stats snapshots into gauges just before a scrape"""
+    for key, value in _numeric_stats(pool_stats):
+        DB_POOL.set((key,), value)
+    if cache_stats:
+        backend = cache_stats.get("backend", "unknown")
+        for key, value in _numeric_stats(cache_stats):
+            CACHE.set((backend, key), value)
+    for key, value in _numeric_stats(coalescing_stats):
+        COALESCING.set((key,), value)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route, per-status request latency
+
+    Routes are labelled by their path template (`/recipes/{id}`), not the raw
+    path, so label cardinality stays bounded. Being plain ASGI, it adds no
+    task or body buffering the way BaseHTTPMiddleware would.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = METRICS):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            HTTP_REQUEST_SECONDS.observe(
+                (scope["method"], path, str(status)),
+                time.perf_counter() - start
+            )
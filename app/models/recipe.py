@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Annotated, List
+from app.repositories.pagination import MAX_RECIPE_ID
+
+# A recipe id the database can hold; anything else cannot name a recipe
+RecipeId = Annotated[int, Field(ge=1, le=MAX_RECIPE_ID)]
 
 class RecipeCreate(BaseModel):
     title: str
@@ -18,4 +22,7 @@ class Recipe(BaseModel):
     prepTime: str
     cookTime: str
     difficulty: str
-    cuisine: str
\ No newline at end of file
+    cuisine: str
+
+class RecipeBatchRequest(BaseModel):
+    ids: List[RecipeId] = Field(..., max_length=1000)
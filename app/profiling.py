@@ -0,0 +1,348 @@
+import contextvars
+import cProfile
+import hmac
+import io
+import itertools
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+# Request header (or query parameter) that asks for a request to be profiled
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+
+# Functions listed in a stored report, by cumulative time
+PROFILE_TOP_FUNCTIONS = 40
+
+# Reports kept for GET /profiles; the oldest is dropped first
+MAX_STORED_PROFILES = 50
+
+# One request is profiled at a time. From Python 3.12 cProfile is built on
+# sys.monitoring, which allows a single active profiler per process, so
+# overlapping profiled requests would fail with ValueError. A request that
+# finds this taken is served without profiling.
+_profiling_request = threading.Lock()
+
+# Held while one of that request's profilers is enabled, on the event loop or
+# a DB worker; a step or call that finds it taken runs unprofiled
+_profiler_enabled = threading.Lock()
+
+_current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "recipe_request_profile", default=None
+)
+
+def current_profile() -> Optional["RequestProfile"]:
+    """The profile of the request being handled, if it asked to be profiled"""
+    return _current_profile.get()
+
+class RequestProfile:
+    """cProfile data and SQL statement timings collected for one request
+
+    Profilers are per thread: one follows the request's own coroutine on the
+    event loop, and one is created for every blocking call handed to a DB
+    worker thread. They are merged when the report is built.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, query: str):
+        self.id = str(next(self._ids))
+        self.method = method
+        self.path = path
+        self.query = query
+        self.started = time.time()
+        self.duration = None
+        self.status = None
+        self.statements: List[Dict] = []
+        self._profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def new_profiler(self) -> cProfile.Profile:
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._profilers.append(profiler)
+        return profiler
+
+    def record_statement(self, sql: str, seconds: float) -> Dict:
+        statement = {"sql": " ".join(sql.split()), "seconds": seconds, "rows": 0}
+        with self._lock:
+            self.statements.append(statement)
+        return statement
+
+    def wrap(self, func: Callable) -> Callable:
+        """Make `func` profile itself and log its SQL when run on a worker thread"""
+        def profiled(*args, **kwargs):
+            token = _current_profile.set(self)
+            try:
+                if not _profiler_enabled.acquire(blocking=False):
+                    return func(*args, **kwargs)
+                try:
+                    return self.new_profiler().runcall(func, *args, **kwargs)
+                finally:
+                    _profiler_enabled.release()
+            finally:
+                _current_profile.reset(token)
+        return profiled
+
+    def sql_seconds(self) -> float:
+        with self._lock:
+            return sum(statement["seconds"] for statement in self.statements)
+
+    def report(self) -> Dict:
+        with self._lock:
+            profilers = list(self._profilers)
+            statements = [dict(statement) for statement in self.statements]
+        stats_text = ""
+        profilers = [profiler for profiler in profilers if profiler.getstats()]
+        if profilers:
+            out = io.StringIO()
+            stats = pstats.Stats(profilers[0], stream=out)
+            for profiler in profilers[1:]:
+                stats.add(profiler)
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            stats_text = out.getvalue()
+        for statement in statements:
+            statement["ms"] = statement.pop("seconds") * 1000
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "started": self.started,
+            "duration_ms": self.duration * 1000 if self.duration is not None else None,
+            "sql": {
+                "statements": len(statements),
+                "total_ms": sum(statement["ms"] for statement in statements),
+                "log": statements
+            },
+            "profile": stats_text
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started": self.started,
+            "duration_ms": self.duration * 1000 if self.duration is not None else None,
+            "sql_statements": len(self.statements)
+        }
+
+class ProfileStore:
+    """The most recent request profiles, oldest evicted first"""
+
+    def __init__(self, max_size: int = MAX_STORED_PROFILES):
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+class _ProfiledCursor:
+    """sqlite3.Cursor proxy that adds fetch time and row counts to its statement"""
+
+    def __init__(self, cursor, profile: RequestProfile, statement: Optional[Dict] = None):
+        self._cursor = cursor
+        self._profile = profile
+        self._statement = statement
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _execute(self, method, sql, *args):
+        start = time.perf_counter()
+        getattr(self._cursor, method)(sql, *args)
+        self._statement = self._profile.record_statement(sql, time.perf_counter() - start)
+        return self
+
+    def execute(self, sql, parameters=()):
+        return self._execute("execute", sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._execute("executemany", sql, seq_of_parameters)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        if self._statement is not None:
+            self._statement["seconds"] += time.perf_counter() - start
+            if method == "fetchone":
+                self._statement["rows"] += result is not None
+            else:
+                self._statement["rows"] += len(result)
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, size: int = 1):
+        return self._fetch("fetchmany", size)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+class ProfiledConnection:
+    """sqlite3.Connection proxy that logs every statement, with its time, to a profile
+
+    Time covers executing the statement and fetching its rows, which is where
+    SQLite does most of the work for SELECTs.
+    """
+
+    def __init__(self, connection, profile: RequestProfile):
+        self._connection = connection
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self):
+        return _ProfiledCursor(self._connection.cursor(), self._profile)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        start = time.perf_counter()
+        cursor = self._connection.executescript(script)
+        self._profile.record_statement(script, time.perf_counter() - start)
+        return cursor
+
+    def commit(self):
+        start = time.perf_counter()
+        self._connection.commit()
+        self._profile.record_statement("COMMIT", time.perf_counter() - start)
+
+class _ProfiledCoroutine:
+    """Drive a coroutine with a profiler enabled only while its own steps run
+
+    Other requests interleaved on the event loop between steps stay out of
+    the profile.
+    """
+
+    def __init__(self, coroutine, profiler: cProfile.Profile):
+        self._coroutine = coroutine
+        self._profiler = profiler
+
+    def __await__(self):
+        iterator = self._coroutine.__await__()
+        value, error = None, None
+        while True:
+            enabled = _profiler_enabled.acquire(blocking=False)
+            if enabled:
+                self._profiler.enable()
+            try:
+                if error is not None:
+                    yielded = iterator.throw(error)
+                else:
+                    yielded = iterator.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if enabled:
+                    self._profiler.disable()
+                    _profiler_enabled.release()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as exc:
+                value, error = None, exc
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling requests that opt in with X-Profile or ?profile=
+
+    Only installed when RECIPE_PROFILING_ENABLED is set, and only with a
+    token: the flag's value must equal RECIPE_PROFILING_TOKEN, since a
+    profiled request costs far more than a plain one. The response carries
+    X-Profile-Id and a Server-Timing header; the full report is kept in
+    `store`. Only one request is profiled at a time: one that opts in while
+    another is being profiled is served normally, without X-Profile-Id.
+    """
+
+    def __init__(self, app, store: ProfileStore, token: str):
+        if not token:
+            raise ValueError("Request profiling requires a token")
+        self.app = app
+        self.store = store
+        self.token = token
+
+    def _requested(self, scope) -> bool:
+        value = _header(scope, PROFILE_HEADER)
+        if value is None and scope.get("query_string"):
+            query = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+            value = query.get(PROFILE_QUERY_PARAM)
+        if value is None:
+            return False
+        return hmac.compare_digest(value.encode(), self.token.encode())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _profiling_request.acquire(blocking=False):
+            # Another request is being profiled; serve this one as usual
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profiled(scope, receive, send)
+        finally:
+            _profiling_request.release()
+
+    async def _profiled(self, scope, receive, send):
+        profile = RequestProfile(scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                timing = (f'app;dur={elapsed_ms:.3f}, '
+                          f'sql;dur={profile.sql_seconds() * 1000:.3f};desc="{len(profile.statements)} statements"')
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"x-profile-id", profile.id.encode()),
+                        (b"server-timing", timing.encode())
+                    ]
+                }
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await _ProfiledCoroutine(self.app(scope, receive, send_wrapper), profile.new_profiler())
+        finally:
+            _current_profile.reset(token)
+            profile.duration = time.perf_counter() - start
+            self.store.add(profile)
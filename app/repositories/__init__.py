@@ -1,5 +1,7 @@
 from .recipe_repository import RecipeRepository, MemoryRecipeRepository
 from .sqlite_repository import SQLiteRecipeRepository
+from .async_repository import AsyncRecipeRepository, AsyncMemoryRecipeRepository, AsyncSQLiteRecipeRepository
 from .test_sqlite_repository import InMemorySQLiteRecipeRepository
 
-__all__ = ["RecipeRepository", "MemoryRecipeRepository", "SQLiteRecipeRepository", "InMemorySQLiteRecipeRepository"]
\ No newline at end of file
+__all__ = ["RecipeRepository", "MemoryRecipeRepository", "SQLiteRecipeRepository", "InMemorySQLiteRecipeRepository",
+           "AsyncRecipeRepository", "AsyncMemoryRecipeRepository", "AsyncSQLiteRecipeRepository"]
\ No newline at end of file
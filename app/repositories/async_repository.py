@@ -0,0 +1,345 @@
+import asyncio
+import functools
+import queue
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+from .recipe_repository import RecipeRepository, MemoryRecipeRepository
+from .tiered_repository import TieredRecipeRepository
+from .filters import RecipeFilter
+from .documents import recipe_document
+from .projection import parse_fields, project
+from app.profiling import current_profile
+
+class AsyncRecipeRepository(ABC):
+    """Awaitable counterpart of RecipeRepository for async request handlers
+
+    Method semantics match RecipeRepository; only the calling convention differs.
+    """
+
+    @abstractmethod
+    async def get_all_recipes(self) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    async def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        pass
+
+    async def iter_recipes(self, batch_size: int = 500) -> AsyncIterator[Dict]:
+        """Yield every recipe ordered by id, one keyset page per round trip
+
+        Paging keeps nothing checked out between batches, so a slow consumer
+        never pins a database connection.
+        """
+        cursor = None
+        while True:
+            recipes, cursor = await self.get_recipes_page(batch_size, cursor)
+            for recipe in recipes:
+                yield recipe
+            if cursor is None:
+                return
+
+    @abstractmethod
+    async def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    async def get_recipes_by_ids(self, recipe_ids: Iterable[int]) -> Tuple[List[Dict], List[int]]:
+        pass
+
+    @abstractmethod
+    async def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    async def get_catalog_version(self) -> int:
+        pass
+
+    @abstractmethod
+    async def create_recipe(self, recipe_data: Dict) -> Dict:
+        pass
+
+    @abstractmethod
+    async def create_recipes_bulk(self, recipes: Iterable[Dict]) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        pass
+
+    @abstractmethod
+    async def search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    async def fuzzy_search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    async def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    async def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[Dict]]:
+        pass
+
+    @abstractmethod
+    async def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> Dict:
+        pass
+
+    @abstractmethod
+    async def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        pass
+
+class _DelegatingAsyncRepository(AsyncRecipeRepository):
+    """Implements every operation by handing it to a sync repository via `_call`"""
+
+    def __init__(self, repository: RecipeRepository):
+        self.repository = repository
+
+    @abstractmethod
+    async def _call(self, func, *args):
+        """Run the blocking `func(*args)` and return its result"""
+        pass
+
+    async def get_all_recipes(self) -> List[Dict]:
+        return await self._call(self.repository.get_all_recipes)
+
+    async def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        return await self._call(self.repository.get_recipes_page, limit, cursor, filters, fields)
+
+    async def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        return await self._call(self.repository.get_recipe_by_id, recipe_id, fields)
+
+    async def get_recipes_by_ids(self, recipe_ids: Iterable[int]) -> Tuple[List[Dict], List[int]]:
+        return await self._call(self.repository.get_recipes_by_ids, list(recipe_ids))
+
+    async def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        return await self._call(self.repository.get_recipe_version, recipe_id)
+
+    async def get_catalog_version(self) -> int:
+        return await self._call(self.repository.get_catalog_version)
+
+    async def create_recipe(self, recipe_data: Dict) -> Dict:
+        return await self._call(self.repository.create_recipe, recipe_data)
+
+    async def create_recipes_bulk(self, recipes: Iterable[Dict]) -> List[int]:
+        # Materialize first: a lazy iterable must not be consumed on another thread
+        return await self._call(self.repository.create_recipes_bulk, list(recipes))
+
+    async def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
+        return await self._call(self.repository.update_recipe, recipe_id, recipe_data)
+
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        return await self._call(self.repository.delete_recipe, recipe_id)
+
+    async def search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        return await self._call(self.repository.search_recipes, query, limit, fields)
+
+    async def fuzzy_search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        return await self._call(self.repository.fuzzy_search_recipes, query, limit, fields)
+
+    async def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        return await self._call(self.repository.search_by_ingredients, include, exclude, match_all, limit)
+
+    async def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[Dict]]:
+        return await self._call(self.repository.get_similar_recipes, recipe_id, k, fields)
+
+    async def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> Dict:
+        return await self._call(self.repository.get_facets, query, filters)
+
+    async def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        return await self._call(self.repository.get_recipe_document, recipe_id)
+
+    async def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        return await self._call(self.repository.get_recipes_page_document, limit, cursor, filters)
+
+class AsyncMemoryRecipeRepository(_DelegatingAsyncRepository):
+    """Async view of a MemoryRecipeRepository
+
+    Operations are index lookups that never wait on I/O, so they run inline
+    on the event loop rather than paying for a thread hop.
+    """
+
+    def __init__(self, repository: Optional[MemoryRecipeRepository] = None):
+        super().__init__(repository if repository is not None else MemoryRecipeRepository())
+
+    async def _call(self, func, *args):
+        return func(*args)
+
+class AsyncSQLiteRecipeRepository(_DelegatingAsyncRepository):
+    """Async view of a SQLiteRecipeRepository backed by a dedicated DB executor
+
+    Blocking sqlite3 calls are queued to the executor's worker threads instead
+    of Starlette's shared threadpool, so the number of in-flight requests is
+    no longer capped by that pool: requests wait as cheap coroutines and only
+    `max_workers` queries run at once. By default the executor has one worker
+    per pooled connection, so workers never wait on the pool themselves.
+    Works with any blocking RecipeRepository, not only SQLite.
+
+    When the repository has group commit enabled, creates, updates and
+    deletes are queued to its writer thread from the event loop and awaited
+    there. A worker blocked on the group would cap a group at `max_workers`
+    writes and leave reads waiting behind it. A worker is only used to wait
+    for room when the write queue is full.
+    """
+
+    def __init__(
+        self,
+        repository: RecipeRepository,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None
+    ):
+        super().__init__(repository)
+        self._owns_executor = executor is None
+        if executor is None:
+            if max_workers is None:
+                pool = getattr(repository, "pool", None)
+                max_workers = pool.max_size if pool is not None else 1
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recipe-db")
+        self.executor = executor
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args)
+        profile = current_profile()
+        if profile is not None:
+            # run_in_executor does not carry context over, so hand the profile along
+            call = profile.wrap(call)
+        return await loop.run_in_executor(self.executor, call)
+
+    async def _write(self, method: str, *args):
+        if not getattr(self.repository, "group_commit", False):
+            return await self._call(getattr(self.repository, method), *args)
+        try:
+            future = self.repository.submit_write(method, *args, block=False)
+        except queue.Full:
+            future = await self._call(functools.partial(self.repository.submit_write, method, *args))
+        return await asyncio.wrap_future(future)
+
+    async def create_recipe(self, recipe_data: Dict) -> Dict:
+        return await self._write("create_recipe", recipe_data)
+
+    async def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
+        return await self._write("update_recipe", recipe_id, recipe_data)
+
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        return await self._write("delete_recipe", recipe_id)
+
+    def close(self):
+        """Stop the executor if this instance created it; the repository stays open"""
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+class AsyncTieredRecipeRepository(AsyncSQLiteRecipeRepository):
+    """Async view of a TieredRecipeRepository
+
+    Point reads the memory tier can answer run inline on the event loop, as
+    in AsyncMemoryRecipeRepository; misses, catalog-wide reads and writes
+    are queued to the executor.
+    """
+
+    async def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        fields = parse_fields(fields)
+        answered, recipe = self.repository.read_cached("get_recipe_by_id", recipe_id, fields)
+        if answered:
+            return recipe
+        loaded = await self._call(self.repository.load_recipe, recipe_id)
+        return project(loaded[0], fields) if loaded is not None else None
+
+    async def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        answered, version = self.repository.read_cached("get_recipe_version", recipe_id)
+        if answered:
+            return version
+        loaded = await self._call(self.repository.load_recipe, recipe_id)
+        return loaded[1] if loaded is not None else None
+
+    async def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        answered, document = self.repository.read_cached("get_recipe_document", recipe_id)
+        if answered:
+            return document
+        loaded = await self._call(self.repository.load_recipe, recipe_id)
+        return recipe_document(loaded[0]) if loaded is not None else None
+
+def as_async_repository(
+    repository: RecipeRepository,
+    executor: Optional[Executor] = None
+) -> AsyncRecipeRepository:
+    """Wrap a sync repository in the matching async implementation"""
+    if isinstance(repository, MemoryRecipeRepository):
+        return AsyncMemoryRecipeRepository(repository)
+    if isinstance(repository, TieredRecipeRepository):
+        return AsyncTieredRecipeRepository(repository, executor)
+    return AsyncSQLiteRecipeRepository(repository, executor)
@@ -0,0 +1,141 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Union
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+class SQLiteConnectionPool:
+    """Bounded, thread-safe pool of SQLite connections to a database file"""
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 5,
+        timeout: float = 30.0,
+        pragmas: Optional[Dict[str, Union[str, int]]] = None
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {})
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        # Optional hooks with connected(conn, seconds) and checked_out(conn, seconds)
+        self.observer = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply the per-connection PRAGMAs once"""
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.observer is not None:
+            self.observer.connected(conn, time.perf_counter() - start)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check a connection out of the pool, waiting if all are in use"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        observer = self.observer
+        checkout_start = time.perf_counter() if observer is not None else 0.0
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+
+        if conn is None:
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+        if conn is None:
+            start = time.perf_counter()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"Timed out after {self.timeout}s waiting for a database connection"
+                )
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+
+        with self._lock:
+            self._checkouts += 1
+        if observer is not None:
+            observer.checked_out(conn, time.perf_counter() - checkout_start)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, discarding any open transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and returns it afterwards"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections; checked-out ones are closed on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict:
+        """Snapshot of pool size and checkout/wait metrics"""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "connections": self._created,
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "total_wait_seconds": self._wait_time,
+                "max_wait_seconds": self._max_wait_time,
+                "timeouts": self._timeouts
+            }
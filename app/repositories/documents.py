@@ -0,0 +1,28 @@
+import json
+from typing import Dict, Iterable
+from .projection import RECIPE_FIELDS
+
+try:
+    import orjson
+except ImportError:  # optional dependency: the stdlib encoder produces the same document
+    orjson = None
+
+def recipe_document(recipe: Dict) -> str:
+    """Canonical compact JSON for a recipe, exactly as the API returns it"""
+    document = {field: recipe[field] for field in RECIPE_FIELDS}
+    if orjson is not None:
+        return orjson.dumps(document).decode()
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+
+def document_array(documents: Iterable[str]) -> str:
+    """Splice pre-serialized documents into a JSON array without re-encoding them"""
+    return "[" + ",".join(documents) + "]"
+
+def document_sql(row: str) -> str:
+    """SQL expression building the same document from a recipes row, for backfills"""
+    return f"""json_object(
+        'id', {row}.id, 'title', {row}.title,
+        'ingredients', json({row}.ingredients), 'steps', json({row}.steps),
+        'prepTime', {row}.prep_time, 'cookTime', {row}.cook_time,
+        'difficulty', {row}.difficulty, 'cuisine', {row}.cuisine
+    )"""
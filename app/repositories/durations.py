@@ -0,0 +1,30 @@
+import re
+from typing import Optional
+
+_RANGE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-|–|to)\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+_PART = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(hours|hour|hrs|hr|h|minutes|minute|mins|min|m)?",
+    re.IGNORECASE
+)
+
+def parse_minutes(text: Optional[str]) -> Optional[int]:
+    """Parse a free-text duration such as "10 minutes" or "1 hr 30 min" into minutes
+
+    Bare numbers are read as minutes and ranges ("10-15 minutes") use their
+    upper bound. Returns None when the text contains no number.
+    """
+    if not text:
+        return None
+    text = _RANGE.sub(r"\2", text)
+    total = 0.0
+    found = False
+    for value, unit in _PART.findall(text):
+        found = True
+        total += float(value) * (60 if unit.lower().startswith("h") else 1)
+    return round(total) if found else None
+
+def total_minutes(prep_minutes: Optional[int], cook_minutes: Optional[int]) -> Optional[int]:
+    """Prep plus cook time, unknown if either part is unknown"""
+    if prep_minutes is None or cook_minutes is None:
+        return None
+    return prep_minutes + cook_minutes
@@ -0,0 +1,42 @@
+from collections import Counter
+from typing import Dict, Optional
+
+# (label, inclusive upper bound in minutes); None means no upper bound
+TIME_BUCKETS = [
+    ("0-15", 15),
+    ("16-30", 30),
+    ("31-60", 60),
+    ("60+", None),
+]
+UNKNOWN_TIME_BUCKET = "unknown"
+
+FACETS = ("cuisine", "difficulty", "total_time")
+
+def time_bucket(minutes: Optional[int]) -> str:
+    """Label of the total-time bucket a recipe falls into"""
+    if minutes is None:
+        return UNKNOWN_TIME_BUCKET
+    for label, upper in TIME_BUCKETS:
+        if upper is None or minutes <= upper:
+            return label
+    return UNKNOWN_TIME_BUCKET
+
+def time_bucket_sql(column: str) -> str:
+    """SQL CASE expression equivalent to time_bucket() for a minutes column"""
+    cases = [f"WHEN {column} IS NULL THEN '{UNKNOWN_TIME_BUCKET}'"]
+    for label, upper in TIME_BUCKETS:
+        if upper is None:
+            cases.append(f"ELSE '{label}'")
+        else:
+            cases.append(f"WHEN {column} <= {upper} THEN '{label}'")
+    return f"CASE {' '.join(cases)} END"
+
+def format_facets(counts: Dict[str, Counter]) -> Dict:
+    """Shape raw counters for the API: values by descending count, every time bucket listed"""
+    result = {"total": sum(counts["cuisine"].values())}
+    for facet in ("cuisine", "difficulty"):
+        ranked = sorted(counts[facet].items(), key=lambda item: (-item[1], item[0]))
+        result[facet] = {value: count for value, count in ranked if count > 0}
+    labels = [label for label, _ in TIME_BUCKETS] + [UNKNOWN_TIME_BUCKET]
+    result["total_time"] = {label: counts["total_time"].get(label, 0) for label in labels}
+    return result
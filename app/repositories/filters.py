@@ -0,0 +1,40 @@
+from dataclasses import dataclass, fields
+from typing import Optional
+
+# Time fields that take min_/max_ range bounds
+TIME_FIELDS = ("prep_minutes", "cook_minutes", "total_minutes")
+
+@dataclass(frozen=True)
+class RecipeFilter:
+    """Equality predicates on cuisine/difficulty (case-insensitive) and inclusive time ranges"""
+    cuisine: Optional[str] = None
+    difficulty: Optional[str] = None
+    min_prep_minutes: Optional[int] = None
+    max_prep_minutes: Optional[int] = None
+    min_cook_minutes: Optional[int] = None
+    max_cook_minutes: Optional[int] = None
+    min_total_minutes: Optional[int] = None
+    max_total_minutes: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, field.name) is None for field in fields(self))
+
+    def time_ranges(self):
+        """Yield (field, minimum, maximum) for each time field with a bound"""
+        for field in TIME_FIELDS:
+            minimum = getattr(self, f"min_{field}")
+            maximum = getattr(self, f"max_{field}")
+            if minimum is not None or maximum is not None:
+                yield field, minimum, maximum
+
+    def matches_times(self, recipe) -> bool:
+        """Check the time ranges against a recipe's *_minutes attributes; unknown times never match"""
+        for field, minimum, maximum in self.time_ranges():
+            value = getattr(recipe, field)
+            if value is None:
+                return False
+            if minimum is not None and value < minimum:
+                return False
+            if maximum is not None and value > maximum:
+                return False
+        return True
@@ -0,0 +1,189 @@
+import functools
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+from app.metrics import (
+    DB_CHECKOUT_SECONDS,
+    DB_CONNECT_SECONDS,
+    REPOSITORY_OPERATION_SECONDS,
+    REPOSITORY_ROWS_RETURNED,
+    SQLITE_VM_STEPS
+)
+from .recipe_repository import RecipeRepository
+
+# SQLite calls the progress handler once per this many VM instructions; coarse
+# enough that counting costs a fraction of a percent of query time
+VM_STEP_GRANULARITY = 1000
+
+def _count_list(result) -> int:
+    return len(result)
+
+def _count_first(result) -> int:
+    return len(result[0])
+
+def _count_one(result) -> int:
+    return 0 if result is None else 1
+
+def _count_optional_list(result) -> int:
+    return 0 if result is None else len(result)
+
+# Repository methods to time, with how to count the rows each one returns
+# (None for methods that return no recipes, or whose count is not cheap to read)
+INSTRUMENTED_METHODS: Dict[str, Optional[Callable]] = {
+    "get_all_recipes": _count_list,
+    "get_recipes_page": _count_first,
+    "get_recipe_by_id": _count_one,
+    "get_recipes_by_ids": _count_first,
+    "get_recipe_version": None,
+    "get_catalog_version": None,
+    "create_recipe": None,
+    "create_recipes_bulk": None,
+    "update_recipe": None,
+    "delete_recipe": None,
+    "search_recipes": _count_list,
+    "fuzzy_search_recipes": _count_list,
+    "search_by_ingredients": _count_list,
+    "get_similar_recipes": _count_optional_list,
+    "get_facets": None,
+    "get_recipe_document": _count_one,
+    "get_recipes_page_document": None
+}
+
+# Repository method running on each thread, so SQLite VM steps can be attributed to it
+_current = threading.local()
+
+def _vm_progress() -> int:
+    SQLITE_VM_STEPS.inc((getattr(_current, "method", None) or "other",), VM_STEP_GRANULARITY)
+    return 0
+
+def _count_vm_steps(conn: sqlite3.Connection):
+    conn.set_progress_handler(_vm_progress, VM_STEP_GRANULARITY)
+
+class _PoolObserver:
+    """Records connection open and checkout times from SQLiteConnectionPool"""
+
+    def __init__(self):
+        # ids of connections already counting VM steps (connections are not
+        # weak-referenceable); a reused id always comes through connected() first
+        self._counting = set()
+
+    def _count(self, conn: sqlite3.Connection):
+        _count_vm_steps(conn)
+        self._counting.add(id(conn))
+
+    def connected(self, conn: sqlite3.Connection, seconds: float):
+        DB_CONNECT_SECONDS.observe((), seconds)
+        self._count(conn)
+
+    def checked_out(self, conn: sqlite3.Connection, seconds: float):
+        DB_CHECKOUT_SECONDS.observe((), seconds)
+        # Connections opened before instrumentation have no handler yet
+        if id(conn) not in self._counting:
+            self._count(conn)
+
+def _timed(method: Callable, name: str, backend: str, count_rows: Optional[Callable]) -> Callable:
+    labels = (name, backend)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_current, "method", None)
+        _current.method = name
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            REPOSITORY_OPERATION_SECONDS.observe(labels, time.perf_counter() - start)
+            _current.method = previous
+        if count_rows is not None:
+            REPOSITORY_ROWS_RETURNED.inc(labels, count_rows(result))
+        return result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def _timed_submit(submit: Callable, backend: str) -> Callable:
+    """Time writes queued with submit_write from queueing until their group commits"""
+
+    @functools.wraps(submit)
+    def wrapper(method, *args, **kwargs):
+        start = time.perf_counter()
+        future = submit(method, *args, **kwargs)
+        future.add_done_callback(
+            lambda _: REPOSITORY_OPERATION_SECONDS.observe((method, backend), time.perf_counter() - start)
+        )
+        return future
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def _nested() -> bool:
+    """Whether an instrumented method on this thread is already timing the call"""
+    return getattr(_current, "method", None) is not None
+
+def _timed_read_cached(read_cached: Callable, backend: str) -> Callable:
+    """Time point reads the memory tier answers, under the read's own name
+
+    Async callers use read_cached and load_recipe instead of the wrapped
+    point reads. Calls made from inside those (sync) reads are already timed.
+    """
+
+    @functools.wraps(read_cached)
+    def wrapper(method, recipe_id, *args):
+        if _nested():
+            return read_cached(method, recipe_id, *args)
+        start = time.perf_counter()
+        answered, result = read_cached(method, recipe_id, *args)
+        if answered:
+            labels = (method, backend)
+            REPOSITORY_OPERATION_SECONDS.observe(labels, time.perf_counter() - start)
+            count_rows = INSTRUMENTED_METHODS.get(method)
+            if count_rows is not None:
+                REPOSITORY_ROWS_RETURNED.inc(labels, count_rows(result))
+        return answered, result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def _timed_load(load_recipe: Callable, backend: str) -> Callable:
+    """Time point reads the memory tier missed, unless a wrapped read is timing them"""
+    timed = _timed(load_recipe, "load_recipe", backend, _count_one)
+
+    @functools.wraps(load_recipe)
+    def wrapper(recipe_id):
+        if _nested():
+            return load_recipe(recipe_id)
+        return timed(recipe_id)
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def instrument_repository(repository: RecipeRepository, backend: Optional[str] = None) -> RecipeRepository:
+    """Record timings, returned rows and connection metrics for one repository
+
+    Wraps the instance's bound methods in place rather than wrapping the object,
+    so isinstance checks (e.g. in as_async_repository) still see the real class
+    and uninstrumented instances pay nothing. Calling it twice is a no-op.
+    """
+    backend = backend or type(repository).__name__
+    for name, count_rows in INSTRUMENTED_METHODS.items():
+        method = getattr(repository, name, None)
+        if method is None or getattr(method, "__instrumented__", False):
+            continue
+        setattr(repository, name, _timed(method, name, backend, count_rows))
+    # Writes async callers queue themselves for group commit skip the wrapped methods
+    submit = getattr(repository, "submit_write", None)
+    if submit is not None and not getattr(submit, "__instrumented__", False):
+        repository.submit_write = _timed_submit(submit, backend)
+    read_cached = getattr(repository, "read_cached", None)
+    if read_cached is not None and not getattr(read_cached, "__instrumented__", False):
+        repository.read_cached = _timed_read_cached(read_cached, backend)
+        repository.load_recipe = _timed_load(repository.load_recipe, backend)
+
+    pool = getattr(repository, "pool", None)
+    if pool is not None:
+        pool.observer = _PoolObserver()
+    connection = getattr(repository, "connection", None)
+    if isinstance(connection, sqlite3.Connection):
+        _count_vm_steps(connection)
+    return repository
@@ -0,0 +1,26 @@
+import base64
+import binascii
+import json
+
+# Largest id a recipe can have: SQLite's INTEGER PRIMARY KEY is a signed
+# 64-bit integer, and sqlite3 raises OverflowError for anything larger
+MAX_RECIPE_ID = 2 ** 63 - 1
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last id of a page as an opaque cursor"""
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor back into the id that the next page starts after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
+    if not isinstance(after, int) or isinstance(after, bool) or not 0 <= after <= MAX_RECIPE_ID:
+        raise InvalidCursorError("Invalid pagination cursor")
+    return after
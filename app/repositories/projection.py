@@ -0,0 +1,53 @@
+from typing import Iterable, Mapping, Optional, Tuple
+
+class InvalidFieldsError(ValueError):
+    """Raised when a field selection names fields recipes do not have"""
+
+# Fields of the Recipe response model, in response order
+RECIPE_FIELDS = ("id", "title", "ingredients", "steps", "prepTime", "cookTime", "difficulty", "cuisine")
+
+# recipes table column behind each field
+FIELD_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "ingredients": "ingredients",
+    "steps": "steps",
+    "prepTime": "prep_time",
+    "cookTime": "cook_time",
+    "difficulty": "difficulty",
+    "cuisine": "cuisine"
+}
+
+# Fields stored as JSON text that must be decoded when selected
+JSON_FIELDS = frozenset({"ingredients", "steps"})
+
+def parse_fields(fields: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """Validate a field selection and put it in canonical form
+
+    id is always included and fields follow response order. Returns None,
+    meaning every field, when no selection is given or it covers them all.
+    """
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields if field.strip()}
+    if not requested:
+        return None
+    unknown = requested.difference(RECIPE_FIELDS)
+    if unknown:
+        raise InvalidFieldsError(
+            f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(RECIPE_FIELDS)}"
+        )
+    requested.add("id")
+    if len(requested) == len(RECIPE_FIELDS):
+        return None
+    return tuple(field for field in RECIPE_FIELDS if field in requested)
+
+def project(recipe: Mapping, fields: Optional[Tuple[str, ...]]) -> Mapping:
+    """Dict of only the selected fields, or the recipe itself when None selects all
+
+    Callers pass read-only recipes (see records.RecipeRecord), so the
+    full recipe needs no defensive copy.
+    """
+    if fields is None:
+        return recipe
+    return {field: recipe[field] for field in fields}
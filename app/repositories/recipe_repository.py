@@ -1,5 +1,20 @@
+import re
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple
+from .pagination import encode_cursor, decode_cursor
+from .filters import RecipeFilter
+from .facets import FACETS, format_facets, time_bucket
+from .documents import document_array, recipe_document
+from .projection import parse_fields, project
+from .trigrams import TermMatches, TrigramIndex, fuzzy_rank, is_fuzzy_word, query_terms
+from .similarity import band_keys, collect_candidates, rank_similar
+from .records import RecipeRecord, Vocabulary
 
 class RecipeRepository(ABC):
     """Abstract base class for recipe data operations"""
@@ -9,13 +24,56 @@ class RecipeRepository(ABC):
         pass
     
     @abstractmethod
-    def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict]:
+    def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Return up to `limit` matching recipes ordered by id and the cursor for the next page
+
+        `fields` limits each recipe to those keys (plus id); see projection.parse_fields.
+        """
+        pass
+    
+    @abstractmethod
+    def iter_recipes(self, batch_size: int = 500) -> Iterator[Dict]:
+        """Yield every recipe ordered by id without materializing the catalog"""
+        pass
+    
+    @abstractmethod
+    def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        pass
+    
+    @abstractmethod
+    def get_recipes_by_ids(self, recipe_ids: Iterable[int]) -> Tuple[List[Dict], List[int]]:
+        """Look up many recipes at once
+
+        Returns the recipes found, in the order their ids were given (repeated
+        ids appear once), and the ids that do not exist, in the same order.
+        """
+        pass
+    
+    @abstractmethod
+    def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        """Return the recipe's version, which changes whenever it is updated"""
+        pass
+    
+    @abstractmethod
+    def get_catalog_version(self) -> int:
+        """Return a version that changes whenever any recipe is created, updated or deleted"""
         pass
     
     @abstractmethod
     def create_recipe(self, recipe_data: Dict) -> Dict:
         pass
     
+    @abstractmethod
+    def create_recipes_bulk(self, recipes: Iterable[Dict]) -> List[int]:
+        """Insert many recipes at once and return their new ids in input order"""
+        pass
+    
     @abstractmethod
     def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
         pass
@@ -25,14 +83,165 @@ class RecipeRepository(ABC):
         pass
     
     @abstractmethod
-    def search_recipes(self, query: str) -> List[Dict]:
+    def search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
         pass
+    
+    @abstractmethod
+    def fuzzy_search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """Typo-tolerant search over title and ingredient words
+
+        Each query term is matched to the most similar indexed words by
+        trigram similarity. Recipes containing every term rank first, ordered
+        by the summed similarity of their words, followed by recipes matching
+        any single term.
+        """
+        pass
+    
+    @abstractmethod
+    def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Find recipes containing all (or any) of `include` and none of `exclude`
+
+        Results are ranked by how many included ingredients they use, then by
+        coverage (the share of the recipe's own ingredients that were included),
+        then by id.
+        """
+        pass
+    
+    @abstractmethod
+    def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[Dict]]:
+        """The k recipes closest to a recipe by shared ingredients, cuisine and total time
+
+        Candidates come from a MinHash LSH index over ingredient sets (see
+        similarity.py), so only a bounded number of recipes are scored.
+        Returns None when the recipe does not exist.
+        """
+        pass
+    
+    @abstractmethod
+    def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> Dict:
+        """Count recipes per cuisine, difficulty and total-time bucket
+
+        With no query or filters the counts come from incrementally maintained
+        aggregates; otherwise they are computed over the matching recipes.
+        """
+        pass
+    
+    def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        """Return the recipe as its canonical JSON document, ready to send as-is
+
+        Backends that keep pre-serialized documents override this; the default
+        encodes the dict on each call.
+        """
+        recipe = self.get_recipe_by_id(recipe_id)
+        return recipe_document(recipe) if recipe is not None else None
+    
+    def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        """Same page as get_recipes_page, as one JSON array document"""
+        recipes, next_cursor = self.get_recipes_page(limit, cursor, filters)
+        return document_array(map(recipe_document, recipes)), next_cursor
+    
+    def get_diagnostics(self) -> Dict:
+        """Backend details for the diagnostics endpoint"""
+        return {"backend": type(self).__name__}
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return re.findall(r"\w+", text.lower())
+
+def order_by_request(recipe_ids: Iterable[int], found: Dict[int, Dict]) -> Tuple[List[Dict], List[int]]:
+    """Arrange looked-up recipes in request order and list the ids that were not found"""
+    recipes = []
+    missing = []
+    for recipe_id in dict.fromkeys(recipe_ids):
+        recipe = found.get(recipe_id)
+        if recipe is None:
+            missing.append(recipe_id)
+        else:
+            recipes.append(recipe)
+    return recipes, missing
+
+def normalize_ingredient(name: str) -> str:
+    """Canonical form used to match ingredient names"""
+    return " ".join(name.lower().split())
+
+def normalize_ingredients(names: Iterable[str]) -> Set[str]:
+    """Distinct canonical ingredient names, ignoring blanks"""
+    return {normalized for normalized in map(normalize_ingredient, names) if normalized}
+
+# How many times the expected number of ids fuzzy search walks before
+# intersecting postings instead (see MemoryRecipeRepository._ids_with_words)
+FUZZY_WALK_FACTOR = 4
+
+# Typecode of the LSH bucket arrays holding recipe ids (signed 64-bit)
+BUCKET_TYPECODE = "q"
 
 class MemoryRecipeRepository(RecipeRepository):
-    """In-memory implementation of recipe repository"""
+    """In-memory implementation of recipe repository
+
+    Recipes are kept as compact RecipeRecords in a dict keyed by id, with
+    secondary indexes on cuisine and difficulty and an inverted token index
+    over titles and ingredients. Records are immutable (a write replaces
+    the record), so reads return them as they are instead of copies. All
+    reads and writes hold a re-entrant lock, so the repository is safe to
+    share between threadpool handlers.
     
-    def __init__(self):
-        self.recipes = [
+    With seed=False it starts empty, e.g. to hold recipes owned by another
+    repository (see put_recipe). With indexed=False only reads by id are
+    supported: the search, filter, facet and similarity indexes are not
+    maintained, which makes writes several times cheaper.
+    """
+    
+    def __init__(self, seed: bool = True, indexed: bool = True):
+        self._lock = threading.RLock()
+        self._indexed = indexed
+        self.recipes: Dict[int, RecipeRecord] = {}
+        # Ingredient names as written, stored once and referenced by id from records
+        self._ingredient_names = Vocabulary()
+        # Pre-serialized JSON per recipe, refreshed whenever the recipe is written
+        self._documents: Dict[int, str] = {}
+        self._ids: List[int] = []
+        self._by_cuisine: Dict[str, Set[int]] = {}
+        self._by_difficulty: Dict[str, Set[int]] = {}
+        self._by_ingredient: Dict[str, Set[int]] = {}
+        self._by_total_minutes: List[Tuple[int, int]] = []
+        self._facet_counts: Dict[str, Counter] = {facet: Counter() for facet in FACETS}
+        self._tokens: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams = TrigramIndex()
+        # MinHash LSH buckets over ingredient sets, keyed by similarity.band_keys().
+        # They are only sliced, never probed, so sorted id arrays stand in for sets
+        self._similar_buckets: Dict[int, array] = {}
+        # Versions start from the clock so ETags never repeat across restarts,
+        # when this in-memory catalog is rebuilt from scratch
+        self.catalog_version = time.time_ns()
+        
+        seed_recipes = [
             {
                 "id": 1,
                 "title": "Spaghetti Carbonara",
@@ -64,53 +273,455 @@ class MemoryRecipeRepository(RecipeRepository):
                 "cuisine": "American"
             }
         ]
+        if seed:
+            for recipe in seed_recipes:
+                self._add(recipe["id"], recipe, self.catalog_version)
         self.next_id = 4
     
+    @staticmethod
+    def _index_add(index: Dict[str, Set[int]], key: str, recipe_id: int) -> bool:
+        """Add to a posting set; True if the key is new to the index"""
+        postings = index.get(key)
+        if postings is None:
+            index[key] = {recipe_id}
+            return True
+        postings.add(recipe_id)
+        return False
+    
+    @staticmethod
+    def _index_remove(index: Dict[str, Set[int]], key: str, recipe_id: int) -> bool:
+        """Remove from a posting set; True if the key left the index"""
+        postings = index.get(key)
+        if postings is None:
+            return False
+        postings.discard(recipe_id)
+        if not postings:
+            del index[key]
+            return True
+        return False
+    
+    @staticmethod
+    def _recipe_tokens(title: str, ingredients: Iterable[str]) -> Set[str]:
+        tokens = set(tokenize(title))
+        for ingredient in ingredients:
+            tokens.update(tokenize(ingredient))
+        return tokens
+    
+    def _add(self, recipe_id: int, recipe_data: Dict, version: int) -> RecipeRecord:
+        """Store a recipe and add it to every index"""
+        ingredients = normalize_ingredients(recipe_data["ingredients"])
+        record = RecipeRecord(recipe_id, recipe_data, self._ingredient_names, len(ingredients), version)
+        self.recipes[recipe_id] = record
+        self._documents[recipe_id] = recipe_document(record)
+        if not self._ids or recipe_id > self._ids[-1]:
+            self._ids.append(recipe_id)
+        else:
+            insort(self._ids, recipe_id)
+        if not self._indexed:
+            return record
+        self._index_add(self._by_cuisine, record.cuisine.lower(), recipe_id)
+        self._index_add(self._by_difficulty, record.difficulty.lower(), recipe_id)
+        for ingredient in ingredients:
+            self._index_add(self._by_ingredient, ingredient, recipe_id)
+        for key in band_keys(ingredients):
+            bucket = self._similar_buckets.get(key)
+            if bucket is None:
+                self._similar_buckets[key] = array(BUCKET_TYPECODE, (recipe_id,))
+            elif recipe_id > bucket[-1]:
+                bucket.append(recipe_id)
+            else:
+                insort(bucket, recipe_id)
+        if record.total_minutes is not None:
+            insort(self._by_total_minutes, (record.total_minutes, recipe_id))
+        for facet, value in self._facet_values(record).items():
+            self._facet_counts[facet][value] += 1
+        for token in self._recipe_tokens(record.title, recipe_data["ingredients"]):
+            if self._index_add(self._tokens, token, recipe_id):
+                insort(self._vocabulary, token)
+                if is_fuzzy_word(token):
+                    self._trigrams.add(token)
+        return record
+    
+    def _remove(self, recipe_id: int) -> Optional[RecipeRecord]:
+        """Drop a recipe from storage and from every index"""
+        record = self.recipes.pop(recipe_id, None)
+        if record is None:
+            return None
+        del self._documents[recipe_id]
+        del self._ids[bisect_left(self._ids, recipe_id)]
+        if not self._indexed:
+            return record
+        self._index_remove(self._by_cuisine, record.cuisine.lower(), recipe_id)
+        self._index_remove(self._by_difficulty, record.difficulty.lower(), recipe_id)
+        names = record.ingredients
+        ingredients = normalize_ingredients(names)
+        for ingredient in ingredients:
+            self._index_remove(self._by_ingredient, ingredient, recipe_id)
+        for key in band_keys(ingredients):
+            bucket = self._similar_buckets[key]
+            del bucket[bisect_left(bucket, recipe_id)]
+            if not bucket:
+                del self._similar_buckets[key]
+        if record.total_minutes is not None:
+            del self._by_total_minutes[bisect_left(self._by_total_minutes, (record.total_minutes, recipe_id))]
+        for facet, value in self._facet_values(record).items():
+            counter = self._facet_counts[facet]
+            counter[value] -= 1
+            if counter[value] <= 0:
+                del counter[value]
+        for token in self._recipe_tokens(record.title, names):
+            if self._index_remove(self._tokens, token, recipe_id):
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+                self._trigrams.discard(token)
+        return record
+    
+    @staticmethod
+    def _facet_values(record: RecipeRecord) -> Dict[str, str]:
+        return {
+            "cuisine": record.cuisine,
+            "difficulty": record.difficulty,
+            "total_time": time_bucket(record.total_minutes)
+        }
+    
+    def _filtered_ids(self, filters: Optional[RecipeFilter]) -> Optional[Set[int]]:
+        """Ids matching a filter, narrowed through the indexes; None means every recipe"""
+        if filters is None or filters.is_empty():
+            return None
+        
+        candidates = None
+        for index, value in ((self._by_cuisine, filters.cuisine), (self._by_difficulty, filters.difficulty)):
+            if value is None:
+                continue
+            postings = index.get(value.lower(), set())
+            candidates = postings if candidates is None else candidates & postings
+        
+        if filters.min_total_minutes is not None or filters.max_total_minutes is not None:
+            start = 0
+            if filters.min_total_minutes is not None:
+                start = bisect_left(self._by_total_minutes, (filters.min_total_minutes,))
+            end = len(self._by_total_minutes)
+            if filters.max_total_minutes is not None:
+                end = bisect_left(self._by_total_minutes, (filters.max_total_minutes + 1,))
+            in_range = {recipe_id for _, recipe_id in self._by_total_minutes[start:end]}
+            candidates = in_range if candidates is None else candidates & in_range
+        
+        if candidates is None:
+            candidates = self._ids
+        return {
+            recipe_id for recipe_id in candidates
+            if filters.matches_times(self.recipes[recipe_id])
+        }
+    
+    def _next_version(self) -> int:
+        self.catalog_version += 1
+        return self.catalog_version
+    
+    def _prefix_postings(self, prefix: str) -> Set[int]:
+        """Ids of recipes with any token starting with prefix"""
+        matches = set()
+        start = bisect_left(self._vocabulary, prefix)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self._tokens[token]
+        return matches
+    
     def get_all_recipes(self) -> List[Dict]:
-        return self.recipes.copy()
+        with self._lock:
+            return list(self.recipes.values())
     
-    def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict]:
-        for recipe in self.recipes:
-            if recipe["id"] == recipe_id:
-                return recipe.copy()
-        return None
+    def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        fields = parse_fields(fields)
+        with self._lock:
+            page_ids, next_cursor = self._page_ids(limit, cursor, filters)
+            return [project(self.recipes[recipe_id], fields) for recipe_id in page_ids], next_cursor
+    
+    def _page_ids(
+        self,
+        limit: int,
+        cursor: Optional[str],
+        filters: Optional[RecipeFilter]
+    ) -> Tuple[List[int], Optional[str]]:
+        matching = self._filtered_ids(filters)
+        ids = self._ids if matching is None else sorted(matching)
+        start = bisect_right(ids, decode_cursor(cursor)) if cursor is not None else 0
+        page_ids = ids[start:start + limit]
+        has_more = start + limit < len(ids)
+        return page_ids, encode_cursor(page_ids[-1]) if page_ids and has_more else None
+    
+    def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        with self._lock:
+            page_ids, next_cursor = self._page_ids(limit, cursor, filters)
+            return document_array(self._documents[recipe_id] for recipe_id in page_ids), next_cursor
+    
+    def iter_recipes(self, batch_size: int = 500) -> Iterator[Dict]:
+        # Records are never modified in place, so a snapshot of references
+        # stays consistent while concurrent writes replace them
+        with self._lock:
+            snapshot = [self.recipes[recipe_id] for recipe_id in self._ids]
+        yield from snapshot
+    
+    def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        fields = parse_fields(fields)
+        with self._lock:
+            recipe = self.recipes.get(recipe_id)
+            return project(recipe, fields) if recipe is not None else None
+    
+    def get_recipes_by_ids(self, recipe_ids: Iterable[int]) -> Tuple[List[Dict], List[int]]:
+        recipe_ids = list(recipe_ids)
+        with self._lock:
+            found = {
+                recipe_id: self.recipes[recipe_id]
+                for recipe_id in recipe_ids if recipe_id in self.recipes
+            }
+        return order_by_request(recipe_ids, found)
+    
+    def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        with self._lock:
+            return self._documents.get(recipe_id)
+    
+    def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        with self._lock:
+            record = self.recipes.get(recipe_id)
+            return record.version if record is not None else None
+    
+    def get_catalog_version(self) -> int:
+        with self._lock:
+            return self.catalog_version
+    
+    def find_recipes(self, cuisine: Optional[str] = None, difficulty: Optional[str] = None) -> List[Dict]:
+        """Look recipes up by exact (case-insensitive) cuisine and/or difficulty"""
+        with self._lock:
+            candidates = self._filtered_ids(RecipeFilter(cuisine=cuisine, difficulty=difficulty))
+            if candidates is None:
+                candidates = self._ids
+            return [self.recipes[recipe_id] for recipe_id in sorted(candidates)]
     
     def create_recipe(self, recipe_data: Dict) -> Dict:
-        new_recipe = {
-            "id": self.next_id,
-            **recipe_data
-        }
-        self.recipes.append(new_recipe)
-        self.next_id += 1
-        return new_recipe.copy()
+        with self._lock:
+            record = self._add(self.next_id, recipe_data, self._next_version())
+            self.next_id += 1
+            return record
+    
+    def create_recipes_bulk(self, recipes: Iterable[Dict]) -> List[int]:
+        with self._lock:
+            return [self.create_recipe(recipe_data)["id"] for recipe_data in recipes]
+    
+    def put_recipe(self, recipe: Dict, version: int) -> RecipeRecord:
+        """Store a recipe under its own id and version, replacing any stored copy
+
+        For mirroring recipes whose ids and versions another repository
+        assigns; unlike create/update it takes both as given.
+        """
+        with self._lock:
+            self._remove(recipe["id"])
+            self._next_version()
+            return self._add(recipe["id"], recipe, version)
     
     def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
-        for i, recipe in enumerate(self.recipes):
-            if recipe["id"] == recipe_id:
-                updated_recipe = {
-                    "id": recipe_id,
-                    **recipe_data
-                }
-                self.recipes[i] = updated_recipe
-                return updated_recipe.copy()
-        return None
+        with self._lock:
+            if recipe_id not in self.recipes:
+                return None
+            self._remove(recipe_id)
+            return self._add(recipe_id, recipe_data, self._next_version())
     
     def delete_recipe(self, recipe_id: int) -> bool:
-        for i, recipe in enumerate(self.recipes):
-            if recipe["id"] == recipe_id:
-                self.recipes.pop(i)
-                return True
-        return False
+        with self._lock:
+            if self._remove(recipe_id) is None:
+                return False
+            self._next_version()
+            return True
     
-    def search_recipes(self, query: str) -> List[Dict]:
+    def _search_ids(self, terms: List[str]) -> Set[int]:
+        """Ids of recipes matching every term as a token prefix"""
+        matches = None
+        for term in terms:
+            postings = self._prefix_postings(term)
+            matches = postings if matches is None else matches & postings
+            if not matches:
+                return set()
+        return matches if matches is not None else set()
+    
+    def search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """Match every query term as a token prefix in the title or ingredients
+
+        Recipes matching more terms in their title rank first, then by id.
+        """
+        fields = parse_fields(fields)
         if not query:
             return []
+        terms = tokenize(query)
+        if not terms:
+            return []
         
-        query_lower = query.lower()
-        matching_recipes = []
-        
-        for recipe in self.recipes:
-            if query_lower in recipe["title"].lower():
-                matching_recipes.append(recipe.copy())
+        with self._lock:
+            matches = self._search_ids(terms)
+            if not matches:
+                return []
+            
+            def title_score(recipe_id: int) -> int:
+                title = tokenize(self.recipes[recipe_id].title)
+                return sum(any(token.startswith(term) for token in title) for term in terms)
+            
+            ranked = sorted(matches, key=lambda recipe_id: (-title_score(recipe_id), recipe_id))
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [project(self.recipes[recipe_id], fields) for recipe_id in ranked]
+    
+    def fuzzy_search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        fields = parse_fields(fields)
+        terms = query_terms(query or "")
+        if not terms:
+            return []
+        with self._lock:
+            ranked = fuzzy_rank([self._term_matches(term) for term in terms], self._ids_with_words, limit)
+            return [project(self.recipes[recipe_id], fields) for recipe_id in ranked]
+    
+    def _term_matches(self, term: str) -> TermMatches:
+        """Indexed words similar to a query term; short or numeric terms match exactly"""
+        if is_fuzzy_word(term):
+            return self._trigrams.lookup(term)
+        return [(term, 1.0)] if term in self._tokens else []
+    
+    def _ids_with_words(self, words: Tuple[str, ...], limit: Optional[int]) -> List[int]:
+        """Smallest ids of recipes whose title or ingredients contain every word"""
+        postings = sorted((self._tokens.get(word, set()) for word in words), key=len)
+        smallest, rest = postings[0], postings[1:]
+        total = len(self._ids)
+        # Matches expected if the words occurred independently of each other
+        expected = len(smallest)
+        for other in rest:
+            expected = expected * len(other) / total
+        if limit is not None and expected >= 1 and limit * total / expected < len(smallest):
+            # Common words: walking ids in order usually finds `limit` hits
+            # before intersecting and sorting the postings would finish. The
+            # walk is capped in case the words rarely occur together.
+            budget = int(FUZZY_WALK_FACTOR * limit * total / expected)
+            hits = []
+            for recipe_id in islice(self._ids, budget):
+                if recipe_id in smallest and all(recipe_id in other for other in rest):
+                    hits.append(recipe_id)
+                    if len(hits) == limit:
+                        return hits
+            if budget >= total:
+                return hits
+        matches = smallest.intersection(*rest) if rest else smallest
+        return sorted(matches) if limit is None else sorted(matches)[:limit]
+    
+    def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        include = normalize_ingredients(include)
+        if not include:
+            return []
         
-        return matching_recipes
\ No newline at end of file
+        with self._lock:
+            matched = Counter()
+            for ingredient in include:
+                matched.update(self._by_ingredient.get(ingredient, ()))
+            excluded = set()
+            for ingredient in normalize_ingredients(exclude or []):
+                excluded |= self._by_ingredient.get(ingredient, set())
+            
+            hits = [
+                recipe_id for recipe_id, count in matched.items()
+                if recipe_id not in excluded and (not match_all or count == len(include))
+            ]
+            hits.sort(key=lambda recipe_id: (
+                -matched[recipe_id],
+                -matched[recipe_id] / self.recipes[recipe_id].ingredient_count,
+                recipe_id
+            ))
+            if limit is not None:
+                hits = hits[:limit]
+            return [self.recipes[recipe_id] for recipe_id in hits]
+    
+    def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[Dict]]:
+        fields = parse_fields(fields)
+        with self._lock:
+            record = self.recipes.get(recipe_id)
+            if record is None:
+                return None
+            ingredients = normalize_ingredients(record.ingredients)
+            buckets = [self._similar_buckets[key] for key in band_keys(ingredients)]
+            candidates = collect_candidates(sorted(buckets, key=len), recipe_id)
+            postings = [self._by_ingredient[ingredient] for ingredient in ingredients]
+            if len(candidates) < k:
+                # Too few near neighbours: fall back to recipes sharing the rarest ingredients
+                candidates |= collect_candidates(sorted(postings, key=len), recipe_id)
+            ranked = rank_similar(
+                len(ingredients),
+                record.cuisine,
+                record.total_minutes,
+                (
+                    (
+                        candidate,
+                        sum(candidate in ingredient_postings for ingredient_postings in postings),
+                        self.recipes[candidate].ingredient_count,
+                        self.recipes[candidate].cuisine,
+                        self.recipes[candidate].total_minutes
+                    )
+                    for candidate in candidates
+                ),
+                k
+            )
+            return [project(self.recipes[candidate], fields) for candidate in ranked]
+    
+    def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> Dict:
+        with self._lock:
+            matching = self._filtered_ids(filters)
+            if query is not None:
+                found = self._search_ids(tokenize(query))
+                matching = found if matching is None else matching & found
+            if matching is None:
+                # Unscoped: O(number of facet values)
+                return format_facets(self._facet_counts)
+            
+            counts = {facet: Counter() for facet in FACETS}
+            for recipe_id in matching:
+                values = self._facet_values(self.recipes[recipe_id])
+                for facet, value in values.items():
+                    counts[facet][value] += 1
+            return format_facets(counts)
+    
+    def get_diagnostics(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "recipes": len(self.recipes),
+                "indexed_tokens": len(self._vocabulary),
+                "indexed_ingredients": len(self._by_ingredient),
+                "ingredient_vocabulary": len(self._ingredient_names),
+                "cuisines": len(self._by_cuisine),
+                "difficulties": len(self._by_difficulty)
+            }
@@ -0,0 +1,103 @@
+import json
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List
+from .durations import parse_minutes, total_minutes
+from .projection import FIELD_COLUMNS, RECIPE_FIELDS
+
+# Typecode of the per-recipe ingredient id arrays (unsigned 32-bit)
+INGREDIENT_ID_TYPECODE = "I"
+
+class Vocabulary:
+    """Append-only table of distinct strings and their integer ids
+
+    Ids are never reused, so a name no recipe uses any more keeps its slot:
+    the table grows with the distinct names ever stored, which for
+    ingredients is tiny next to the recipes using them.
+    """
+
+    __slots__ = ("_ids", "names")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id_of(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self._ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+    def encode(self, names: Iterable[str]) -> array:
+        return array(INGREDIENT_ID_TYPECODE, map(self.id_of, names))
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        return list(map(self.names.__getitem__, ids))
+
+class RecipeRecord(Mapping):
+    """Compact, read-only stored form of a recipe
+
+    Attributes live in __slots__ rather than a per-recipe dict. Ingredients
+    are ids into the repository's Vocabulary, cuisine, difficulty and time
+    strings are interned, so repeated values share one string object, and
+    steps are one JSON string instead of a string object per step. Parsed
+    minutes, the distinct ingredient count and the version are kept
+    alongside, replacing separate per-recipe dicts.
+
+    As a Mapping it reads like the recipe dict the API returns, so it can be
+    handed out without a defensive copy: there is no way to assign through
+    it, and ingredients and steps come back as new lists on every access.
+    """
+
+    __slots__ = (
+        "id", "title", "ingredient_ids", "_steps", "prep_time", "cook_time", "difficulty", "cuisine",
+        "prep_minutes", "cook_minutes", "total_minutes", "ingredient_count", "version", "_vocabulary"
+    )
+
+    def __init__(self, recipe_id: int, recipe_data: Dict, vocabulary: Vocabulary, ingredient_count: int, version: int):
+        self.id = recipe_id
+        self.title = recipe_data["title"]
+        self.ingredient_ids = vocabulary.encode(recipe_data["ingredients"])
+        self._steps = json.dumps(list(recipe_data["steps"]), ensure_ascii=False, separators=(",", ":"))
+        self.prep_time = sys.intern(recipe_data["prepTime"])
+        self.cook_time = sys.intern(recipe_data["cookTime"])
+        self.difficulty = sys.intern(recipe_data["difficulty"])
+        self.cuisine = sys.intern(recipe_data["cuisine"])
+        self.prep_minutes = parse_minutes(self.prep_time)
+        self.cook_minutes = parse_minutes(self.cook_time)
+        self.total_minutes = total_minutes(self.prep_minutes, self.cook_minutes)
+        self.ingredient_count = ingredient_count
+        self.version = version
+        self._vocabulary = vocabulary
+
+    @property
+    def ingredients(self) -> List[str]:
+        return self._vocabulary.decode(self.ingredient_ids)
+
+    @property
+    def steps(self) -> List[str]:
+        return json.loads(self._steps)
+
+    def __getitem__(self, field: str):
+        attribute = FIELD_COLUMNS.get(field)
+        if attribute is None:
+            raise KeyError(field)
+        return getattr(self, attribute)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RECIPE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(RECIPE_FIELDS)
+
+    def __contains__(self, field) -> bool:
+        return field in FIELD_COLUMNS
+
+    def __repr__(self) -> str:
+        return f"RecipeRecord({dict(self)!r})"
@@ -0,0 +1,122 @@
+import functools
+import heapq
+import random
+import zlib
+from collections import Counter
+from itertools import islice
+from typing import Iterable, List, Optional, Set, Tuple
+
+# LSH bands and MinHash rows per band. Two recipes become candidates when every
+# row of some band agrees, which for ingredient Jaccard similarity s happens
+# with probability 1 - (1 - s**2)**12: about 0.4 at s = 0.2, 0.7 at 0.3, 0.97 at 0.5
+LSH_BANDS = 12
+LSH_ROWS = 2
+
+# Candidates taken from one bucket; buckets of common ingredient pairs can hold
+# a large share of the catalog
+LSH_BUCKET_LIMIT = 100
+
+# Candidates scored exactly per query, those sharing the most buckets first
+SIMILAR_MAX_CANDIDATES = 200
+
+# Score weights for shared ingredients (Jaccard), same cuisine and closeness of
+# total time; they sum to 1 so scores fall between 0 and 1
+INGREDIENT_WEIGHT = 0.7
+CUISINE_WEIGHT = 0.2
+TIME_WEIGHT = 0.1
+
+# MinHash values are taken modulo the largest prime below 2**28, so a band
+# number and LSH_ROWS values pack into one signed 64-bit SQLite INTEGER
+_HASH_BITS = 28
+_PRIME = (1 << _HASH_BITS) - 57
+
+# Fixed seed: band keys are stored in SQLite and must not change between runs
+_coefficients = random.Random(20240611)
+_PERMUTATIONS = [
+    (_coefficients.randrange(1, _PRIME), _coefficients.randrange(_PRIME))
+    for _ in range(LSH_BANDS * LSH_ROWS)
+]
+
+# (recipe id, shared ingredients, ingredient count, cuisine, total minutes)
+Candidate = Tuple[int, int, int, str, Optional[int]]
+
+@functools.lru_cache(maxsize=65536)
+def _ingredient_hashes(ingredient: str) -> Tuple[int, ...]:
+    """One hash per MinHash permutation; crc32 rather than hash() is stable across processes"""
+    base = zlib.crc32(ingredient.encode("utf-8"))
+    return tuple((a * base + b) % _PRIME for a, b in _PERMUTATIONS)
+
+def band_keys(ingredients: Iterable[str]) -> List[int]:
+    """LSH bucket key per band for a set of normalized ingredient names
+
+    Each key packs the band number above the band's MinHash values, so one
+    table or dict holds the buckets of every band. A recipe without
+    ingredients has no keys.
+    """
+    hashes = [_ingredient_hashes(ingredient) for ingredient in ingredients]
+    if not hashes:
+        return []
+    signature = list(map(min, zip(*hashes)))
+    keys = list(range(LSH_BANDS))
+    # Row r of band b is signature[b * LSH_ROWS + r], i.e. signature[r::LSH_ROWS][b]
+    for row in range(LSH_ROWS):
+        keys = [key << _HASH_BITS | value for key, value in zip(keys, signature[row::LSH_ROWS])]
+    return keys
+
+def collect_candidates(
+    buckets: Iterable[Iterable[int]],
+    recipe_id: int,
+    limit: int = SIMILAR_MAX_CANDIDATES
+) -> Set[int]:
+    """The `limit` ids found in the most buckets, without the recipe itself
+
+    Sharing more bands means more agreeing MinHash values, so the count is a
+    cheap estimate of similarity that picks which candidates to score exactly.
+    """
+    hits = Counter()
+    for bucket in buckets:
+        hits.update(islice(bucket, LSH_BUCKET_LIMIT))
+    hits.pop(recipe_id, None)
+    return {candidate for candidate, _ in hits.most_common(limit)}
+
+def time_similarity(minutes_a: Optional[int], minutes_b: Optional[int]) -> float:
+    """1 for equal total times, falling towards 0 as one grows relative to the other"""
+    if minutes_a is None or minutes_b is None:
+        return 0.0
+    longest = max(minutes_a, minutes_b)
+    return 1.0 if longest == 0 else 1 - abs(minutes_a - minutes_b) / longest
+
+def similarity_score(
+    shared: int,
+    size_a: int,
+    size_b: int,
+    same_cuisine: bool,
+    minutes_a: Optional[int],
+    minutes_b: Optional[int]
+) -> float:
+    union = size_a + size_b - shared
+    jaccard = shared / union if union else 0.0
+    return (INGREDIENT_WEIGHT * jaccard
+            + CUISINE_WEIGHT * same_cuisine
+            + TIME_WEIGHT * time_similarity(minutes_a, minutes_b))
+
+def rank_similar(
+    ingredient_count: int,
+    cuisine: str,
+    minutes: Optional[int],
+    candidates: Iterable[Candidate],
+    k: int
+) -> List[int]:
+    """Ids of the k candidates most similar to a recipe, best first (ties by id)
+
+    Candidates sharing no ingredient are skipped: cuisine and time alone do
+    not make a recipe similar.
+    """
+    cuisine = cuisine.lower()
+    scored = (
+        (similarity_score(shared, ingredient_count, count, cuisine == other_cuisine.lower(), minutes, other_minutes),
+         -candidate_id)
+        for candidate_id, shared, count, other_cuisine, other_minutes in candidates
+        if shared
+    )
+    return [-negated_id for _, negated_id in heapq.nlargest(k, scored)]
@@ -1,31 +1,179 @@
 import sqlite3
 import json
-from typing import List, Dict, Optional
-from .recipe_repository import RecipeRepository
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+from .recipe_repository import RecipeRepository, normalize_ingredients, order_by_request
+from .connection_pool import SQLiteConnectionPool
+from .pagination import encode_cursor, decode_cursor
+from .durations import parse_minutes, total_minutes
+from .filters import RecipeFilter
+from .facets import FACETS, format_facets, time_bucket_sql
+from .documents import document_array, document_sql, recipe_document
+from .projection import FIELD_COLUMNS, JSON_FIELDS, parse_fields
+from .trigrams import TermMatches, best_matches, fuzzy_rank, is_fuzzy_word, query_terms, searchable_words, trigrams
+from .similarity import LSH_BUCKET_LIMIT, band_keys, collect_candidates, rank_similar
+from app.profiling import ProfiledConnection, current_profile
+
+# PRAGMAs applied once to every connection when it is opened
+DEFAULT_PRAGMAS = {
+    "foreign_keys": "ON"
+}
+
+# Opt-in performance profile: WAL lets readers proceed while a write is in
+# progress, and NORMAL sync is durable in WAL mode except on power loss
+PERFORMANCE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,
+    "cache_size": -64000,
+    "busy_timeout": 5000
+}
+
+# PRAGMAs reported by get_diagnostics()
+DIAGNOSTIC_PRAGMAS = [
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "busy_timeout",
+    "foreign_keys"
+]
+
+# Rows written per transaction by create_recipes_bulk
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Postings counted per ingredient when picking the rarest one to drive a search
+INGREDIENT_DRIVER_PROBE_LIMIT = 10000
+
+# Ids bound per IN (...) query by get_recipes_by_ids, well under SQLite's variable limit
+ID_LOOKUP_CHUNK_SIZE = 500
+
+# Columns written from a recipe dict, in _recipe_params() order
+RECIPE_WRITE_COLUMNS = (
+    "title", "ingredients", "steps", "prep_time", "cook_time", "difficulty", "cuisine",
+    "prep_minutes", "cook_minutes", "total_minutes"
+)
+
+# Columns of recipes indexed for full-text search: the ones the search API
+# promises, and the ones MemoryRecipeRepository indexes
+FTS_COLUMNS = ("title", "ingredients")
+
+# bm25() column weights for FTS_COLUMNS
+FTS_COLUMN_WEIGHTS = (10.0, 5.0)
+
+# Group commit: seconds the writer waits after a group's first write for more
+# to join it (0 takes only what is already queued), the most writes per
+# group, and the most writes queued before writers block
+GROUP_COMMIT_INTERVAL = 0.002
+GROUP_COMMIT_MAX_BATCH = 200
+GROUP_COMMIT_QUEUE_SIZE = 1000
+
+# Writes callers may queue themselves with submit_write, and the
+# connection-level mutation behind each
+QUEUED_WRITES = {
+    "create_recipe": "_insert_recipe",
+    "update_recipe": "_update_recipe",
+    "delete_recipe": "_delete_recipe"
+}
 
 class SQLiteRecipeRepository(RecipeRepository):
-    """SQLite implementation of recipe repository"""
+    """SQLite implementation of recipe repository
+
+    By default every create, update and delete commits on its own. With
+    group_commit they are queued to a single writer thread instead, which
+    applies up to `group_commit_max_batch` of them in one transaction,
+    waiting at most `group_commit_interval` seconds for a group to fill, so
+    one commit (and one fsync) covers the whole group. Each write runs under
+    its own SAVEPOINT, so a failing write is rolled back alone, and callers
+    get their result once their group has committed. At most
+    `group_commit_queue_size` writes wait in the queue; further writers
+    block until there is room. Bulk inserts and access counts go through
+    the same writer, so ids derived from sqlite_sequence are read inside
+    the transaction that inserted them.
+    """
     
-    def __init__(self, db_path: str = "recipes.db"):
+    def __init__(
+        self,
+        db_path: str = "recipes.db",
+        pool_size: int = 5,
+        pool_timeout: float = 30.0,
+        pragmas: Optional[Dict[str, Union[str, int]]] = None,
+        performance_profile: bool = False,
+        group_commit: bool = False,
+        group_commit_interval: float = GROUP_COMMIT_INTERVAL,
+        group_commit_max_batch: int = GROUP_COMMIT_MAX_BATCH,
+        group_commit_queue_size: int = GROUP_COMMIT_QUEUE_SIZE
+    ):
         self.db_path = db_path
+        self.performance_profile = performance_profile
+        self.pragmas = {
+            **DEFAULT_PRAGMAS,
+            **(PERFORMANCE_PRAGMAS if performance_profile else {}),
+            **(pragmas or {})
+        }
         self.connection = None
+        self.pool = None
+        self.fts_enabled = False
         if db_path == ":memory:":
             # For in-memory databases, keep a persistent connection
             self.connection = sqlite3.connect(db_path, check_same_thread=False)
+            for name, value in self.pragmas.items():
+                self.connection.execute(f"PRAGMA {name} = {value}")
+            self._connection_lock = threading.RLock()
+        else:
+            # For file databases, reuse connections from a bounded pool
+            self.pool = SQLiteConnectionPool(
+                db_path,
+                max_size=pool_size,
+                timeout=pool_timeout,
+                pragmas=self.pragmas
+            )
+        self.group_commit_interval = group_commit_interval
+        self.group_commit_max_batch = group_commit_max_batch
+        self._group_stats = {"groups": 0, "writes": 0, "largest_group": 0}
+        self._write_queue = None
+        self._writer = None
         self._init_database()
         self._seed_initial_data()
+        
+        if group_commit:
+            self._write_queue = queue.Queue(maxsize=group_commit_queue_size)
+            self._writer = threading.Thread(target=self._run_writer, name="recipe-db-writer", daemon=True)
+            self._writer.start()
     
-    def _get_connection(self):
-        """Get database connection"""
+    @contextmanager
+    def _connection(self):
+        """Get a database connection for the duration of a block
+
+        Inside a profiled request the connection is wrapped so every
+        statement and its timing is added to the request's profile.
+        """
+        profile = current_profile()
         if self.connection:
-            return self.connection
-        return sqlite3.connect(self.db_path)
+            # The shared in-memory connection is serialized across threads
+            with self._connection_lock:
+                try:
+                    yield ProfiledConnection(self.connection, profile) if profile else self.connection
+                finally:
+                    if self.connection and self.connection.in_transaction:
+                        self.connection.rollback()
+        else:
+            with self.pool.connection() as conn:
+                yield ProfiledConnection(conn, profile) if profile else conn
     
     def _init_database(self):
         """Initialize the database and create tables"""
-        if self.connection:
-            # For in-memory databases
-            self.connection.execute("""
+        with self._connection() as conn:
+            if self.performance_profile and not self.connection:
+                # journal_mode is persistent, so it only needs setting once per file
+                conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS recipes (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     title TEXT NOT NULL,
@@ -37,75 +185,414 @@ class SQLiteRecipeRepository(RecipeRepository):
                     cuisine TEXT NOT NULL
                 )
             """)
-            self.connection.commit()
-        else:
-            # For file databases
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS recipes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        title TEXT NOT NULL,
-                        ingredients TEXT NOT NULL,
-                        steps TEXT NOT NULL,
-                        prep_time TEXT NOT NULL,
-                        cook_time TEXT NOT NULL,
-                        difficulty TEXT NOT NULL,
-                        cuisine TEXT NOT NULL
-                    )
+            self._migrate_schema(conn)
+            self.fts_enabled = self._init_search_index(conn)
+            conn.commit()
+    
+    @staticmethod
+    def _ensure_column(conn, name: str, definition: str) -> bool:
+        """Add a column to recipes if a database predates it; True if it was added"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(recipes)")}
+        if name in columns:
+            return False
+        conn.execute(f"ALTER TABLE recipes ADD COLUMN {name} {definition}")
+        return True
+    
+    def _migrate_schema(self, conn):
+        """Bring older databases up to date; new columns are only ever added here"""
+        # Per-recipe version, incremented on every update
+        self._ensure_column(conn, "version", "INTEGER NOT NULL DEFAULT 1")
+        
+        # Catalog-wide version, bumped by triggers on every mutation
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS catalog_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO catalog_state (id, version) VALUES (1, 1);
+            CREATE TRIGGER IF NOT EXISTS catalog_version_insert AFTER INSERT ON recipes BEGIN
+                UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS catalog_version_update AFTER UPDATE ON recipes BEGIN
+                UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS catalog_version_delete AFTER DELETE ON recipes BEGIN
+                UPDATE catalog_state SET version = version + 1 WHERE id = 1;
+            END;
+        """)
+        
+        # Prep/cook/total time parsed from the free-text columns, in minutes
+        # (NULL when unparseable), indexed for structured filters
+        added = [
+            self._ensure_column(conn, column, "INTEGER")
+            for column in ("prep_minutes", "cook_minutes", "total_minutes")
+        ]
+        if any(added):
+            rows = conn.execute("SELECT id, prep_time, cook_time FROM recipes").fetchall()
+            updates = []
+            for recipe_id, prep_time, cook_time in rows:
+                prep, cook = parse_minutes(prep_time), parse_minutes(cook_time)
+                updates.append((prep, cook, total_minutes(prep, cook), recipe_id))
+            conn.executemany(
+                "UPDATE recipes SET prep_minutes = ?, cook_minutes = ?, total_minutes = ? WHERE id = ?",
+                updates
+            )
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS recipes_by_cuisine_difficulty_time
+                ON recipes (cuisine COLLATE NOCASE, difficulty COLLATE NOCASE, total_minutes);
+            CREATE INDEX IF NOT EXISTS recipes_by_difficulty_time
+                ON recipes (difficulty COLLATE NOCASE, total_minutes);
+            CREATE INDEX IF NOT EXISTS recipes_by_total_minutes
+                ON recipes (total_minutes);
+        """)
+        
+        self._init_facet_counts(conn)
+        
+        # Normalized ingredient names, one row per (ingredient, recipe). The
+        # recipe's ingredient count is repeated on each row so coverage ranking
+        # never has to look beyond the rows that matched.
+        has_ingredient_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_ingredients'"
+        ).fetchone()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS recipe_ingredients (
+                ingredient TEXT NOT NULL,
+                recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+                ingredient_count INTEGER NOT NULL,
+                PRIMARY KEY (ingredient, recipe_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS recipe_ingredients_by_recipe
+                ON recipe_ingredients (recipe_id, ingredient);
+            CREATE INDEX IF NOT EXISTS recipe_ingredients_by_size
+                ON recipe_ingredients (ingredient, ingredient_count, recipe_id);
+        """)
+        if not has_ingredient_table:
+            rows = conn.execute("SELECT id, ingredients FROM recipes").fetchall()
+            self._index_ingredients(conn, [
+                (recipe_id, {"ingredients": json.loads(ingredients)})
+                for recipe_id, ingredients in rows
+            ])
+        
+        # Each recipe's response body, serialized once per write so reads can
+        # send it without decoding the row and re-encoding a dict
+        has_document_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_documents'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS recipe_documents (
+                recipe_id INTEGER PRIMARY KEY REFERENCES recipes (id) ON DELETE CASCADE,
+                document TEXT NOT NULL
+            )
+        """)
+        if not has_document_table:
+            conn.execute(f"""
+                INSERT INTO recipe_documents (recipe_id, document)
+                SELECT recipes.id, {document_sql("recipes")} FROM recipes
+            """)
+        
+        # Vocabulary of title and ingredient words with their trigrams, for
+        # finding likely spellings of misspelled search terms. Words are only
+        # added: one no recipe uses any more just matches nothing.
+        has_term_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_terms'"
+        ).fetchone()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS search_terms (
+                term TEXT PRIMARY KEY,
+                trigram_count INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS term_trigrams (
+                trigram TEXT NOT NULL,
+                term TEXT NOT NULL,
+                PRIMARY KEY (trigram, term)
+            ) WITHOUT ROWID;
+        """)
+        if not has_term_table:
+            rows = conn.execute("SELECT title, ingredients FROM recipes").fetchall()
+            self._index_terms(conn, [
+                (None, {"title": title, "ingredients": json.loads(ingredients)})
+                for title, ingredients in rows
+            ])
+        
+        # MinHash LSH buckets over each recipe's ingredient set, one row per
+        # band, so similar recipes are found without comparing every pair
+        has_lsh_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_lsh_buckets'"
+        ).fetchone()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS recipe_lsh_buckets (
+                band_key INTEGER NOT NULL,
+                recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+                PRIMARY KEY (band_key, recipe_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS recipe_lsh_buckets_by_recipe
+                ON recipe_lsh_buckets (recipe_id);
+        """)
+        if not has_lsh_table:
+            rows = conn.execute("SELECT id, ingredients FROM recipes").fetchall()
+            self._index_similarity(conn, [
+                (recipe_id, {"ingredients": json.loads(ingredients)})
+                for recipe_id, ingredients in rows
+            ])
+        
+        # Reads per recipe as reported by caches in front of this repository,
+        # so they can warm up with the most-read recipes after a restart
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS recipe_access_counts (
+                recipe_id INTEGER PRIMARY KEY REFERENCES recipes (id) ON DELETE CASCADE,
+                reads INTEGER NOT NULL
+            )
+        """)
+    
+    @staticmethod
+    def _facet_expressions(row: str) -> Dict[str, str]:
+        """SQL expression per facet for a row alias (new, old or a table name)"""
+        return {
+            "cuisine": f"{row}.cuisine",
+            "difficulty": f"{row}.difficulty",
+            "total_time": time_bucket_sql(f"{row}.total_minutes")
+        }
+    
+    def _init_facet_counts(self, conn):
+        """Per-value recipe counts for each facet, kept current by triggers"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'facet_counts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS facet_counts (
+                facet TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (facet, value)
+            ) WITHOUT ROWID
+        """)
+        
+        increments = "".join(
+            f"""
+                INSERT INTO facet_counts (facet, value, count) VALUES ('{facet}', {expression}, 1)
+                ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;"""
+            for facet, expression in self._facet_expressions("new").items()
+        )
+        decrements = "".join(
+            f"""
+                UPDATE facet_counts SET count = count - 1
+                WHERE facet = '{facet}' AND value = {expression};"""
+            for facet, expression in self._facet_expressions("old").items()
+        ) + """
+                DELETE FROM facet_counts WHERE count <= 0;"""
+        conn.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS facet_counts_insert AFTER INSERT ON recipes BEGIN{increments}
+            END;
+            CREATE TRIGGER IF NOT EXISTS facet_counts_delete AFTER DELETE ON recipes BEGIN{decrements}
+            END;
+            CREATE TRIGGER IF NOT EXISTS facet_counts_update
+            AFTER UPDATE OF cuisine, difficulty, total_minutes ON recipes BEGIN{decrements}{increments}
+            END;
+        """)
+        
+        if not exists:
+            # One-time backfill from the existing rows
+            for facet, expression in self._facet_expressions("recipes").items():
+                conn.execute(f"""
+                    INSERT INTO facet_counts (facet, value, count)
+                    SELECT '{facet}', {expression}, COUNT(*) FROM recipes GROUP BY 2
                 """)
-                conn.commit()
+    
+    def _init_search_index(self, conn) -> bool:
+        """Create the FTS5 index and its sync triggers; False if FTS5 is unavailable"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(recipes_fts)")]
+        exists = bool(columns)
+        if exists and tuple(columns) != FTS_COLUMNS:
+            # Indexed columns changed (steps and cuisine were dropped); rebuild
+            conn.executescript("""
+                DROP TRIGGER IF EXISTS recipes_fts_insert;
+                DROP TRIGGER IF EXISTS recipes_fts_delete;
+                DROP TRIGGER IF EXISTS recipes_fts_update;
+                DROP TABLE recipes_fts;
+            """)
+            exists = False
+        indexed = ", ".join(FTS_COLUMNS)
+        new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+        old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+        try:
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+                    {indexed},
+                    content = 'recipes', content_rowid = 'id',
+                    prefix = '2 3 4'
+                )
+            """)
+        except sqlite3.OperationalError:
+            # SQLite was built without FTS5; search falls back to LIKE
+            return False
+        
+        conn.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN
+                INSERT INTO recipes_fts (rowid, {indexed})
+                VALUES (new.id, {new_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN
+                INSERT INTO recipes_fts (recipes_fts, rowid, {indexed})
+                VALUES ('delete', old.id, {old_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS recipes_fts_update
+            AFTER UPDATE OF {indexed} ON recipes BEGIN
+                INSERT INTO recipes_fts (recipes_fts, rowid, {indexed})
+                VALUES ('delete', old.id, {old_values});
+                INSERT INTO recipes_fts (rowid, {indexed})
+                VALUES (new.id, {new_values});
+            END;
+        """)
+        
+        if not exists:
+            # One-time backfill for databases created before the index existed
+            conn.execute("INSERT INTO recipes_fts (recipes_fts) VALUES ('rebuild')")
+        return True
+    
+    @staticmethod
+    def _fts_query(query: str) -> Optional[str]:
+        """Turn free text into an FTS5 query matching every term as a prefix"""
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return None
+        return " ".join(f'"{term}"*' for term in terms)
     
     def _seed_initial_data(self):
         """Add initial sample data if database is empty"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM recipes")
-        count = cursor.fetchone()[0]
+        with self._connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
         
         if count == 0:
             # Insert sample data
-            sample_recipes = [
-                (
-                    "Spaghetti Carbonara",
-                    json.dumps(["spaghetti", "eggs", "pancetta", "parmesan", "black pepper"]),
-                    json.dumps(["Cook pasta", "Fry pancetta", "Mix eggs and cheese", "Combine all with pasta"]),
-                    "10 minutes",
-                    "15 minutes",
-                    "Medium",
-                    "Italian"
-                ),
-                (
-                    "Chicken Tikka Masala",
-                    json.dumps(["chicken", "yogurt", "tomato sauce", "spices"]),
-                    json.dumps(["Marinate chicken", "Grill chicken", "Simmer in sauce", "Serve with rice"]),
-                    "30 minutes",
-                    "25 minutes",
-                    "Hard",
-                    "Indian"
-                ),
-                (
-                    "Avocado Toast",
-                    json.dumps(["bread", "avocado", "lemon", "salt", "pepper"]),
-                    json.dumps(["Toast bread", "Mash avocado with lemon, salt, pepper", "Spread and serve"]),
-                    "5 minutes",
-                    "2 minutes",
-                    "Easy",
-                    "American"
-                )
+            self.create_recipes_bulk([
+                {
+                    "title": "Spaghetti Carbonara",
+                    "ingredients": ["spaghetti", "eggs", "pancetta", "parmesan", "black pepper"],
+                    "steps": ["Cook pasta", "Fry pancetta", "Mix eggs and cheese", "Combine all with pasta"],
+                    "prepTime": "10 minutes",
+                    "cookTime": "15 minutes",
+                    "difficulty": "Medium",
+                    "cuisine": "Italian"
+                },
+                {
+                    "title": "Chicken Tikka Masala",
+                    "ingredients": ["chicken", "yogurt", "tomato sauce", "spices"],
+                    "steps": ["Marinate chicken", "Grill chicken", "Simmer in sauce", "Serve with rice"],
+                    "prepTime": "30 minutes",
+                    "cookTime": "25 minutes",
+                    "difficulty": "Hard",
+                    "cuisine": "Indian"
+                },
+                {
+                    "title": "Avocado Toast",
+                    "ingredients": ["bread", "avocado", "lemon", "salt", "pepper"],
+                    "steps": ["Toast bread", "Mash avocado with lemon, salt, pepper", "Spread and serve"],
+                    "prepTime": "5 minutes",
+                    "cookTime": "2 minutes",
+                    "difficulty": "Easy",
+                    "cuisine": "American"
+                }
+            ])
+    
+    @staticmethod
+    def _recipe_params(recipe_data: Dict) -> Tuple:
+        """Column values for INSERT/UPDATE, in RECIPE_WRITE_COLUMNS order"""
+        prep_minutes = parse_minutes(recipe_data["prepTime"])
+        cook_minutes = parse_minutes(recipe_data["cookTime"])
+        return (
+            recipe_data["title"],
+            json.dumps(recipe_data["ingredients"]),
+            json.dumps(recipe_data["steps"]),
+            recipe_data["prepTime"],
+            recipe_data["cookTime"],
+            recipe_data["difficulty"],
+            recipe_data["cuisine"],
+            prep_minutes,
+            cook_minutes,
+            total_minutes(prep_minutes, cook_minutes)
+        )
+    
+    @staticmethod
+    def _filter_clause(filters: Optional[RecipeFilter]) -> Tuple[str, List]:
+        """SQL predicates (each prefixed with AND) and parameters for a RecipeFilter"""
+        if filters is None:
+            return "", []
+        clauses = []
+        params = []
+        if filters.cuisine is not None:
+            clauses.append("cuisine = ? COLLATE NOCASE")
+            params.append(filters.cuisine)
+        if filters.difficulty is not None:
+            clauses.append("difficulty = ? COLLATE NOCASE")
+            params.append(filters.difficulty)
+        for field, minimum, maximum in filters.time_ranges():
+            if minimum is not None:
+                clauses.append(f"{field} >= ?")
+                params.append(minimum)
+            if maximum is not None:
+                clauses.append(f"{field} <= ?")
+                params.append(maximum)
+        return "".join(f" AND {clause}" for clause in clauses), params
+    
+    def _index_recipes(self, conn, recipes: List[Tuple[int, Dict]], replace: bool = False):
+        """Maintain the derived side tables for recipes written in this transaction"""
+        self._index_ingredients(conn, recipes, replace)
+        self._index_terms(conn, recipes)
+        self._index_similarity(conn, recipes, replace)
+        conn.executemany(
+            "INSERT OR REPLACE INTO recipe_documents (recipe_id, document) VALUES (?, ?)",
+            [
+                (recipe_id, recipe_document({**recipe_data, "id": recipe_id}))
+                for recipe_id, recipe_data in recipes
             ]
-            
-            cursor.executemany("""
-                INSERT INTO recipes (title, ingredients, steps, prep_time, cook_time, difficulty, cuisine)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, sample_recipes)
-            
-            if self.connection:
-                self.connection.commit()
-            else:
-                conn.commit()
-        
-        if not self.connection:
-            conn.close()
+        )
+    
+    def _index_ingredients(self, conn, recipes: List[Tuple[int, Dict]], replace: bool = False):
+        if replace:
+            conn.executemany(
+                "DELETE FROM recipe_ingredients WHERE recipe_id = ?",
+                [(recipe_id,) for recipe_id, _ in recipes]
+            )
+        rows = []
+        for recipe_id, recipe_data in recipes:
+            ingredients = normalize_ingredients(recipe_data["ingredients"])
+            rows.extend((ingredient, recipe_id, len(ingredients)) for ingredient in ingredients)
+        conn.executemany(
+            "INSERT INTO recipe_ingredients (ingredient, recipe_id, ingredient_count) VALUES (?, ?, ?)",
+            rows
+        )
+    
+    def _index_terms(self, conn, recipes: List[Tuple[Optional[int], Dict]]):
+        """Add words not yet in the fuzzy search vocabulary, with their trigrams"""
+        words = set()
+        for _, recipe_data in recipes:
+            words |= searchable_words(recipe_data)
+        trigram_rows = []
+        for word in sorted(words):
+            grams = trigrams(word)
+            # The vocabulary is small and mostly known, so probing each word
+            # is far cheaper than re-inserting its trigrams every time
+            if conn.execute(
+                "INSERT OR IGNORE INTO search_terms (term, trigram_count) VALUES (?, ?)",
+                (word, len(grams))
+            ).rowcount:
+                trigram_rows.extend((gram, word) for gram in grams)
+        conn.executemany("INSERT OR IGNORE INTO term_trigrams (trigram, term) VALUES (?, ?)", trigram_rows)
+    
+    def _index_similarity(self, conn, recipes: List[Tuple[int, Dict]], replace: bool = False):
+        if replace:
+            conn.executemany(
+                "DELETE FROM recipe_lsh_buckets WHERE recipe_id = ?",
+                [(recipe_id,) for recipe_id, _ in recipes]
+            )
+        conn.executemany(
+            "INSERT INTO recipe_lsh_buckets (band_key, recipe_id) VALUES (?, ?)",
+            [
+                (key, recipe_id)
+                for recipe_id, recipe_data in recipes
+                for key in band_keys(normalize_ingredients(recipe_data["ingredients"]))
+            ]
+        )
     
     def _row_to_dict(self, row) -> Dict:
         """Convert database row to dictionary"""
@@ -120,123 +607,697 @@ class SQLiteRecipeRepository(RecipeRepository):
             "cuisine": row[7]
         }
     
-    def get_all_recipes(self) -> List[Dict]:
-        """Get all recipes from database"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM recipes")
-        rows = cursor.fetchall()
+    def _projection(self, fields: Optional[Sequence[str]]) -> Tuple[str, Callable]:
+        """SELECT list and row converter for a field selection
         
-        if not self.connection:
-            conn.close()
+        Unselected columns are neither read nor JSON-decoded.
+        """
+        fields = parse_fields(fields)
+        if fields is None:
+            return "recipes.*", self._row_to_dict
+        columns = ", ".join(f"recipes.{FIELD_COLUMNS[field]}" for field in fields)
+        decoders = [json.loads if field in JSON_FIELDS else None for field in fields]
         
-        return [self._row_to_dict(row) for row in rows]
+        def convert(row) -> Dict:
+            return {
+                field: decode(value) if decode else value
+                for field, decode, value in zip(fields, decoders, row)
+            }
+        return columns, convert
     
-    def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict]:
-        """Get a specific recipe by ID"""
-        conn = self._get_connection()
+    def _fetch_recipe(self, conn, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """Load a recipe using an already checked-out connection"""
+        columns, convert = self._projection(fields)
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM recipes WHERE id = ?", (recipe_id,))
+        cursor.execute(f"SELECT {columns} FROM recipes WHERE id = ?", (recipe_id,))
         row = cursor.fetchone()
+        return convert(row) if row else None
+    
+    def get_all_recipes(self) -> List[Dict]:
+        """Get all recipes from database"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM recipes")
+            rows = cursor.fetchall()
         
-        if not self.connection:
-            conn.close()
+        return [self._row_to_dict(row) for row in rows]
+    
+    def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of recipes ordered by id, seeking past the cursor via the primary key
+
+        Filter predicates are evaluated in SQL, using the cuisine/difficulty/time indexes.
+        """
+        after_id = decode_cursor(cursor) if cursor is not None else 0
+        where, params = self._filter_clause(filters)
+        columns, convert = self._projection(fields)
+        with self._connection() as conn:
+            # Fetch one extra row to learn whether another page exists
+            rows = conn.execute(
+                f"SELECT {columns} FROM recipes WHERE id > ?{where} ORDER BY id LIMIT ?",
+                (after_id, *params, limit + 1)
+            ).fetchall()
         
-        return self._row_to_dict(row) if row else None
+        page = [convert(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(page[-1]["id"]) if len(rows) > limit else None
+        return page, next_cursor
     
-    def create_recipe(self, recipe_data: Dict) -> Dict:
-        """Create a new recipe"""
-        conn = self._get_connection()
+    def iter_recipes(self, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream all recipes ordered by id, holding at most one batch of rows in memory
+
+        Each batch is a keyset page read on its own checkout, so nothing (not
+        even the in-memory connection's lock) is held while the consumer
+        works through it, and a slow or abandoned iterator blocks no one.
+        """
+        after = 0
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM recipes WHERE id > ? ORDER BY id LIMIT ?", (after, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_dict(row)
+            after = rows[-1][0]
+    
+    def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """Get a specific recipe by ID"""
+        with self._connection() as conn:
+            return self._fetch_recipe(conn, recipe_id, fields)
+    
+    def get_recipes_by_ids(self, recipe_ids: Iterable[int]) -> Tuple[List[Dict], List[int]]:
+        """Get many recipes with one IN (...) query per chunk on a single connection"""
+        recipe_ids = list(recipe_ids)
+        unique_ids = list(dict.fromkeys(recipe_ids))
+        found = {}
+        with self._connection() as conn:
+            for start in range(0, len(unique_ids), ID_LOOKUP_CHUNK_SIZE):
+                chunk = unique_ids[start:start + ID_LOOKUP_CHUNK_SIZE]
+                rows = conn.execute(
+                    f"SELECT * FROM recipes WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._row_to_dict(row)
+        return order_by_request(recipe_ids, found)
+    
+    def get_versioned_recipes(self, recipe_ids: Iterable[int]) -> List[Tuple[Dict, int]]:
+        """Get recipes together with their versions, in no particular order
+
+        For loading recipes into a cache tier that also answers version
+        lookups; ids that do not exist are left out.
+        """
+        unique_ids = list(dict.fromkeys(recipe_ids))
+        loaded = []
+        with self._connection() as conn:
+            for start in range(0, len(unique_ids), ID_LOOKUP_CHUNK_SIZE):
+                chunk = unique_ids[start:start + ID_LOOKUP_CHUNK_SIZE]
+                rows = conn.execute(
+                    f"SELECT recipes.*, recipes.version FROM recipes WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ).fetchall()
+                loaded.extend((self._row_to_dict(row), row[-1]) for row in rows)
+        return loaded
+    
+    def add_access_counts(self, counts: Dict[int, int]):
+        """Add to the per-recipe read counts; ids that no longer exist are skipped"""
+        if not counts:
+            return
+        self._write(self._add_access_counts, counts)
+    
+    @staticmethod
+    def _add_access_counts(conn, counts: Dict[int, int]):
+        conn.executemany("""
+            INSERT INTO recipe_access_counts (recipe_id, reads)
+            SELECT id, ? FROM recipes WHERE id = ?
+            ON CONFLICT (recipe_id) DO UPDATE SET reads = reads + excluded.reads
+        """, [(reads, recipe_id) for recipe_id, reads in counts.items()])
+    
+    def get_most_accessed_ids(self, limit: int) -> List[int]:
+        """Ids of the most-read recipes, most reads first"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT recipe_id FROM recipe_access_counts ORDER BY reads DESC, recipe_id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [recipe_id for recipe_id, in rows]
+    
+    def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        """Get a recipe's stored JSON document (no row decoding)"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT document FROM recipe_documents WHERE recipe_id = ?", (recipe_id,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        """Get a page of stored JSON documents spliced into one array"""
+        after_id = decode_cursor(cursor) if cursor is not None else 0
+        where, params = self._filter_clause(filters)
+        with self._connection() as conn:
+            # Pick the page first so documents are only read for rows on it
+            rows = conn.execute(f"""
+                SELECT page.id, recipe_documents.document
+                FROM (SELECT id FROM recipes WHERE id > ?{where} ORDER BY id LIMIT ?) AS page
+                JOIN recipe_documents ON recipe_documents.recipe_id = page.id
+                ORDER BY page.id
+            """, (after_id, *params, limit + 1)).fetchall()
+        
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][0]) if len(rows) > limit else None
+        return document_array(document for _, document in page), next_cursor
+    
+    def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        """Get a recipe's version without loading or decoding its body"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT version FROM recipes WHERE id = ?", (recipe_id,)).fetchone()
+        return row[0] if row else None
+    
+    def get_catalog_version(self) -> int:
+        """Get the catalog-wide version, which changes on every mutation"""
+        with self._connection() as conn:
+            return conn.execute("SELECT version FROM catalog_state WHERE id = 1").fetchone()[0]
+    
+    @property
+    def group_commit(self) -> bool:
+        return self._writer is not None
+    
+    def _submit(self, mutation: Callable, args: tuple, block: bool = True) -> Future:
+        future = Future()
+        self._write_queue.put((mutation, args, future), block=block)
+        return future
+    
+    def submit_write(self, method: str, *args, block: bool = True) -> Future:
+        """Queue create_recipe, update_recipe or delete_recipe for the next group commit
+
+        Returns a future for the call's result instead of waiting on it, so
+        async callers need not hold a thread while the group fills. With
+        block=False a full queue raises queue.Full instead of waiting for room.
+        Only available with group commit enabled.
+        """
+        return self._submit(getattr(self, QUEUED_WRITES[method]), args, block)
+    
+    def _write(self, mutation: Callable, *args):
+        """Run `mutation(conn, *args)` and commit, alone or as part of the next group commit"""
+        if self._writer is None:
+            with self._connection() as conn:
+                result = mutation(conn, *args)
+                conn.commit()
+                return result
+        # Blocks while the queue is full, holding writers back until the writer catches up
+        return self._submit(mutation, args).result()
+    
+    def _run_writer(self):
+        """Group commit writer thread: collect queued writes and commit them together"""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            group = [item]
+            deadline = time.monotonic() + self.group_commit_interval
+            stopping = False
+            while len(group) < self.group_commit_max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._write_queue.get(timeout=remaining) if remaining > 0 else self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            self._commit_group(group)
+            if stopping:
+                return
+    
+    def _commit_group(self, group: List[Tuple[Callable, tuple, Future]]):
+        """Apply a group of writes in one transaction, each under its own SAVEPOINT"""
+        outcomes = []
+        try:
+            with self._connection() as conn:
+                try:
+                    conn.execute("BEGIN")
+                    for mutation, args, _ in group:
+                        conn.execute("SAVEPOINT group_write")
+                        try:
+                            outcomes.append((True, mutation(conn, *args)))
+                        except Exception as error:
+                            conn.execute("ROLLBACK TO group_write")
+                            outcomes.append((False, error))
+                        conn.execute("RELEASE group_write")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception as error:
+            # Nothing in the group was committed
+            for _, _, future in group:
+                future.set_exception(error)
+            return
+        self._group_stats["groups"] += 1
+        self._group_stats["writes"] += len(group)
+        self._group_stats["largest_group"] = max(self._group_stats["largest_group"], len(group))
+        for (_, _, future), (succeeded, outcome) in zip(group, outcomes):
+            if succeeded:
+                future.set_result(outcome)
+            else:
+                future.set_exception(outcome)
+    
+    def _insert_recipe(self, conn, recipe_data: Dict) -> Dict:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO recipes (title, ingredients, steps, prep_time, cook_time, difficulty, cuisine)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            recipe_data["title"],
-            json.dumps(recipe_data["ingredients"]),
-            json.dumps(recipe_data["steps"]),
-            recipe_data["prepTime"],
-            recipe_data["cookTime"],
-            recipe_data["difficulty"],
-            recipe_data["cuisine"]
-        ))
+        cursor.execute(f"""
+            INSERT INTO recipes ({", ".join(RECIPE_WRITE_COLUMNS)})
+            VALUES ({", ".join("?" for _ in RECIPE_WRITE_COLUMNS)})
+        """, self._recipe_params(recipe_data))
         recipe_id = cursor.lastrowid
-        
-        if self.connection:
-            self.connection.commit()
-        else:
-            conn.commit()
-            conn.close()
-        
-        # Return the created recipe
-        return self.get_recipe_by_id(recipe_id)
+        self._index_recipes(conn, [(recipe_id, recipe_data)])
+        return self._fetch_recipe(conn, recipe_id)
     
-    def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
-        """Update an existing recipe"""
-        conn = self._get_connection()
+    def _update_recipe(self, conn, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
         cursor = conn.cursor()
-        cursor.execute("""
+        cursor.execute(f"""
             UPDATE recipes 
-            SET title = ?, ingredients = ?, steps = ?, prep_time = ?, cook_time = ?, difficulty = ?, cuisine = ?
+            SET {", ".join(f"{column} = ?" for column in RECIPE_WRITE_COLUMNS)},
+                version = version + 1
             WHERE id = ?
-        """, (
-            recipe_data["title"],
-            json.dumps(recipe_data["ingredients"]),
-            json.dumps(recipe_data["steps"]),
-            recipe_data["prepTime"],
-            recipe_data["cookTime"],
-            recipe_data["difficulty"],
-            recipe_data["cuisine"],
-            recipe_id
-        ))
-        
+        """, (*self._recipe_params(recipe_data), recipe_id))
         if cursor.rowcount == 0:
-            if not self.connection:
-                conn.close()
             return None
-        
-        if self.connection:
-            self.connection.commit()
-        else:
-            conn.commit()
-            conn.close()
-            
-        return self.get_recipe_by_id(recipe_id)
+        self._index_recipes(conn, [(recipe_id, recipe_data)], replace=True)
+        return self._fetch_recipe(conn, recipe_id)
     
-    def delete_recipe(self, recipe_id: int) -> bool:
-        """Delete a recipe"""
-        conn = self._get_connection()
+    @staticmethod
+    def _delete_recipe(conn, recipe_id: int) -> bool:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM recipes WHERE id = ?", (recipe_id,))
-        deleted = cursor.rowcount > 0
+        return cursor.rowcount > 0
+    
+    def create_recipe(self, recipe_data: Dict) -> Dict:
+        """Create a new recipe"""
+        return self._write(self._insert_recipe, recipe_data)
+    
+    def create_recipes_bulk(
+        self,
+        recipes: Iterable[Dict],
+        batch_size: int = BULK_INSERT_BATCH_SIZE
+    ) -> List[int]:
+        """Insert recipes with executemany, committing once per batch"""
+        recipe_ids = []
+        iterator = iter(recipes)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            recipe_ids.extend(self._write(self._insert_recipes, batch))
         
-        if self.connection:
-            self.connection.commit()
-        else:
-            conn.commit()
-            conn.close()
-            
-        return deleted
+        return recipe_ids
     
-    def search_recipes(self, query: str) -> List[Dict]:
-        """Search recipes by title"""
+    def _insert_recipes(self, conn, batch: List[Dict]) -> range:
+        cursor = conn.cursor()
+        cursor.executemany(f"""
+            INSERT INTO recipes ({", ".join(RECIPE_WRITE_COLUMNS)})
+            VALUES ({", ".join("?" for _ in RECIPE_WRITE_COLUMNS)})
+        """, [self._recipe_params(recipe_data) for recipe_data in batch])
+        # executemany() has no lastrowid; AUTOINCREMENT ids within one write
+        # transaction are consecutive, ending at the sequence value. SQLite
+        # allows one writer at a time, so no other insert can come between.
+        last_id = cursor.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'recipes'"
+        ).fetchone()[0]
+        batch_ids = range(last_id - len(batch) + 1, last_id + 1)
+        self._index_recipes(conn, list(zip(batch_ids, batch)))
+        return batch_ids
+    
+    def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
+        """Update an existing recipe"""
+        return self._write(self._update_recipe, recipe_id, recipe_data)
+    
+    def delete_recipe(self, recipe_id: int) -> bool:
+        """Delete a recipe"""
+        return self._write(self._delete_recipe, recipe_id)
+    
+    def search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """Full-text search over title and ingredients, best matches first"""
         if not query:
             return []
+        if not self.fts_enabled:
+            return self._search_like(query, limit, fields)
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM recipes WHERE title LIKE ?",
-            (f"%{query}%",)
-        )
-        rows = cursor.fetchall()
+        match = self._fts_query(query)
+        if match is None:
+            return []
+        
+        columns, convert = self._projection(fields)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            # Rank and limit inside the index first so only the top hits are joined
+            cursor.execute(f"""
+                SELECT {columns} FROM (
+                    SELECT rowid, bm25(recipes_fts, {", ".join(map(str, FTS_COLUMN_WEIGHTS))}) AS score
+                    FROM recipes_fts
+                    WHERE recipes_fts MATCH ?
+                    ORDER BY score
+                    LIMIT ?
+                ) AS hits
+                JOIN recipes ON recipes.id = hits.rowid
+                ORDER BY hits.score
+            """, (match, -1 if limit is None else limit))
+            rows = cursor.fetchall()
+        
+        return [convert(row) for row in rows]
+    
+    def _search_like(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """Search recipes by title substring (full table scan)"""
+        columns, convert = self._projection(fields)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {columns} FROM recipes WHERE title LIKE ? LIMIT ?",
+                (f"%{query}%", -1 if limit is None else limit)
+            )
+            rows = cursor.fetchall()
+        
+        return [convert(row) for row in rows]
+    
+    def fuzzy_search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """Typo-tolerant title and ingredient search, closest spellings first
+
+        Each term is matched to similar vocabulary words through the trigram
+        table; recipes are then fetched tier by tier from the FTS index (see
+        trigrams.fuzzy_rank).
+        """
+        columns, convert = self._projection(fields)
+        terms = query_terms(query or "")
+        if not terms:
+            return []
+        with self._connection() as conn:
+            term_matches = [self._term_matches(conn, term) for term in terms]
+            ranked = fuzzy_rank(
+                term_matches,
+                lambda words, count: self._ids_with_words(conn, words, count),
+                limit
+            )
+            return self._fetch_ranked(conn, ranked, columns, convert)
+    
+    @staticmethod
+    def _fetch_ranked(conn, ranked: List[int], columns: str, convert: Callable) -> List[Dict]:
+        """Load recipes by id, keeping the given order"""
+        found = {}
+        for start in range(0, len(ranked), ID_LOOKUP_CHUNK_SIZE):
+            chunk = ranked[start:start + ID_LOOKUP_CHUNK_SIZE]
+            rows = conn.execute(
+                f"SELECT recipes.id, {columns} FROM recipes WHERE id IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            ).fetchall()
+            for row in rows:
+                found[row[0]] = convert(row[1:])
+        return [found[recipe_id] for recipe_id in ranked if recipe_id in found]
+    
+    @staticmethod
+    def _term_matches(conn, term: str) -> TermMatches:
+        """Vocabulary words similar to a query term; short or numeric terms match exactly"""
+        if not is_fuzzy_word(term):
+            return [(term, 1.0)]
+        grams = list(trigrams(term))
+        rows = conn.execute(f"""
+            SELECT term, COUNT(*), MIN(search_terms.trigram_count)
+            FROM term_trigrams JOIN search_terms USING (term)
+            WHERE trigram IN ({", ".join("?" for _ in grams)})
+            GROUP BY term
+        """, grams).fetchall()
+        return best_matches(rows, len(grams))
+    
+    def _ids_with_words(self, conn, words: Tuple[str, ...], limit: Optional[int]) -> List[int]:
+        """Smallest ids of recipes whose title or ingredients contain every word"""
+        if self.fts_enabled:
+            match = " AND ".join(
+                "{title ingredients} : \"" + word.replace('"', '""') + '"' for word in words
+            )
+            sql = "SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ? ORDER BY rowid LIMIT ?"
+            params = [match]
+        else:
+            sql = ("SELECT id FROM recipes WHERE "
+                   + " AND ".join("(title LIKE ? OR ingredients LIKE ?)" for _ in words)
+                   + " ORDER BY id LIMIT ?")
+            params = [pattern for word in words for pattern in (f"%{word}%", f"%{word}%")]
+        rows = conn.execute(sql, (*params, -1 if limit is None else limit)).fetchall()
+        return [row[0] for row in rows]
+    
+    def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Find recipes through the recipe_ingredients indexes, ranked by coverage"""
+        include = sorted(normalize_ingredients(include))
+        exclude = sorted(normalize_ingredients(exclude or []))
+        if not include:
+            return []
         
-        if not self.connection:
-            conn.close()
+        with self._connection() as conn:
+            if match_all:
+                rows = self._search_all_ingredients(conn, include, exclude, limit)
+            else:
+                rows = self._search_any_ingredient(conn, include, exclude, limit)
         
         return [self._row_to_dict(row) for row in rows]
     
+    def _search_all_ingredients(self, conn, include: List[str], exclude: List[str], limit: Optional[int]):
+        """Top recipes containing every included ingredient
+
+        Every hit matches the same number of ingredients, so ranking by
+        coverage is ranking by the recipe's own ingredient count. Scanning the
+        rarest ingredient's postings in (ingredient_count, recipe_id) order and
+        probing the others lets SQLite stop as soon as `limit` hits are found.
+        """
+        driver = min(include, key=lambda ingredient: conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM recipe_ingredients WHERE ingredient = ? LIMIT ?)",
+            (ingredient, INGREDIENT_DRIVER_PROBE_LIMIT)
+        ).fetchone()[0])
+        others = [ingredient for ingredient in include if ingredient != driver]
+        conditions = [
+            "EXISTS (SELECT 1 FROM recipe_ingredients AS other "
+            "WHERE other.ingredient = ? AND other.recipe_id = driver.recipe_id)"
+        ] * len(others)
+        conditions += [
+            "NOT EXISTS (SELECT 1 FROM recipe_ingredients AS other "
+            "WHERE other.ingredient = ? AND other.recipe_id = driver.recipe_id)"
+        ] * len(exclude)
+        where = "".join(f" AND {condition}" for condition in conditions)
+        
+        return conn.execute(f"""
+            SELECT recipes.* FROM (
+                SELECT driver.recipe_id, driver.ingredient_count
+                FROM recipe_ingredients AS driver INDEXED BY recipe_ingredients_by_size
+                WHERE driver.ingredient = ?{where}
+                ORDER BY driver.ingredient_count, driver.recipe_id
+                LIMIT ?
+            ) AS ranked
+            JOIN recipes ON recipes.id = ranked.recipe_id
+            ORDER BY ranked.ingredient_count, ranked.recipe_id
+        """, (driver, *others, *exclude, -1 if limit is None else limit)).fetchall()
+    
+    def _search_any_ingredient(self, conn, include: List[str], exclude: List[str], limit: Optional[int]):
+        """Top recipes containing at least one included ingredient
+
+        Ranking by number of matches needs every posting of every included
+        ingredient, so this aggregates them all before sorting.
+        """
+        excluded = ""
+        if exclude:
+            excluded = f"""
+                WHERE recipe_id NOT IN (
+                    SELECT recipe_id FROM recipe_ingredients
+                    WHERE ingredient IN ({", ".join("?" for _ in exclude)})
+                )
+            """
+        
+        return conn.execute(f"""
+            SELECT recipes.* FROM (
+                SELECT recipe_id, matched, CAST(matched AS REAL) / ingredient_count AS coverage
+                FROM (
+                    SELECT recipe_id, COUNT(*) AS matched, MAX(ingredient_count) AS ingredient_count
+                    FROM recipe_ingredients
+                    WHERE ingredient IN ({", ".join("?" for _ in include)})
+                    GROUP BY recipe_id
+                ) AS hits
+                {excluded}
+                ORDER BY matched DESC, coverage DESC, recipe_id
+                LIMIT ?
+            ) AS ranked
+            JOIN recipes ON recipes.id = ranked.recipe_id
+            ORDER BY ranked.matched DESC, ranked.coverage DESC, ranked.recipe_id
+        """, (*include, *exclude, -1 if limit is None else limit)).fetchall()
+    
+    def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[Dict]]:
+        """Score candidates from recipe_lsh_buckets using recipe_ingredients overlap counts"""
+        columns, convert = self._projection(fields)
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT ingredients, cuisine, total_minutes FROM recipes WHERE id = ?", (recipe_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            ingredients = sorted(normalize_ingredients(json.loads(row[0])))
+            cuisine, minutes = row[1], row[2]
+            
+            # One more than the limit, so sorting by length still ranks full buckets last
+            buckets = [
+                [bucket_row[0] for bucket_row in conn.execute(
+                    "SELECT recipe_id FROM recipe_lsh_buckets WHERE band_key = ? LIMIT ?",
+                    (key, LSH_BUCKET_LIMIT + 1)
+                )]
+                for key in band_keys(ingredients)
+            ]
+            candidates = collect_candidates(sorted(buckets, key=len), recipe_id)
+            if len(candidates) < k:
+                # Too few near neighbours: fall back to recipes sharing the rarest ingredients
+                postings = [
+                    [posting[0] for posting in conn.execute(
+                        "SELECT recipe_id FROM recipe_ingredients WHERE ingredient = ? LIMIT ?",
+                        (ingredient, LSH_BUCKET_LIMIT + 1)
+                    )]
+                    for ingredient in ingredients
+                ]
+                candidates |= collect_candidates(sorted(postings, key=len), recipe_id)
+            
+            features = []
+            candidate_ids = sorted(candidates)
+            placeholders = ", ".join("?" for _ in ingredients)
+            for start in range(0, len(candidate_ids), ID_LOOKUP_CHUNK_SIZE):
+                chunk = candidate_ids[start:start + ID_LOOKUP_CHUNK_SIZE]
+                # Only shared ingredients are read, each by a primary key probe;
+                # every row carries its recipe's ingredient count
+                features.extend(conn.execute(f"""
+                    SELECT recipes.id, hits.shared, hits.ingredient_count, recipes.cuisine, recipes.total_minutes
+                    FROM (
+                        SELECT recipe_id, COUNT(*) AS shared, MAX(ingredient_count) AS ingredient_count
+                        FROM recipe_ingredients
+                        WHERE ingredient IN ({placeholders}) AND recipe_id IN ({", ".join("?" for _ in chunk)})
+                        GROUP BY recipe_id
+                    ) AS hits
+                    JOIN recipes ON recipes.id = hits.recipe_id
+                """, (*ingredients, *chunk)))
+            ranked = rank_similar(len(ingredients), cuisine, minutes, features, k)
+            return self._fetch_ranked(conn, ranked, columns, convert)
+    
+    def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> Dict:
+        """Facet counts from facet_counts, or grouped over the matching rows when scoped"""
+        counts = {facet: Counter() for facet in FACETS}
+        if filters is not None and filters.is_empty():
+            filters = None
+        
+        with self._connection() as conn:
+            if query is None and filters is None:
+                for facet, value, count in conn.execute("SELECT facet, value, count FROM facet_counts"):
+                    counts[facet][value] = count
+                return format_facets(counts)
+            
+            where, params = self._filter_clause(filters)
+            if query is not None:
+                if self.fts_enabled:
+                    match = self._fts_query(query)
+                    if match is None:
+                        return format_facets(counts)
+                    where += " AND id IN (SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ?)"
+                    params.append(match)
+                else:
+                    where += " AND title LIKE ?"
+                    params.append(f"%{query}%")
+            
+            expressions = self._facet_expressions("recipes")
+            rows = conn.execute(f"""
+                SELECT {expressions["cuisine"]}, {expressions["difficulty"]}, {expressions["total_time"]}, COUNT(*)
+                FROM recipes
+                WHERE 1 = 1{where}
+                GROUP BY 1, 2, 3
+            """, params).fetchall()
+        
+        for cuisine, difficulty, bucket, count in rows:
+            counts["cuisine"][cuisine] += count
+            counts["difficulty"][difficulty] += count
+            counts["total_time"][bucket] += count
+        return format_facets(counts)
+    
+    def get_pool_stats(self) -> Optional[Dict]:
+        """Connection pool checkout/wait metrics (None for in-memory databases)"""
+        return self.pool.stats() if self.pool else None
+    
+    def get_diagnostics(self) -> Dict:
+        """Report the effective PRAGMA settings and pool metrics"""
+        pragmas = {}
+        with self._connection() as conn:
+            for name in DIAGNOSTIC_PRAGMAS:
+                # Some PRAGMAs (e.g. mmap_size) return no row for in-memory databases
+                row = conn.execute(f"PRAGMA {name}").fetchone()
+                pragmas[name] = row[0] if row else None
+        return {
+            "backend": "sqlite",
+            "db_path": self.db_path,
+            "performance_profile": self.performance_profile,
+            "full_text_search": self.fts_enabled,
+            "pragmas": pragmas,
+            "pool": self.get_pool_stats(),
+            "group_commit": dict(self._group_stats) if self._writer is not None else None
+        }
+    
+    def close(self):
+        """Stop the group commit writer after it commits what is queued, then close connections"""
+        writer = getattr(self, "_writer", None)
+        if writer is not None:
+            self._writer = None
+            self._write_queue.put(None)
+            writer.join()
+            # Writes queued behind the stop marker will never be committed
+            while True:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[2].set_exception(RuntimeError("repository is closed"))
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+        if self.pool:
+            self.pool.close()
+    
     def __del__(self):
         """Close connection when object is destroyed"""
-        if self.connection:
-            self.connection.close()
\ No newline at end of file
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,482 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from .recipe_repository import MemoryRecipeRepository, RecipeRepository, order_by_request
+from .sqlite_repository import SQLiteRecipeRepository
+from .filters import RecipeFilter
+from .documents import recipe_document
+from .projection import parse_fields, project
+from .tiering import EVICTION_POLICIES, FREQUENCY_SAMPLE_FACTOR, AccessFrequency
+
+logger = logging.getLogger(__name__)
+
+# When writes reach SQLite: before the call returns, or later from a queue
+WRITE_MODES = ("write-through", "write-behind")
+
+# Whether a recipe read while the tier is full always displaces the eviction
+# victim, or only when it has been read more often recently (TinyLFU)
+ADMISSION_POLICIES = ("always", "frequency")
+
+# Seconds between saves of per-recipe read counts, which pick what to warm up with
+ACCESS_COUNT_SAVE_INTERVAL = 30.0
+
+# Recipes loaded per query while warming up
+WARM_UP_BATCH_SIZE = 500
+
+class TieredRecipeRepository(RecipeRepository):
+    """SQLite repository behind a bounded in-memory tier of hot recipes
+
+    Point reads by id (recipe, document, version, batch) are answered by a
+    MemoryRecipeRepository holding at most `capacity` recipes. A miss loads
+    the recipe from SQLite and offers it to the tier; when the tier is full
+    the eviction policy (LRU or LFU) names a victim and the admission policy
+    decides whether the newcomer replaces it. Catalog-wide reads (pages,
+    searches, facets, similar recipes) always go to SQLite, which holds
+    every recipe.
+
+    In write-through mode updates and deletes reach SQLite before they
+    return and drop the recipe from the tier. In write-behind mode they are
+    applied to the tier and queued, and a background thread applies the
+    queue to SQLite in order every `flush_interval` seconds; recipes with
+    queued writes stay pinned in the tier, and catalog-wide reads flush the
+    queue first so they see every write. Writers block while `max_pending`
+    writes are queued. Creates are always written through, since SQLite
+    assigns the ids.
+
+    Versions in the tier follow SQLite's (one more per update), so ETags
+    stay valid whichever tier answers. The tier assumes it is the database's
+    only writer. Read counts are saved to SQLite every
+    ACCESS_COUNT_SAVE_INTERVAL seconds and on close(); with warm_up the
+    tier starts with the most-read recipes.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteRecipeRepository,
+        capacity: int = 10000,
+        write_mode: str = "write-through",
+        eviction: str = "lru",
+        admission: str = "always",
+        flush_interval: float = 0.05,
+        max_pending: int = 1000,
+        warm_up: bool = True
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f"write_mode must be one of {', '.join(WRITE_MODES)}")
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"eviction must be one of {', '.join(EVICTION_POLICIES)}")
+        if admission not in ADMISSION_POLICIES:
+            raise ValueError(f"admission must be one of {', '.join(ADMISSION_POLICIES)}")
+        self.store = store
+        self.capacity = capacity
+        self.write_mode = write_mode
+        self.eviction = eviction
+        self.admission = admission
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # Only read by id, so the memory repository's query indexes are skipped
+        self.hot = MemoryRecipeRepository(seed=False, indexed=False)
+        self._policy = EVICTION_POLICIES[eviction]()
+        self._frequency = AccessFrequency(capacity * FREQUENCY_SAMPLE_FACTOR) if admission == "frequency" else None
+        self._lock = threading.RLock()
+        # Wakes the background thread early, when the queue is full or on close()
+        self._wake = threading.Condition(self._lock)
+        # Wakes writers waiting for room in the queue
+        self._drained = threading.Condition(self._lock)
+        # Held while queued writes are applied, so flushes never interleave
+        self._flush_lock = threading.Lock()
+        # Queued writes as (recipe id, recipe data or None for a delete), oldest first
+        self._queue: Deque[Tuple[int, Optional[Dict]]] = deque()
+        # Writes per recipe id that are queued or being applied; these recipes are pinned
+        self._pending: Counter = Counter()
+        # Recipes deleted from the tier whose delete has not reached SQLite yet
+        self._deleted: Set[int] = set()
+        # Bumped by every write, so a load that raced one is not admitted
+        self._generation = 0
+        # Reads per recipe id since read counts were last saved
+        self._reads: Counter = Counter()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._rejections = 0
+        self._closed = False
+        self.warmed_up = self.warm_up() if warm_up else 0
+        self._thread = threading.Thread(target=self._run, name="recipe-tier", daemon=True)
+        self._thread.start()
+
+    @property
+    def pool(self):
+        """SQLite's connection pool, sized for by async executors and instrumentation"""
+        return self.store.pool
+
+    def _is_hot(self, recipe_id: int) -> bool:
+        return recipe_id in self.hot.recipes
+
+    def _evict(self, recipe_id: int):
+        self.hot.delete_recipe(recipe_id)
+        self._policy.remove(recipe_id)
+
+    def _victim(self) -> Optional[int]:
+        """The first recipe in eviction order without queued writes"""
+        for recipe_id in self._policy.candidates():
+            if recipe_id not in self._pending:
+                return recipe_id
+        return None
+
+    def _admit(self, recipe: Dict, version: int, force: bool = False) -> bool:
+        """Put a recipe in the tier, evicting to stay within capacity (lock held)
+
+        Forced puts (writes queued in write-behind mode) skip the admission
+        policy and overfill the tier when every other recipe is pinned.
+        """
+        recipe_id = recipe["id"]
+        if self._is_hot(recipe_id):
+            if not force:
+                return True
+            self.hot.put_recipe(recipe, version)
+            self._policy.touch(recipe_id)
+            return True
+        while len(self.hot.recipes) >= self.capacity:
+            victim = self._victim()
+            if victim is None:
+                if not force:
+                    return False
+                break
+            if not force and self._frequency is not None:
+                if self._frequency.estimate(recipe_id) <= self._frequency.estimate(victim):
+                    self._rejections += 1
+                    return False
+            self._evict(victim)
+            self._evictions += 1
+        self.hot.put_recipe(recipe, version)
+        self._policy.add(recipe_id)
+        return True
+
+    def read_cached(self, method: str, recipe_id: int, *args) -> Tuple[bool, Any]:
+        """Answer a point read from the memory tier alone, as (answered, result)
+
+        `method` names the MemoryRecipeRepository read to run. Unanswered
+        reads are misses to complete with load_recipe(). Runs no queries, so
+        async callers can use it on the event loop.
+        """
+        with self._lock:
+            self._reads[recipe_id] += 1
+            if self._frequency is not None:
+                self._frequency.increment(recipe_id)
+            if recipe_id in self._deleted:
+                return True, None
+            if not self._is_hot(recipe_id):
+                self._misses += 1
+                return False, None
+            self._hits += 1
+            self._policy.touch(recipe_id)
+            return True, getattr(self.hot, method)(recipe_id, *args)
+
+    def _load(self, recipe_ids: List[int]) -> Dict[int, Tuple[Dict, int]]:
+        """Read recipes the tier missed from SQLite and offer them to it"""
+        if not recipe_ids:
+            return {}
+        with self._lock:
+            generation = self._generation
+        loaded = self.store.get_versioned_recipes(recipe_ids)
+        with self._lock:
+            # A write since the read started may have made these stale
+            if self._generation == generation:
+                for recipe, version in loaded:
+                    self._admit(recipe, version)
+        return {recipe["id"]: (recipe, version) for recipe, version in loaded}
+
+    def load_recipe(self, recipe_id: int) -> Optional[Tuple[Dict, int]]:
+        """Complete a missed point read: the recipe and its version from SQLite"""
+        return self._load([recipe_id]).get(recipe_id)
+
+    def warm_up(self) -> int:
+        """Load the most-read recipes by saved read counts; returns how many were admitted"""
+        recipe_ids = self.store.get_most_accessed_ids(self.capacity)
+        # Least read first, so the most read end up last to be evicted
+        recipe_ids.reverse()
+        rank = {recipe_id: position for position, recipe_id in enumerate(recipe_ids)}
+        admitted = 0
+        for start in range(0, len(recipe_ids), WARM_UP_BATCH_SIZE):
+            with self._lock:
+                generation = self._generation
+            loaded = self.store.get_versioned_recipes(recipe_ids[start:start + WARM_UP_BATCH_SIZE])
+            loaded.sort(key=lambda item: rank[item[0]["id"]])
+            with self._lock:
+                if self._generation != generation:
+                    continue
+                admitted += sum(self._admit(recipe, version) for recipe, version in loaded)
+        return admitted
+
+    def save_access_counts(self):
+        """Add the reads counted since the last save to SQLite's read counts"""
+        with self._lock:
+            counts, self._reads = self._reads, Counter()
+        self.store.add_access_counts(counts)
+
+    def _write_through(self, recipe_id: int, write: Callable):
+        with self._lock:
+            self._generation += 1
+            if self._is_hot(recipe_id):
+                self._evict(recipe_id)
+        try:
+            return write()
+        finally:
+            with self._lock:
+                self._generation += 1
+                # A load admitted while the write was in flight read the old recipe
+                if self._is_hot(recipe_id):
+                    self._evict(recipe_id)
+
+    def _write_behind(self, recipe_id: int, recipe_data: Optional[Dict]):
+        """Apply an update (or, for None, a delete) to the tier and queue it for SQLite
+
+        Returns None when the recipe does not exist, True for a delete and
+        the updated recipe otherwise.
+        """
+        while True:
+            with self._lock:
+                generation = self._generation
+                if recipe_id in self._deleted:
+                    return None
+                version = self.hot.get_recipe_version(recipe_id)
+            if version is None:
+                version = self.store.get_recipe_version(recipe_id)
+                if version is None:
+                    return None
+            with self._lock:
+                while len(self._queue) >= self.max_pending:
+                    self._wake.notify()
+                    self._drained.wait()
+                if self._generation != generation:
+                    # Another write got in first; look the recipe up again
+                    continue
+                self._generation += 1
+                self._queue.append((recipe_id, recipe_data))
+                self._pending[recipe_id] += 1
+                if recipe_data is None:
+                    if self._is_hot(recipe_id):
+                        self._evict(recipe_id)
+                    self._deleted.add(recipe_id)
+                    return True
+                self._admit({"id": recipe_id, **recipe_data}, version + 1, force=True)
+                return self.hot.recipes[recipe_id]
+
+    def _apply(self, recipe_id: int, recipe_data: Optional[Dict]):
+        try:
+            if recipe_data is None:
+                self.store.delete_recipe(recipe_id)
+            else:
+                self.store.update_recipe(recipe_id, recipe_data)
+            failed = False
+        except Exception:
+            logger.exception("Queued write to recipe %s failed and was dropped", recipe_id)
+            failed = True
+        with self._lock:
+            self._pending[recipe_id] -= 1
+            if self._pending[recipe_id] <= 0:
+                del self._pending[recipe_id]
+                self._deleted.discard(recipe_id)
+                if failed and self._is_hot(recipe_id):
+                    # The tier is ahead of SQLite; let reads see what SQLite has
+                    self._generation += 1
+                    self._evict(recipe_id)
+
+    def flush(self):
+        """Apply every queued write to SQLite, returning once they are committed"""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        return
+                    batch = list(self._queue)
+                    self._queue.clear()
+                    self._drained.notify_all()
+                for recipe_id, recipe_data in batch:
+                    self._apply(recipe_id, recipe_data)
+
+    def _sync(self):
+        """Flush queued writes so that reads from SQLite see them"""
+        if self._pending:
+            self.flush()
+
+    def _run(self):
+        """Background thread: flush queued writes and save read counts"""
+        interval = self.flush_interval if self.write_mode == "write-behind" else ACCESS_COUNT_SAVE_INTERVAL
+        next_save = time.monotonic() + ACCESS_COUNT_SAVE_INTERVAL
+        while True:
+            with self._lock:
+                if not self._closed:
+                    self._wake.wait(interval)
+                closed = self._closed
+            try:
+                self.flush()
+                if closed or time.monotonic() >= next_save:
+                    next_save = time.monotonic() + ACCESS_COUNT_SAVE_INTERVAL
+                    self.save_access_counts()
+            except Exception:
+                logger.exception("Recipe tier maintenance failed")
+            if closed:
+                return
+
+    def get_all_recipes(self) -> List[Dict]:
+        self._sync()
+        return self.store.get_all_recipes()
+
+    def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        self._sync()
+        return self.store.get_recipes_page(limit, cursor, filters, fields)
+
+    def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        self._sync()
+        return self.store.get_recipes_page_document(limit, cursor, filters)
+
+    def iter_recipes(self, batch_size: int = 500) -> Iterator[Dict]:
+        self._sync()
+        return self.store.iter_recipes(batch_size)
+
+    def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        fields = parse_fields(fields)
+        answered, recipe = self.read_cached("get_recipe_by_id", recipe_id, fields)
+        if answered:
+            return recipe
+        loaded = self.load_recipe(recipe_id)
+        return project(loaded[0], fields) if loaded is not None else None
+
+    def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        answered, document = self.read_cached("get_recipe_document", recipe_id)
+        if answered:
+            return document
+        loaded = self.load_recipe(recipe_id)
+        return recipe_document(loaded[0]) if loaded is not None else None
+
+    def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        answered, version = self.read_cached("get_recipe_version", recipe_id)
+        if answered:
+            return version
+        loaded = self.load_recipe(recipe_id)
+        return loaded[1] if loaded is not None else None
+
+    def get_recipes_by_ids(self, recipe_ids: Iterable[int]) -> Tuple[List[Dict], List[int]]:
+        """Hot recipes come from the tier, the rest from one batched SQLite lookup"""
+        recipe_ids = list(recipe_ids)
+        found = {}
+        missed = []
+        for recipe_id in dict.fromkeys(recipe_ids):
+            answered, recipe = self.read_cached("get_recipe_by_id", recipe_id)
+            if not answered:
+                missed.append(recipe_id)
+            elif recipe is not None:
+                found[recipe_id] = recipe
+        for recipe_id, (recipe, _) in self._load(missed).items():
+            found[recipe_id] = recipe
+        return order_by_request(recipe_ids, found)
+
+    def get_catalog_version(self) -> int:
+        self._sync()
+        return self.store.get_catalog_version()
+
+    def create_recipe(self, recipe_data: Dict) -> Dict:
+        return self.store.create_recipe(recipe_data)
+
+    def create_recipes_bulk(self, recipes: Iterable[Dict]) -> List[int]:
+        return self.store.create_recipes_bulk(recipes)
+
+    def update_recipe(self, recipe_id: int, recipe_data: Dict) -> Optional[Dict]:
+        if self.write_mode == "write-behind":
+            return self._write_behind(recipe_id, recipe_data)
+        return self._write_through(recipe_id, lambda: self.store.update_recipe(recipe_id, recipe_data))
+
+    def delete_recipe(self, recipe_id: int) -> bool:
+        if self.write_mode == "write-behind":
+            return self._write_behind(recipe_id, None) is not None
+        return self._write_through(recipe_id, lambda: self.store.delete_recipe(recipe_id))
+
+    def search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        self._sync()
+        return self.store.search_recipes(query, limit, fields)
+
+    def fuzzy_search_recipes(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        self._sync()
+        return self.store.fuzzy_search_recipes(query, limit, fields)
+
+    def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        self._sync()
+        return self.store.search_by_ingredients(include, exclude, match_all, limit)
+
+    def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[Dict]]:
+        self._sync()
+        return self.store.get_similar_recipes(recipe_id, k, fields)
+
+    def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> Dict:
+        self._sync()
+        return self.store.get_facets(query, filters)
+
+    def get_tier_stats(self) -> Dict:
+        """Size, policies and hit/miss/eviction counters of the memory tier"""
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "size": len(self.hot.recipes),
+                "write_mode": self.write_mode,
+                "eviction": self.eviction,
+                "admission": self.admission,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "rejected_admissions": self._rejections,
+                "pending_writes": sum(self._pending.values()),
+                "warmed_up": self.warmed_up
+            }
+
+    def get_diagnostics(self) -> Dict:
+        """SQLite's diagnostics plus the memory tier's"""
+        return {**self.store.get_diagnostics(), "backend": "tiered", "tier": self.get_tier_stats()}
+
+    def close(self):
+        """Flush queued writes, save read counts and close SQLite"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        self.store.close()
@@ -0,0 +1,119 @@
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Dict, Iterator
+
+# Accesses counted per tier slot before recent frequencies are halved; the
+# window TinyLFU found long enough to tell hot keys from one-off reads
+FREQUENCY_SAMPLE_FACTOR = 10
+
+class EvictionPolicy(ABC):
+    """Order in which a bounded tier gives up its entries"""
+
+    @abstractmethod
+    def add(self, key: int):
+        pass
+
+    @abstractmethod
+    def touch(self, key: int):
+        """Record a hit on a key the policy holds"""
+        pass
+
+    @abstractmethod
+    def remove(self, key: int):
+        pass
+
+    @abstractmethod
+    def candidates(self) -> Iterator[int]:
+        """Keys in eviction order, first to go first; stop iterating before changing the policy"""
+        pass
+
+class LRUPolicy(EvictionPolicy):
+    """Least recently used first"""
+
+    def __init__(self):
+        self._order: OrderedDict = OrderedDict()
+
+    def add(self, key: int):
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def touch(self, key: int):
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def remove(self, key: int):
+        self._order.pop(key, None)
+
+    def candidates(self) -> Iterator[int]:
+        return iter(self._order)
+
+class LFUPolicy(EvictionPolicy):
+    """Least frequently used first, least recently used among equals
+
+    Keys are grouped by hit count, so a hit moves a key to the next group
+    in constant time instead of re-sorting.
+    """
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self._groups: Dict[int, OrderedDict] = {}
+
+    def _unlink(self, key: int, count: int):
+        group = self._groups[count]
+        del group[key]
+        if not group:
+            del self._groups[count]
+
+    def add(self, key: int):
+        self.remove(key)
+        self._counts[key] = 1
+        self._groups.setdefault(1, OrderedDict())[key] = None
+
+    def touch(self, key: int):
+        count = self._counts.get(key)
+        if count is None:
+            return
+        self._unlink(key, count)
+        self._counts[key] = count + 1
+        self._groups.setdefault(count + 1, OrderedDict())[key] = None
+
+    def remove(self, key: int):
+        count = self._counts.pop(key, None)
+        if count is not None:
+            self._unlink(key, count)
+
+    def candidates(self) -> Iterator[int]:
+        for count in sorted(self._groups):
+            yield from self._groups[count]
+
+# Eviction policies by configuration name
+EVICTION_POLICIES = {
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy
+}
+
+class AccessFrequency:
+    """Recent access counts per key, for frequency-based admission
+
+    Every `sample_size` counted accesses all counts are halved (TinyLFU's
+    reset), so keys that stop being read lose their standing and at most
+    `sample_size` keys are tracked.
+    """
+
+    def __init__(self, sample_size: int):
+        self.sample_size = sample_size
+        self._counts: Counter = Counter()
+        self._accesses = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def increment(self, key: int):
+        self._counts[key] += 1
+        self._accesses += 1
+        if self._accesses >= self.sample_size:
+            self._counts = Counter({key: count // 2 for key, count in self._counts.items() if count > 1})
+            self._accesses //= 2
+
+    def estimate(self, key: int) -> int:
+        return self._counts.get(key, 0)
@@ -0,0 +1,164 @@
+import heapq
+import re
+from itertools import product
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Minimum trigram similarity for a vocabulary word to count as a spelling of a
+# query term (pg_trgm's default)
+FUZZY_SIMILARITY_THRESHOLD = 0.3
+
+# Closest vocabulary words kept per query term
+FUZZY_WORDS_PER_TERM = 3
+
+# Query terms considered by fuzzy search; more add little and multiply tiers
+FUZZY_MAX_TERMS = 4
+
+# Word combinations tried, best first, before falling back to single words
+FUZZY_MAX_COMBINATIONS = 27
+
+# Words shorter than this (or containing digits) are matched exactly, not by trigrams
+FUZZY_MIN_WORD_LENGTH = 3
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+# Ranked vocabulary words for one query term: (word, similarity), best first
+TermMatches = List[Tuple[str, float]]
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of a word padded like pg_trgm: two spaces before, one after"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(shared: int, count_a: int, count_b: int) -> float:
+    """Jaccard similarity of two trigram sets from their sizes and overlap"""
+    return shared / (count_a + count_b - shared)
+
+def is_fuzzy_word(word: str) -> bool:
+    return len(word) >= FUZZY_MIN_WORD_LENGTH and _WORD.fullmatch(word) is not None
+
+def searchable_words(recipe: Dict) -> Set[str]:
+    """Title and ingredient words that get fuzzy-matched (lowercase, alphabetic)"""
+    words = set(_WORD.findall(recipe["title"].lower()))
+    for ingredient in recipe["ingredients"]:
+        words.update(_WORD.findall(ingredient.lower()))
+    return {word for word in words if len(word) >= FUZZY_MIN_WORD_LENGTH}
+
+def query_terms(query: str) -> List[str]:
+    """Distinct lowercase terms of a fuzzy query, in order, capped at FUZZY_MAX_TERMS"""
+    terms = list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+    return terms[:FUZZY_MAX_TERMS]
+
+def best_matches(
+    candidates: Iterable[Tuple[str, int, int]],
+    term_trigram_count: int,
+    threshold: float = FUZZY_SIMILARITY_THRESHOLD,
+    limit: int = FUZZY_WORDS_PER_TERM
+) -> TermMatches:
+    """Rank (word, shared trigrams, word trigram count) candidates by similarity"""
+    scored = (
+        (word, similarity(shared, term_trigram_count, count))
+        for word, shared, count in candidates
+    )
+    return heapq.nlargest(
+        limit,
+        ((word, score) for word, score in scored if score >= threshold),
+        key=lambda match: (match[1], -len(match[0]))
+    )
+
+class TrigramIndex:
+    """Word-level trigram postings for finding likely spellings of a misspelled term
+
+    Indexes a vocabulary of distinct words, not documents, so it stays small
+    however many recipes use each word.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._sizes: Dict[str, int] = {}
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._sizes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def add(self, word: str):
+        if word in self._sizes:
+            return
+        grams = trigrams(word)
+        self._sizes[word] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(word)
+
+    def discard(self, word: str):
+        if self._sizes.pop(word, None) is None:
+            return
+        for gram in trigrams(word):
+            words = self._postings.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._postings[gram]
+
+    def lookup(self, term: str, threshold: float = FUZZY_SIMILARITY_THRESHOLD, limit: int = FUZZY_WORDS_PER_TERM) -> TermMatches:
+        grams = trigrams(term)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for word in self._postings.get(gram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        return best_matches(
+            ((word, count, self._sizes[word]) for word, count in shared.items()),
+            len(grams), threshold, limit
+        )
+
+def combinations(term_matches: Sequence[TermMatches]) -> Iterator[Tuple[Tuple[str, ...], float]]:
+    """Word combinations, one word per term, in descending total similarity"""
+    combos = [
+        (tuple(word for word, _ in choice), sum(score for _, score in choice))
+        for choice in product(*term_matches)
+    ]
+    combos.sort(key=lambda combo: -combo[1])
+    return iter(combos[:FUZZY_MAX_COMBINATIONS])
+
+def fuzzy_rank(
+    term_matches: Sequence[TermMatches],
+    fetch: Callable[[Tuple[str, ...], int], List[int]],
+    limit: Optional[int]
+) -> List[int]:
+    """Recipe ids ranked by the summed similarity of the words they contain
+
+    `fetch(words, n)` returns up to n ids, smallest first, of recipes
+    containing every word. Combinations are tried best first, so a recipe
+    is first found in the tier of its highest score and each tier is a
+    cheap indexed AND query with a LIMIT. If every term together finds too
+    little, recipes containing any single matched word follow, closest
+    words first.
+    """
+    term_matches = [matches for matches in term_matches if matches]
+    if not term_matches:
+        return []
+    found: List[int] = []
+    seen: Set[int] = set()
+
+    def take(words: Tuple[str, ...]) -> bool:
+        wanted = None if limit is None else limit - len(found)
+        for recipe_id in fetch(words, None if wanted is None else wanted + len(seen)):
+            if recipe_id not in seen:
+                seen.add(recipe_id)
+                found.append(recipe_id)
+                if limit is not None and len(found) >= limit:
+                    return True
+        return False
+
+    for words, _ in combinations(term_matches):
+        if take(words):
+            return found
+    if len(term_matches) > 1:
+        singles = sorted(
+            ((word, score) for matches in term_matches for word, score in matches),
+            key=lambda match: -match[1]
+        )
+        for word, _ in singles:
+            if take((word,)):
+                return found
+    return found
@@ -0,0 +1,20 @@
+from typing import Any
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency: fall back to Starlette's json.dumps
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+class RawJSONResponse(Response):
+    """Response whose content is already-serialized JSON, sent as-is"""
+
+    media_type = "application/json"
@@ -1,7 +1,25 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
+from app.repositories.recipe_repository import RecipeRepository
+from app.dependencies import get_recipe_repository, get_recipe_cache, get_single_flight
+from app.services.cache import CacheBackend
+from app.services.single_flight import AsyncSingleFlight
 
 router = APIRouter()
 
 @router.get("/ping")
 async def ping():
-    return "pong"
\ No newline at end of file
+    return "pong"
+
+@router.get("/diagnostics")
+def diagnostics(
+    repository: RecipeRepository = Depends(get_recipe_repository),
+    cache: Optional[CacheBackend] = Depends(get_recipe_cache),
+    flights: Optional[AsyncSingleFlight] = Depends(get_single_flight)
+):
+    """Report storage backend settings, connection pool, cache and coalescing metrics"""
+    return {
+        **repository.get_diagnostics(),
+        "cache": cache.stats() if cache else None,
+        "coalescing": flights.stats() if flights else None
+    }
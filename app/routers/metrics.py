@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from app.dependencies import get_recipe_repository, get_recipe_cache, get_single_flight
+from app.metrics import CONTENT_TYPE, METRICS, collect_component_stats
+from app.repositories.recipe_repository import RecipeRepository
+from app.services.cache import CacheBackend
+from app.services.single_flight import AsyncSingleFlight
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(
+    repository: RecipeRepository = Depends(get_recipe_repository),
+    cache: Optional[CacheBackend] = Depends(get_recipe_cache),
+    flights: Optional[AsyncSingleFlight] = Depends(get_single_flight)
+):
+    """Prometheus scrape endpoint; only mounted when RECIPE_METRICS_ENABLED is set"""
+    get_pool_stats = getattr(repository, "get_pool_stats", None)
+    collect_component_stats(
+        pool_stats=get_pool_stats() if get_pool_stats else None,
+        cache_stats=cache.stats() if cache else None,
+        coalescing_stats=flights.stats() if flights else None
+    )
+    return Response(METRICS.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,30 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from app.config import get_settings
+from app.profiling import ProfileStore
+
+router = APIRouter(prefix="/profiles", include_in_schema=False)
+
+async def get_profile_store(
+    request: Request,
+    x_profile: Optional[str] = Header(None)
+) -> ProfileStore:
+    """The app's stored profiles; reading them needs the profiling token"""
+    token = get_settings().profiling_token
+    if not token or not hmac.compare_digest((x_profile or "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+    return request.app.state.profile_store
+
+@router.get("")
+async def list_profiles(store: ProfileStore = Depends(get_profile_store)):
+    """Summaries of recently profiled requests, newest first"""
+    return [profile.summary() for profile in store.list()]
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, store: ProfileStore = Depends(get_profile_store)):
+    """cProfile summary and SQL statement log for one profiled request"""
+    profile = store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.report()
@@ -1,60 +1,375 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional
-from app.models.recipe import Recipe, RecipeCreate
-from app.services.recipe_service import RecipeService, get_recipe_service
-from app.repositories.recipe_repository import RecipeRepository
-from app.dependencies import get_recipe_repository
+import hashlib
+import json
+from fastapi import APIRouter, HTTPException, Path, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Annotated, Any, AsyncIterable, AsyncIterator, List, Literal, Optional, Tuple
+from app.models.recipe import Recipe, RecipeBatchRequest, RecipeCreate
+from app.services.recipe_service import AsyncRecipeService, get_async_recipe_service
+from app.repositories.async_repository import AsyncRecipeRepository
+from app.repositories.pagination import MAX_RECIPE_ID, InvalidCursorError
+from app.repositories.filters import RecipeFilter
+from app.repositories.projection import InvalidFieldsError, parse_fields
+from app.config import get_settings
+from app.responses import RawJSONResponse
+from app.dependencies import get_async_recipe_repository, get_recipe_cache, get_single_flight
+from app.services.cache import CacheBackend
+from app.services.single_flight import AsyncSingleFlight
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
-def get_service(repository: RecipeRepository = Depends(get_recipe_repository)) -> RecipeService:
-    """Get recipe service with injected repository"""
-    return get_recipe_service(repository)
+# Recipes encoded per chunk written to a streaming response
+EXPORT_CHUNK_SIZE = 500
+
+async def _ndjson_chunks(recipes: AsyncIterable[dict]) -> AsyncIterator[str]:
+    """Encode recipes as NDJSON, grouping lines into chunks to limit write calls"""
+    lines = []
+    async for recipe in recipes:
+        lines.append(json.dumps(recipe, default=dict) + "\n")
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+# Path ids past SQLite's integer range would overflow the driver instead of 404ing
+RecipePathId = Annotated[int, Path(le=MAX_RECIPE_ID)]
+
+# Most ids accepted by GET /recipes/batch; longer lists go through POST
+BATCH_GET_MAX_IDS = 200
+
+# Validated recipes handed to the repository per bulk write
+BULK_BATCH_SIZE = 1000
+
+async def _bulk_items(request: Request) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    """Yield (item, decode_error) pairs from a JSON array or a streamed NDJSON body"""
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _decode_ndjson_line(line)
+        if buffer.strip():
+            yield _decode_ndjson_line(buffer)
+        return
+    
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for item in payload:
+        yield item, None
+
+def _decode_ndjson_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError:
+        return None, "Invalid JSON"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+def _split_list_param(values: List[str]) -> List[str]:
+    """Flatten repeated and comma-separated query values"""
+    return [item for value in values for item in value.split(",") if item.strip()]
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+async def get_recipe_filter(
+    cuisine: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    min_prep_minutes: Optional[int] = Query(None, ge=0),
+    max_prep_minutes: Optional[int] = Query(None, ge=0),
+    min_cook_minutes: Optional[int] = Query(None, ge=0),
+    max_cook_minutes: Optional[int] = Query(None, ge=0),
+    min_total_minutes: Optional[int] = Query(None, ge=0),
+    max_total_minutes: Optional[int] = Query(None, ge=0)
+) -> RecipeFilter:
+    """Structured filter from query parameters; cuisine and difficulty match case-insensitively"""
+    return RecipeFilter(
+        cuisine=cuisine,
+        difficulty=difficulty,
+        min_prep_minutes=min_prep_minutes,
+        max_prep_minutes=max_prep_minutes,
+        min_cook_minutes=min_cook_minutes,
+        max_cook_minutes=max_cook_minutes,
+        min_total_minutes=min_total_minutes,
+        max_total_minutes=max_total_minutes
+    )
+
+async def get_field_selection(fields: List[str] = Query([])) -> Optional[Tuple[str, ...]]:
+    """Sparse fieldset from fields= (repeated or comma-separated); None selects every field"""
+    try:
+        return parse_fields(_split_list_param(fields))
+    except InvalidFieldsError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+async def get_service(
+    repository: AsyncRecipeRepository = Depends(get_async_recipe_repository),
+    cache: Optional[CacheBackend] = Depends(get_recipe_cache),
+    flights: Optional[AsyncSingleFlight] = Depends(get_single_flight)
+) -> AsyncRecipeService:
+    """Get recipe service with injected repository, cache and read coalescing"""
+    return get_async_recipe_service(repository, cache, flights)
 
 @router.get("")
-def get_recipes(service: RecipeService = Depends(get_service)):
-    """Get all recipes"""
-    return service.get_all_recipes()
+async def get_recipes(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    filters: RecipeFilter = Depends(get_recipe_filter),
+    fields: Optional[Tuple[str, ...]] = Depends(get_field_selection),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Get recipes ordered by id, one page at a time, optionally filtered
+
+    Filters: cuisine and difficulty (exact, case-insensitive) and inclusive
+    min_/max_ bounds on prep_minutes, cook_minutes and total_minutes.
+    fields=title,cuisine returns only those fields (plus id).
+    The cursor for the next page is returned in the X-Next-Cursor header
+    (and as a Link rel="next" URL); it is absent on the last page.
+    """
+    # The representation depends on every query parameter, so they are part of the ETag
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    query_hash = hashlib.sha1(query.encode()).hexdigest()[:16]
+    etag = f'"catalog-{await service.get_catalog_version()}-{query_hash}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    # Stored documents hold every field, so projections are built from columns
+    fast_path = get_settings().json_fast_path and fields is None
+    try:
+        if fast_path:
+            # Stored documents are spliced into the body without decoding
+            body, next_cursor = await service.get_recipes_page_document(limit, cursor, filters)
+        else:
+            recipes, next_cursor = await service.get_recipes_page(limit, cursor, filters, fields)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    if fast_path:
+        return RawJSONResponse(body, headers=headers)
+    response.headers.update(headers)
+    return recipes
+
+@router.get("/export")
+async def export_recipes(service: AsyncRecipeService = Depends(get_service)):
+    """Stream the full catalog as newline-delimited JSON"""
+    return StreamingResponse(
+        _ndjson_chunks(service.iter_recipes()),
+        media_type="application/x-ndjson"
+    )
 
 @router.get("/search")
-def search_recipes(
+async def search_recipes(
     q: Optional[str] = Query(None),
-    service: RecipeService = Depends(get_service)
+    limit: int = Query(50, ge=1, le=500),
+    fields: Optional[Tuple[str, ...]] = Depends(get_field_selection),
+    service: AsyncRecipeService = Depends(get_service)
 ):
-    """Search recipes by title"""
-    return service.search_recipes(q)
+    """Search recipes by title and ingredients, best matches first"""
+    return await service.search_recipes(q, limit, fields)
+
+@router.get("/search/fuzzy")
+async def fuzzy_search_recipes(
+    q: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    fields: Optional[Tuple[str, ...]] = Depends(get_field_selection),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Typo-tolerant search over titles and ingredients, closest spellings first
+
+    Finds "Spaghetti Carbonara" for "carbonarra". Recipes matching every term
+    come before those matching only some.
+    """
+    return await service.fuzzy_search_recipes(q, limit, fields)
+
+@router.get("/search/by-ingredients")
+async def search_recipes_by_ingredients(
+    include: List[str] = Query([]),
+    exclude: List[str] = Query([]),
+    mode: Literal["all", "any"] = Query("all"),
+    limit: int = Query(50, ge=1, le=500),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Find recipes by ingredients on hand
+
+    include and exclude take repeated parameters or comma-separated lists.
+    With mode=all every included ingredient must be used; with mode=any at
+    least one. Recipes using more of them, and needing fewer others, come first.
+    """
+    return await service.search_by_ingredients(
+        _split_list_param(include),
+        _split_list_param(exclude),
+        match_all=(mode == "all"),
+        limit=limit
+    )
+
+@router.get("/facets")
+async def get_recipe_facets(
+    q: Optional[str] = Query(None),
+    filters: RecipeFilter = Depends(get_recipe_filter),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Recipe counts per cuisine, difficulty and total-time bucket
+
+    Optionally scoped to a search query and the same filters as GET /recipes.
+    """
+    return await service.get_facets(q, filters)
+
+@router.get("/batch")
+async def get_recipes_batch(
+    ids: List[str] = Query([]),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Get up to 200 recipes by id in one request
+
+    ids takes repeated parameters or a comma-separated list. Recipes come back
+    in the requested order; ids that do not exist are listed under "missing".
+    Use POST /recipes/batch for longer lists.
+    """
+    try:
+        recipe_ids = [int(value) for value in _split_list_param(ids)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    if any(not 1 <= recipe_id <= MAX_RECIPE_ID for recipe_id in recipe_ids):
+        raise HTTPException(status_code=400, detail=f"ids must be between 1 and {MAX_RECIPE_ID}")
+    if len(recipe_ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BATCH_GET_MAX_IDS} ids per GET; use POST /recipes/batch"
+        )
+    recipes, missing = await service.get_recipes_by_ids(recipe_ids)
+    return {"recipes": recipes, "missing": missing}
+
+@router.post("/batch")
+async def post_recipes_batch(
+    batch: RecipeBatchRequest,
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Get up to 1000 recipes by id, with the ids in a JSON body ({"ids": [...]})"""
+    recipes, missing = await service.get_recipes_by_ids(batch.ids)
+    return {"recipes": recipes, "missing": missing}
 
 @router.get("/{id}")
-def get_recipe(id: int, service: RecipeService = Depends(get_service)):
-    """Get a specific recipe by ID"""
-    recipe = service.get_recipe_by_id(id)
+async def get_recipe(
+    id: RecipePathId,
+    request: Request,
+    response: Response,
+    fields: Optional[Tuple[str, ...]] = Depends(get_field_selection),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """Get a specific recipe by ID, optionally only some fields (fields=title,cuisine)"""
+    # The version is checked first so a matching If-None-Match skips loading the body
+    version = await service.get_recipe_version(id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    # If-None-Match lists are comma-separated, so the projection is joined with "+"
+    etag = f'"recipe-{id}-{version}"' if fields is None else f'"recipe-{id}-{version}-{"+".join(fields)}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    
+    if get_settings().json_fast_path and fields is None:
+        document = await service.get_recipe_document(id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        return RawJSONResponse(document, headers={"ETag": etag})
+    recipe = await service.get_recipe_by_id(id, fields)
     if recipe is None:
         raise HTTPException(status_code=404, detail="Recipe not found")
+    response.headers["ETag"] = etag
     return recipe
 
+@router.get("/{id}/similar")
+async def get_similar_recipes(
+    id: RecipePathId,
+    k: int = Query(10, ge=1, le=100),
+    fields: Optional[Tuple[str, ...]] = Depends(get_field_selection),
+    service: AsyncRecipeService = Depends(get_service)
+):
+    """The k recipes most like this one, best first
+
+    Similarity weighs shared ingredients most, then the same cuisine and a
+    similar total time. Recipes sharing no ingredient are never returned.
+    """
+    recipes = await service.get_similar_recipes(id, k, fields)
+    if recipes is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return recipes
+
 @router.post("", status_code=201)
-def create_recipe(
+async def create_recipe(
     recipe: RecipeCreate,
-    service: RecipeService = Depends(get_service)
+    service: AsyncRecipeService = Depends(get_service)
 ):
     """Create a new recipe"""
-    return service.create_recipe(recipe)
+    return await service.create_recipe(recipe)
+
+@router.post("/bulk")
+async def create_recipes_bulk(request: Request, service: AsyncRecipeService = Depends(get_service)):
+    """Create many recipes from a JSON array or an NDJSON stream
+
+    Invalid items are reported by their position and skipped; valid items
+    are written in batched transactions.
+    """
+    recipe_ids = []
+    errors = []
+    batch = []
+    index = 0
+    async for item, decode_error in _bulk_items(request):
+        if decode_error is not None:
+            errors.append({"index": index, "detail": decode_error})
+        else:
+            try:
+                batch.append(RecipeCreate.model_validate(item))
+            except ValidationError as exc:
+                errors.append({
+                    "index": index,
+                    "detail": [
+                        {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+                        for error in exc.errors()
+                    ]
+                })
+        index += 1
+        if len(batch) >= BULK_BATCH_SIZE:
+            recipe_ids.extend(await service.create_recipes_bulk(batch))
+            batch = []
+    if batch:
+        recipe_ids.extend(await service.create_recipes_bulk(batch))
+    
+    return {"created": len(recipe_ids), "ids": recipe_ids, "errors": errors}
 
 @router.put("/{id}")
-def update_recipe(
-    id: int,
+async def update_recipe(
+    id: RecipePathId,
     recipe: RecipeCreate,
-    service: RecipeService = Depends(get_service)
+    service: AsyncRecipeService = Depends(get_service)
 ):
     """Update an existing recipe"""
-    updated_recipe = service.update_recipe(id, recipe)
+    updated_recipe = await service.update_recipe(id, recipe)
     if updated_recipe is None:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return updated_recipe
 
 @router.delete("/{id}", status_code=204)
-def delete_recipe(id: int, service: RecipeService = Depends(get_service)):
+async def delete_recipe(id: RecipePathId, service: AsyncRecipeService = Depends(get_service)):
     """Delete a recipe"""
-    deleted = service.delete_recipe(id)
+    deleted = await service.delete_recipe(id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Recipe not found")
\ No newline at end of file
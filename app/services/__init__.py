@@ -1,3 +1,3 @@
-from .recipe_service import RecipeService
+from .recipe_service import RecipeService, AsyncRecipeService
 
-__all__ = ["RecipeService"]
\ No newline at end of file
+__all__ = ["RecipeService", "AsyncRecipeService"]
\ No newline at end of file
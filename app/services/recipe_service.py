@@ -1,33 +1,506 @@
-from typing import List, Optional
+import asyncio
+import uuid
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
 from app.models.recipe import Recipe, RecipeCreate
 from app.repositories.recipe_repository import RecipeRepository
+from app.repositories.async_repository import AsyncRecipeRepository
+from app.repositories.filters import RecipeFilter
+from app.repositories.projection import parse_fields
+from app.services.cache import CacheBackend
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
 
-class RecipeService:
-    def __init__(self, repository: RecipeRepository):
+# Cache key holding the current token for list/search results. Any mutation
+# replaces the token, so every cached list and search result goes stale at once.
+LIST_GENERATION_KEY = "generation:lists"
+
+# Cache key holding the current token for one recipe's entries. Updates and
+# deletes replace it, so an entry stored by a read that overlapped the write
+# lands under the old token and is never served.
+RECIPE_GENERATION_KEY = "generation:recipe:{}"
+
+class _RecipeServiceBase:
+    """Cache keys and invalidation shared by RecipeService and AsyncRecipeService
+
+    Both build identical keys, so a sync and an async service can front one cache.
+    """
+    
+    def __init__(self, repository, cache: Optional[CacheBackend] = None, flights=None):
         self.repository = repository
+        self.cache = cache
+        # Shared between services over the same repository to coalesce concurrent reads
+        self.flights = flights
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.casefold().split())
+    
+    @staticmethod
+    def _normalize_filters(filters: Optional[RecipeFilter]) -> Optional[RecipeFilter]:
+        return None if filters is not None and filters.is_empty() else filters
+    
+    @staticmethod
+    def _fields_key(fields: Optional[Tuple[str, ...]]) -> str:
+        return ",".join(fields) if fields else "*"
+    
+    @staticmethod
+    def _key(kind: str, generation: Optional[str], *parts: Any) -> str:
+        """Cache and single-flight key for one read; generation is None without a cache"""
+        head = [kind] if generation is None else [kind, generation]
+        return ":".join(head + [str(part) for part in parts])
+    
+    @staticmethod
+    def _stale_generations(recipe_id: Optional[int]) -> List[str]:
+        """Generation keys a write must replace"""
+        if recipe_id is None:
+            return [LIST_GENERATION_KEY]
+        return [RECIPE_GENERATION_KEY.format(recipe_id), LIST_GENERATION_KEY]
+    
+    def get_cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache else None
+    
+    def get_coalescing_stats(self) -> Optional[dict]:
+        return self.flights.stats() if self.flights else None
+
+class RecipeService(_RecipeServiceBase):
+    def __init__(
+        self,
+        repository: RecipeRepository,
+        cache: Optional[CacheBackend] = None,
+        flights: Optional[SingleFlight] = None
+    ):
+        super().__init__(repository, cache, flights)
+    
+    def _coalesced(self, key: str, load):
+        """Run a backend read, joining an identical one already in flight"""
+        if self.flights is None:
+            return load()
+        return self.flights.do(key, load)
+    
+    def _generation(self, key: str) -> str:
+        generation = self.cache.get(key)
+        if generation is None:
+            # A missing token (evicted or expired) must never revive old entries
+            generation = self._bump_generation(key)
+        return generation
+    
+    def _bump_generation(self, key: str) -> str:
+        generation = uuid.uuid4().hex
+        self.cache.set(key, generation)
+        return generation
+    
+    def _invalidate(self, recipe_id: Optional[int] = None):
+        if self.flights is not None:
+            self.flights.forget_all()
+        if self.cache is None:
+            return
+        for key in self._stale_generations(recipe_id):
+            self._bump_generation(key)
+    
+    def _read(
+        self,
+        kind: str,
+        parts: Tuple,
+        load,
+        generation_key: str = LIST_GENERATION_KEY,
+        coalesce: bool = False,
+        store=lambda value: value
+    ) -> Any:
+        """Serve a read from the cache, loading and storing it on a miss"""
+        if self.cache is None:
+            key = self._key(kind, None, *parts)
+            return self._coalesced(key, load) if coalesce else load()
+        key = self._key(kind, self._generation(generation_key), *parts)
+        value = self.cache.get(key)
+        if value is None:
+            value = self._coalesced(key, load) if coalesce else load()
+            if value is not None:
+                self.cache.set(key, store(value))
+        return value
     
     def get_all_recipes(self) -> List[dict]:
-        return self.repository.get_all_recipes()
+        return self._read("all", (), self.repository.get_all_recipes)
+    
+    def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        filters = self._normalize_filters(filters)
+        fields = parse_fields(fields)
+        recipes, next_cursor = self._read(
+            "page",
+            (limit, cursor or "", repr(filters), self._fields_key(fields)),
+            lambda: self.repository.get_recipes_page(limit, cursor, filters, fields),
+            store=list
+        )
+        return recipes, next_cursor
+    
+    def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[dict]:
+        fields = parse_fields(fields)
+        return self._read(
+            "recipe",
+            (recipe_id, self._fields_key(fields)),
+            lambda: self.repository.get_recipe_by_id(recipe_id, fields),
+            generation_key=RECIPE_GENERATION_KEY.format(recipe_id),
+            coalesce=True
+        )
+    
+    def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        """The recipe as a pre-serialized JSON document"""
+        return self._read(
+            "document",
+            (recipe_id,),
+            lambda: self.repository.get_recipe_document(recipe_id),
+            generation_key=RECIPE_GENERATION_KEY.format(recipe_id),
+            coalesce=True
+        )
     
-    def get_recipe_by_id(self, recipe_id: int) -> Optional[dict]:
-        return self.repository.get_recipe_by_id(recipe_id)
+    def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        """A page of recipes as one pre-serialized JSON array"""
+        filters = self._normalize_filters(filters)
+        document, next_cursor = self._read(
+            "page-document",
+            (limit, cursor or "", repr(filters)),
+            lambda: self.repository.get_recipes_page_document(limit, cursor, filters),
+            store=list
+        )
+        return document, next_cursor
+    
+    def get_recipes_by_ids(self, recipe_ids: List[int]) -> Tuple[List[dict], List[int]]:
+        return self.repository.get_recipes_by_ids(recipe_ids)
+    
+    def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        return self.repository.get_recipe_version(recipe_id)
+    
+    def get_catalog_version(self) -> int:
+        return self.repository.get_catalog_version()
     
     def create_recipe(self, recipe: RecipeCreate) -> dict:
         recipe_data = recipe.model_dump()
-        return self.repository.create_recipe(recipe_data)
+        created = self.repository.create_recipe(recipe_data)
+        self._invalidate()
+        return created
+    
+    def create_recipes_bulk(self, recipes: List[RecipeCreate]) -> List[int]:
+        recipe_ids = self.repository.create_recipes_bulk(recipe.model_dump() for recipe in recipes)
+        self._invalidate()
+        return recipe_ids
     
     def update_recipe(self, recipe_id: int, recipe: RecipeCreate) -> Optional[dict]:
         recipe_data = recipe.model_dump()
-        return self.repository.update_recipe(recipe_id, recipe_data)
+        updated = self.repository.update_recipe(recipe_id, recipe_data)
+        if updated is not None:
+            self._invalidate(recipe_id)
+        return updated
     
     def delete_recipe(self, recipe_id: int) -> bool:
-        return self.repository.delete_recipe(recipe_id)
+        deleted = self.repository.delete_recipe(recipe_id)
+        if deleted:
+            self._invalidate(recipe_id)
+        return deleted
+    
+    def search_recipes(
+        self,
+        query: Optional[str],
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        if not query:
+            return []
+        fields = parse_fields(fields)
+        return self._read(
+            "search",
+            (limit, self._fields_key(fields), self._normalize_query(query)),
+            lambda: self.repository.search_recipes(query, limit, fields),
+            coalesce=True
+        )
+    
+    def fuzzy_search_recipes(
+        self,
+        query: Optional[str],
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        if not query:
+            return []
+        fields = parse_fields(fields)
+        return self._read(
+            "fuzzy",
+            (limit, self._fields_key(fields), self._normalize_query(query)),
+            lambda: self.repository.fuzzy_search_recipes(query, limit, fields),
+            coalesce=True
+        )
+    
+    def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        return self.repository.search_by_ingredients(include, exclude, match_all, limit)
     
-    def search_recipes(self, query: Optional[str]) -> List[dict]:
+    def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[dict]]:
+        fields = parse_fields(fields)
+        # Any write can change a recipe's neighbours, so entries follow the list generation
+        return self._read(
+            "similar",
+            (recipe_id, k, self._fields_key(fields)),
+            lambda: self.repository.get_similar_recipes(recipe_id, k, fields),
+            coalesce=True
+        )
+    
+    def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> dict:
+        filters = self._normalize_filters(filters)
+        if query is not None and not query.strip():
+            query = None
+        return self._read(
+            "facets",
+            (self._normalize_query(query) if query is not None else "", repr(filters)),
+            lambda: self.repository.get_facets(query, filters)
+        )
+
+class AsyncRecipeService(_RecipeServiceBase):
+    """Async counterpart of RecipeService with the same caching and invalidation
+
+    Blocking cache backends (Redis) are called from a worker thread.
+    """
+    
+    def __init__(
+        self,
+        repository: AsyncRecipeRepository,
+        cache: Optional[CacheBackend] = None,
+        flights: Optional[AsyncSingleFlight] = None
+    ):
+        super().__init__(repository, cache, flights)
+    
+    async def _coalesced(self, key: str, load):
+        if self.flights is None:
+            return await load()
+        return await self.flights.do(key, load)
+    
+    async def _cache_call(self, method, *args) -> Any:
+        if self.cache.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+    
+    async def _generation(self, key: str) -> str:
+        generation = await self._cache_call(self.cache.get, key)
+        if generation is None:
+            generation = await self._bump_generation(key)
+        return generation
+    
+    async def _bump_generation(self, key: str) -> str:
+        generation = uuid.uuid4().hex
+        await self._cache_call(self.cache.set, key, generation)
+        return generation
+    
+    async def _invalidate(self, recipe_id: Optional[int] = None):
+        if self.flights is not None:
+            self.flights.forget_all()
+        if self.cache is None:
+            return
+        for key in self._stale_generations(recipe_id):
+            await self._bump_generation(key)
+    
+    async def _read(
+        self,
+        kind: str,
+        parts: Tuple,
+        load,
+        generation_key: str = LIST_GENERATION_KEY,
+        coalesce: bool = False,
+        store=lambda value: value
+    ) -> Any:
+        """Serve a read from the cache, loading and storing it on a miss"""
+        if self.cache is None:
+            key = self._key(kind, None, *parts)
+            return await (self._coalesced(key, load) if coalesce else load())
+        key = self._key(kind, await self._generation(generation_key), *parts)
+        value = await self._cache_call(self.cache.get, key)
+        if value is None:
+            value = await (self._coalesced(key, load) if coalesce else load())
+            if value is not None:
+                await self._cache_call(self.cache.set, key, store(value))
+        return value
+    
+    async def get_all_recipes(self) -> List[dict]:
+        return await self._read("all", (), self.repository.get_all_recipes)
+    
+    async def get_recipes_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        filters = self._normalize_filters(filters)
+        fields = parse_fields(fields)
+        recipes, next_cursor = await self._read(
+            "page",
+            (limit, cursor or "", repr(filters), self._fields_key(fields)),
+            lambda: self.repository.get_recipes_page(limit, cursor, filters, fields),
+            store=list
+        )
+        return recipes, next_cursor
+    
+    def iter_recipes(self) -> AsyncIterator[dict]:
+        return self.repository.iter_recipes()
+    
+    async def get_recipe_by_id(self, recipe_id: int, fields: Optional[Sequence[str]] = None) -> Optional[dict]:
+        fields = parse_fields(fields)
+        return await self._read(
+            "recipe",
+            (recipe_id, self._fields_key(fields)),
+            lambda: self.repository.get_recipe_by_id(recipe_id, fields),
+            generation_key=RECIPE_GENERATION_KEY.format(recipe_id),
+            coalesce=True
+        )
+    
+    async def get_recipe_document(self, recipe_id: int) -> Optional[str]:
+        return await self._read(
+            "document",
+            (recipe_id,),
+            lambda: self.repository.get_recipe_document(recipe_id),
+            generation_key=RECIPE_GENERATION_KEY.format(recipe_id),
+            coalesce=True
+        )
+    
+    async def get_recipes_page_document(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[RecipeFilter] = None
+    ) -> Tuple[str, Optional[str]]:
+        filters = self._normalize_filters(filters)
+        document, next_cursor = await self._read(
+            "page-document",
+            (limit, cursor or "", repr(filters)),
+            lambda: self.repository.get_recipes_page_document(limit, cursor, filters),
+            store=list
+        )
+        return document, next_cursor
+    
+    async def get_recipes_by_ids(self, recipe_ids: List[int]) -> Tuple[List[dict], List[int]]:
+        return await self.repository.get_recipes_by_ids(recipe_ids)
+    
+    async def get_recipe_version(self, recipe_id: int) -> Optional[int]:
+        return await self.repository.get_recipe_version(recipe_id)
+    
+    async def get_catalog_version(self) -> int:
+        return await self.repository.get_catalog_version()
+    
+    async def create_recipe(self, recipe: RecipeCreate) -> dict:
+        created = await self.repository.create_recipe(recipe.model_dump())
+        await self._invalidate()
+        return created
+    
+    async def create_recipes_bulk(self, recipes: List[RecipeCreate]) -> List[int]:
+        recipe_ids = await self.repository.create_recipes_bulk([recipe.model_dump() for recipe in recipes])
+        await self._invalidate()
+        return recipe_ids
+    
+    async def update_recipe(self, recipe_id: int, recipe: RecipeCreate) -> Optional[dict]:
+        updated = await self.repository.update_recipe(recipe_id, recipe.model_dump())
+        if updated is not None:
+            await self._invalidate(recipe_id)
+        return updated
+    
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        deleted = await self.repository.delete_recipe(recipe_id)
+        if deleted:
+            await self._invalidate(recipe_id)
+        return deleted
+    
+    async def search_recipes(
+        self,
+        query: Optional[str],
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
         if not query:
             return []
-        return self.repository.search_recipes(query)
+        fields = parse_fields(fields)
+        return await self._read(
+            "search",
+            (limit, self._fields_key(fields), self._normalize_query(query)),
+            lambda: self.repository.search_recipes(query, limit, fields),
+            coalesce=True
+        )
+    
+    async def fuzzy_search_recipes(
+        self,
+        query: Optional[str],
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        if not query:
+            return []
+        fields = parse_fields(fields)
+        return await self._read(
+            "fuzzy",
+            (limit, self._fields_key(fields), self._normalize_query(query)),
+            lambda: self.repository.fuzzy_search_recipes(query, limit, fields),
+            coalesce=True
+        )
+    
+    async def search_by_ingredients(
+        self,
+        include: List[str],
+        exclude: Optional[List[str]] = None,
+        match_all: bool = True,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        return await self.repository.search_by_ingredients(include, exclude, match_all, limit)
+    
+    async def get_similar_recipes(
+        self,
+        recipe_id: int,
+        k: int = 10,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[List[dict]]:
+        fields = parse_fields(fields)
+        return await self._read(
+            "similar",
+            (recipe_id, k, self._fields_key(fields)),
+            lambda: self.repository.get_similar_recipes(recipe_id, k, fields),
+            coalesce=True
+        )
+    
+    async def get_facets(self, query: Optional[str] = None, filters: Optional[RecipeFilter] = None) -> dict:
+        filters = self._normalize_filters(filters)
+        if query is not None and not query.strip():
+            query = None
+        return await self._read(
+            "facets",
+            (self._normalize_query(query) if query is not None else "", repr(filters)),
+            lambda: self.repository.get_facets(query, filters)
+        )
 
-def get_recipe_service(repository: RecipeRepository) -> RecipeService:
+def get_recipe_service(
+    repository: RecipeRepository,
+    cache: Optional[CacheBackend] = None,
+    flights: Optional[SingleFlight] = None
+) -> RecipeService:
     """Factory function for recipe service"""
-    return RecipeService(repository)
\ No newline at end of file
+    return RecipeService(repository, cache, flights)
+
+def get_async_recipe_service(
+    repository: AsyncRecipeRepository,
+    cache: Optional[CacheBackend] = None,
+    flights: Optional[AsyncSingleFlight] = None
+) -> AsyncRecipeService:
+    """Factory function for the async recipe service"""
+    return AsyncRecipeService(repository, cache, flights)
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+class _Call:
+    """One in-flight execution shared by every caller of the same key"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _FlightStats:
+    def __init__(self):
+        self._calls = 0
+        self._executions = 0
+        self._coalesced = 0
+
+    def _stats(self, in_flight: int) -> Dict:
+        return {
+            "calls": self._calls,
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "in_flight": in_flight
+        }
+
+class SingleFlight(_FlightStats):
+    """Merge identical concurrent calls from threads into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    runs block until it finishes and receive the same result (or exception).
+    Nothing is remembered afterwards, so this is not a cache. Results are
+    shared objects and must be treated as read-only.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, _Call] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self._executions += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is call:
+                    del self._in_flight[key]
+            call.done.set()
+        return call.result
+
+    def forget_all(self):
+        """Make later callers start fresh executions; current waiters are unaffected
+
+        Called after writes so a read that began before the write is not
+        handed to callers arriving after it.
+        """
+        with self._lock:
+            self._in_flight.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return self._stats(len(self._in_flight))
+
+class AsyncSingleFlight(_FlightStats):
+    """Merge identical concurrent awaits on one event loop into one execution
+
+    The shared work runs as its own task and each caller awaits it through
+    asyncio.shield, so a cancelled request (e.g. a client disconnect) does
+    not cancel the result for the others.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        self._calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self._executions += 1
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self._coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every waiter was cancelled
+            task.exception()
+
+    def forget_all(self):
+        """Make later callers start fresh executions; current waiters are unaffected"""
+        self._in_flight.clear()
+
+    def stats(self) -> Dict:
+        return self._stats(len(self._in_flight))
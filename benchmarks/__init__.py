@@ -0,0 +1,3 @@
+# Benchmarks are run as modules, e.g. `python -m benchmarks.bench_search`.
+# bench_repository and bench_http write JSON results (--output) that
+# `python -m benchmarks.compare baseline.json candidate.json` checks for regressions.
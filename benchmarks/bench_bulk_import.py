@@ -0,0 +1,41 @@
+"""Compare create_recipes_bulk against one create_recipe call per recipe."""
+import argparse
+import os
+import tempfile
+import time
+
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+
+def run(label: str, recipes: list, load, **repository_options):
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = SQLiteRecipeRepository(db_path=os.path.join(tmp, "bench.db"), **repository_options)
+        start = time.perf_counter()
+        load(repository, recipes)
+        elapsed = time.perf_counter() - start
+        repository.close()
+    print(f"{label:<28} {len(recipes):>8} recipes {elapsed:8.2f} s {len(recipes) / elapsed:10.0f} recipes/s")
+
+def single(repository, recipes):
+    for recipe in recipes:
+        repository.create_recipe(recipe)
+
+def bulk(repository, recipes):
+    repository.create_recipes_bulk(recipes)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument(
+        "--single-recipes", type=int, default=5000,
+        help="recipes for the per-call path, which commits (fsyncs) once per recipe"
+    )
+    parser.add_argument("--performance-profile", action="store_true")
+    args = parser.parse_args()
+
+    options = {"performance_profile": args.performance_profile}
+    run("create_recipe per item", list(generate_recipes(args.single_recipes)), single, **options)
+    run("create_recipes_bulk", list(generate_recipes(args.recipes)), bulk, **options)
+
+if __name__ == "__main__":
+    main()
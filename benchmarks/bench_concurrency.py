@@ -0,0 +1,151 @@
+"""Latency under many concurrent connections: sync threadpool handlers vs async routes.
+
+The "sync" app reproduces the previous handler style (`def` routes calling
+RecipeService, each request holding one of Starlette's threadpool workers);
+the "async" app is the real application with async routes and the dedicated
+DB executor. Each is served by its own uvicorn process against the same
+SQLite file, and driven over HTTP by one client process holding
+--connections keep-alive connections. uvicorn is only needed for this script.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+
+from app.config import get_settings
+from app.main import create_app
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from app.services.recipe_service import RecipeService
+from benchmarks.corpus import generate_recipes
+
+SEARCH_TERMS = ["chicken", "garlic", "curry", "pasta", "tomato"]
+
+def create_sync_app() -> FastAPI:
+    """The read endpoints as sync `def` handlers on the threadpool"""
+    settings = get_settings()
+    repository = SQLiteRecipeRepository(
+        db_path=settings.db_path,
+        pool_size=settings.db_pool_size,
+        pool_timeout=settings.db_pool_timeout,
+        performance_profile=settings.db_performance_profile
+    )
+    router = APIRouter()
+
+    def get_service() -> RecipeService:
+        return RecipeService(repository)
+
+    @router.get("/ping")
+    def ping():
+        return "pong"
+
+    @router.get("/recipes/search")
+    def search_recipes(q: str, limit: int = 50, service: RecipeService = Depends(get_service)):
+        return service.search_recipes(q, limit)
+
+    @router.get("/recipes/{id}")
+    def get_recipe(id: int, service: RecipeService = Depends(get_service)):
+        if service.get_recipe_version(id) is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        recipe = service.get_recipe_by_id(id)
+        if recipe is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        return recipe
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+def create_async_app() -> FastAPI:
+    return create_app()
+
+async def client_loop(client: httpx.AsyncClient, requests: int, recipe_count: int, rng: random.Random, latencies: list):
+    for _ in range(requests):
+        if rng.random() < 0.8:
+            path = f"/recipes/{rng.randint(1, recipe_count)}"
+        else:
+            path = f"/recipes/search?q={rng.choice(SEARCH_TERMS)}&limit=20"
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+async def run_load(base_url: str, connections: int, requests: int, recipe_count: int) -> dict:
+    latencies = []
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(client, requests, recipe_count, random.Random(seed), latencies)
+            for seed in range(connections)
+        ))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "max_ms": latencies[-1] * 1000
+    }
+
+def start_server(mode: str, db_path: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "RECIPE_DB_PATH": db_path, "RECIPE_DB_PERFORMANCE_PROFILE": "1"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", f"benchmarks.bench_concurrency:create_{mode}_app",
+         "--port", str(port), "--log-level", "warning", "--backlog", "4096", "--timeout-keep-alive", "300"],
+        env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping").raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"{mode} server did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5, help="requests per connection")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        repository = SQLiteRecipeRepository(db_path=db_path, performance_profile=True)
+        repository.create_recipes_bulk(generate_recipes(args.recipes), batch_size=10000)
+        repository.close()
+        recipe_count = args.recipes + 3
+
+        modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+        print(f"recipes={args.recipes} connections={args.connections} requests/connection={args.requests} "
+              f"pool_size={get_settings().db_pool_size}")
+        print(f"{'handlers':<8} {'req/s':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for mode in modes:
+            server = start_server(mode, db_path, args.port)
+            try:
+                result = asyncio.run(run_load(f"http://127.0.0.1:{args.port}", args.connections, args.requests, recipe_count))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{mode:<8} {result['rps']:9.0f} {result['mean_ms']:9.1f} {result['p50_ms']:9.1f} "
+                  f"{result['p99_ms']:9.1f} {result['max_ms']:9.1f}")
+
+if __name__ == "__main__":
+    main()
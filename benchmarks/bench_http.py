@@ -0,0 +1,121 @@
+"""In-process HTTP load driver for the main API routes.
+
+The real app (create_app with the configured middleware and dependencies)
+is served over httpx's ASGI transport against a temporary SQLite file, so
+routing, validation, the service layer and serialization are all measured
+without a network or server process in the way. --concurrency clients run
+as coroutines on one event loop; each route is driven separately. For
+numbers under real sockets and many connections see bench_concurrency.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import httpx
+
+from app import dependencies
+from app.config import get_settings
+from app.main import create_app
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+from benchmarks.results import print_table, summarize, write_results
+
+SEARCH_TERMS = ["chicken", "garlic", "curry", "pasta", "tomato", "spicy ramen"]
+CUISINES = ["Italian", "Indian", "Mexican", "Japanese", "French", "Thai", "Greek", "American"]
+INGREDIENTS = ["chicken", "garlic", "rice", "tomato", "miso", "feta", "lime"]
+NEW_RECIPE = next(generate_recipes(1, seed=7))
+
+def build_routes(recipe_count: int, rng: random.Random) -> Dict[str, Callable[[httpx.AsyncClient], object]]:
+    """Route label -> coroutine function issuing one request"""
+    def recipe_id() -> int:
+        return rng.randint(1, recipe_count)
+
+    return {
+        "GET /recipes/{id}": lambda c: c.get(f"/recipes/{recipe_id()}"),
+        "GET /recipes/{id}?fields": lambda c: c.get(f"/recipes/{recipe_id()}?fields=title,cuisine"),
+        "GET /recipes": lambda c: c.get("/recipes?limit=50"),
+        "GET /recipes?cuisine": lambda c: c.get(f"/recipes?limit=50&cuisine={rng.choice(CUISINES)}"),
+        "GET /recipes/search": lambda c: c.get(f"/recipes/search?q={rng.choice(SEARCH_TERMS)}&limit=20"),
+        "GET /recipes/search/by-ingredients": lambda c: c.get(
+            f"/recipes/search/by-ingredients?include={rng.choice(INGREDIENTS)}&include={rng.choice(INGREDIENTS)}&mode=any&limit=20"
+        ),
+        "GET /recipes/{id}/similar": lambda c: c.get(f"/recipes/{recipe_id()}/similar?k=10"),
+        "GET /recipes/facets": lambda c: c.get(f"/recipes/facets?q={rng.choice(SEARCH_TERMS)}"),
+        "GET /recipes/batch": lambda c: c.get(
+            "/recipes/batch?ids=" + ",".join(str(recipe_id()) for _ in range(20))
+        ),
+        "POST /recipes": lambda c: c.post("/recipes", json=NEW_RECIPE),
+        "PUT /recipes/{id}": lambda c: c.put(f"/recipes/{recipe_id()}", json=NEW_RECIPE)
+    }
+
+async def drive(client: httpx.AsyncClient, request, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = summarize(latencies)
+    # Throughput across all clients, not the per-request rate in ops_per_sec
+    stats["requests_per_sec"] = len(latencies) / elapsed
+    return stats
+
+async def run(routes: Dict[str, Callable], args) -> Dict[str, Dict]:
+    results = {}
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, request in routes.items():
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            await drive(client, request, args.warmup, 1)
+            results[name] = await drive(client, request, args.requests, args.concurrency)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per route")
+    parser.add_argument("--only", nargs="+", help="only drive routes whose label contains one of these")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        repository = SQLiteRecipeRepository(db_path=db_path, performance_profile=True)
+        repository.create_recipes_bulk(generate_recipes(args.recipes, args.seed), batch_size=10000)
+        repository.close()
+
+        os.environ["RECIPE_DB_PATH"] = db_path
+        os.environ["RECIPE_DB_PERFORMANCE_PROFILE"] = "1"
+        get_settings.cache_clear()
+        dependencies.reset_recipe_repository()
+        try:
+            routes = build_routes(args.recipes + 3, random.Random(args.seed))
+            results = asyncio.run(run(routes, args))
+        finally:
+            dependencies.reset_recipe_repository()
+
+    print(f"recipes={args.recipes} requests/route={args.requests} concurrency={args.concurrency}")
+    print_table(results)
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        write_results(args.output, "http", params, results)
+
+if __name__ == "__main__":
+    main()
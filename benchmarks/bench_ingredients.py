@@ -0,0 +1,47 @@
+"""Time ingredient search in the memory and SQLite backends."""
+import argparse
+import os
+import tempfile
+import time
+
+from app.repositories.recipe_repository import MemoryRecipeRepository
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+
+# (include, exclude, match_all) from selective to very broad
+QUERIES = [
+    (["avocado", "bread"], [], True),
+    (["chicken", "rice", "ginger"], ["beef"], True),
+    (["potato", "cilantro"], [], False),
+    (["salt", "pepper"], [], True),
+    (["salt", "garlic", "onion"], ["pork"], False),
+]
+
+def time_queries(label: str, repository, limit: int, repeat: int):
+    for include, exclude, match_all in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            repository.search_by_ingredients(include, exclude, match_all, limit)
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        mode = "all" if match_all else "any"
+        print(f"{label:<8} {mode:<4} +{','.join(include):<24} -{','.join(exclude):<6} {elapsed:9.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    memory = MemoryRecipeRepository()
+    memory.create_recipes_bulk(generate_recipes(args.recipes))
+    time_queries("memory", memory, args.limit, args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteRecipeRepository(db_path=os.path.join(tmp, "bench.db"))
+        sqlite.create_recipes_bulk(generate_recipes(args.recipes), batch_size=10000)
+        time_queries("sqlite", sqlite, args.limit, args.repeat)
+        sqlite.close()
+
+if __name__ == "__main__":
+    main()
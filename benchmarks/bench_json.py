@@ -0,0 +1,71 @@
+"""Requests per second with and without the pre-serialized JSON fast path.
+
+Both modes run the real app in-process over httpx's ASGI transport against
+the same SQLite file; only RECIPE_JSON_FAST_PATH differs. With the fast path
+GET /recipes/{id} and GET /recipes send stored documents as-is; without it
+rows are decoded into dicts and re-encoded by FastAPI on every request.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from app import dependencies
+from app.config import get_settings
+from app.main import create_app
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+
+async def measure(path_for, requests: int) -> float:
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(min(50, requests)):
+            (await client.get(path_for(i))).raise_for_status()
+        start = time.perf_counter()
+        for i in range(requests):
+            (await client.get(path_for(i))).raise_for_status()
+        return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        repository = SQLiteRecipeRepository(db_path=db_path, performance_profile=True)
+        repository.create_recipes_bulk(generate_recipes(args.recipes), batch_size=10000)
+        repository.close()
+
+        rng = random.Random(42)
+        ids = [rng.randint(1, args.recipes) for _ in range(args.requests)]
+        cuisines = ["Italian", "Indian", "Mexican", "Japanese", "French"]
+        endpoints = {
+            "GET /recipes/{id}": lambda i: f"/recipes/{ids[i]}",
+            f"GET /recipes?limit={args.page_size}": lambda i: f"/recipes?limit={args.page_size}&cuisine={cuisines[i % 5]}"
+        }
+
+        results = {}
+        for fast_path in (False, True):
+            os.environ["RECIPE_DB_PATH"] = db_path
+            os.environ["RECIPE_JSON_FAST_PATH"] = "1" if fast_path else "0"
+            get_settings.cache_clear()
+            dependencies.reset_recipe_repository()
+            for name, path_for in endpoints.items():
+                results[name, fast_path] = asyncio.run(measure(path_for, args.requests))
+            dependencies.reset_recipe_repository()
+
+        print(f"recipes={args.recipes} requests={args.requests} (req/s, sequential)")
+        print(f"{'endpoint':<24} {'dict + encode':>14} {'stored JSON':>12} {'speedup':>8}")
+        for name in endpoints:
+            slow, fast = results[name, False], results[name, True]
+            print(f"{name:<24} {slow:14.0f} {fast:12.0f} {fast / slow:7.2f}x")
+
+if __name__ == "__main__":
+    main()
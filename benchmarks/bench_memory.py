@@ -0,0 +1,84 @@
+"""Measure memory per recipe held by the in-memory repository.
+
+Loads the synthetic corpus (streamed, so the corpus itself is never held)
+into a MemoryRecipeRepository and reports the growth in resident memory
+divided by the number of recipes. --breakdown also walks the repository's
+attributes and attributes every object to the first one that reaches it,
+which shows where the bytes go (slow at a million recipes).
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+from array import array
+from typing import Dict
+
+from app.repositories.recipe_repository import MemoryRecipeRepository
+from benchmarks.corpus import generate_recipes
+
+def resident_bytes() -> int:
+    """Current RSS from /proc, or the peak RSS where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def deep_size(obj, seen: set) -> int:
+    """sys.getsizeof of obj and everything it references that was not seen yet"""
+    pending = [obj]
+    total = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+        elif isinstance(item, (str, bytes, int, float, array)) or item is None:
+            continue
+        else:
+            for cls in type(item).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(item, slot):
+                        pending.append(getattr(item, slot))
+            if hasattr(item, "__dict__") and not isinstance(item, type):
+                pending.append(vars(item))
+    return total
+
+def breakdown(repository: MemoryRecipeRepository) -> Dict[str, int]:
+    seen = set()
+    return {name: deep_size(value, seen) for name, value in vars(repository).items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--breakdown", action="store_true", help="also report bytes per recipe by attribute")
+    args = parser.parse_args()
+
+    gc.collect()
+    before = resident_bytes()
+    start = time.perf_counter()
+    repository = MemoryRecipeRepository()
+    repository.create_recipes_bulk(generate_recipes(args.recipes, args.seed))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    grown = resident_bytes() - before
+
+    print(f"recipes={args.recipes} loaded in {elapsed:.1f}s")
+    print(f"{'resident memory':<24} {grown / 2 ** 20:10.1f} MiB {grown / args.recipes:10.0f} bytes/recipe")
+    if args.breakdown:
+        for name, size in sorted(breakdown(repository).items(), key=lambda item: -item[1]):
+            if size >= args.recipes:
+                print(f"{name:<24} {size / 2 ** 20:10.1f} MiB {size / args.recipes:10.0f} bytes/recipe")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Payload size and fetch + JSON encode time for full recipes vs a list-view projection."""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.repositories.recipe_repository import MemoryRecipeRepository
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+
+LIST_FIELDS = ["title", "cuisine", "difficulty", "prepTime", "cookTime"]
+SEARCH_TERMS = ["chicken", "garlic", "curry"]
+
+def time_call(func, repeat: int) -> float:
+    """Milliseconds per call, including encoding the result as a response would"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+        json.dumps(result)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def payload_bytes(result) -> int:
+    recipes = result[0] if isinstance(result, tuple) else result
+    return len(json.dumps(recipes).encode())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    recipes = list(generate_recipes(args.recipes))
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteRecipeRepository(db_path=os.path.join(tmp, "bench.db"), performance_profile=True)
+        sqlite.create_recipes_bulk(recipes, batch_size=10000)
+        memory = MemoryRecipeRepository()
+        memory.create_recipes_bulk(recipes)
+
+        print(f"recipes={args.recipes} page={args.page_size} fields={','.join(LIST_FIELDS)}")
+        print(f"{'backend':<8} {'call':<22} {'full ms':>8} {'proj ms':>8} {'full KB':>8} {'proj KB':>8}")
+        for name, repository in (("sqlite", sqlite), ("memory", memory)):
+            calls = {
+                "get_recipes_page": lambda fields: repository.get_recipes_page(args.page_size, fields=fields),
+                "search_recipes": lambda fields: [
+                    recipe
+                    for term in SEARCH_TERMS
+                    for recipe in repository.search_recipes(term, args.page_size, fields)
+                ]
+            }
+            for call, func in calls.items():
+                full_ms, full = time_call(lambda: func(None), args.repeat)
+                proj_ms, projected = time_call(lambda: func(LIST_FIELDS), args.repeat)
+                print(f"{name:<8} {call:<22} {full_ms:8.3f} {proj_ms:8.3f} "
+                      f"{payload_bytes(full) / 1024:8.1f} {payload_bytes(projected) / 1024:8.1f}")
+        sqlite.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Micro-benchmarks for every RecipeRepository method across backends.
+
+Each backend (memory, in-memory SQLite, file SQLite with the performance
+profile, and that file SQLite behind the tiered repository's memory tier) is loaded with the same synthetic corpus, then every public
+repository method is timed call by call. Reads run before writes so the
+write cases do not change what the reads see. Results are printed and, with
+--output, written as JSON for `python -m benchmarks.compare`.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict
+
+from app.repositories.filters import RecipeFilter
+from app.repositories.pagination import encode_cursor
+from app.repositories.recipe_repository import MemoryRecipeRepository, RecipeRepository
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from app.repositories.tiered_repository import TieredRecipeRepository
+from benchmarks.corpus import generate_recipes
+from benchmarks.results import print_table, time_calls, write_results
+
+BACKENDS = ["memory", "sqlite-memory", "sqlite-file", "tiered"]
+SEARCH_QUERIES = ["chicken", "spicy curry", "carbonara", "ramen 99", "garlic", "nonexistent"]
+FUZZY_QUERIES = ["carbonarra", "tikka masalla", "chiken curyy", "ratatouile", "avocdo toast", "qwzx"]
+INGREDIENT_QUERIES = [
+    (["avocado", "bread"], [], True),
+    (["chicken", "rice", "ginger"], ["beef"], True),
+    (["miso", "nori"], [], False),
+    (["salt", "pepper"], [], True)
+]
+FILTERS = [
+    RecipeFilter(cuisine="Italian"),
+    RecipeFilter(difficulty="Easy", max_total_minutes=30),
+    RecipeFilter(cuisine="Thai", min_cook_minutes=20)
+]
+
+def open_backend(name: str, directory: str, tier_capacity: int) -> RecipeRepository:
+    if name == "memory":
+        return MemoryRecipeRepository()
+    if name == "sqlite-memory":
+        return SQLiteRecipeRepository(db_path=":memory:", performance_profile=True)
+    if name == "tiered":
+        store = SQLiteRecipeRepository(db_path=os.path.join(directory, "tiered.db"), performance_profile=True)
+        return TieredRecipeRepository(store, capacity=tier_capacity, warm_up=False)
+    return SQLiteRecipeRepository(db_path=os.path.join(directory, "bench.db"), performance_profile=True)
+
+def build_cases(repository: RecipeRepository, recipe_count: int, batch_size: int, seed: int) -> Dict[str, Callable[[int], object]]:
+    """One callable per benchmark, keyed by "method" or "method[variant]" and run in order"""
+    rng = random.Random(seed)
+    ids = [rng.randint(1, recipe_count) for _ in range(10000)]
+    middle = encode_cursor(recipe_count // 2)
+    new_recipes = generate_recipes(10 ** 9, seed=seed + 1)
+    created = []
+
+    def create(i):
+        created.append(repository.create_recipe(next(new_recipes))["id"])
+
+    def written_id(i):
+        # Writes run last, so without created recipes (e.g. --only) corpus ones are used
+        return created.pop() if created else ids[i % len(ids)]
+
+    def consume(iterator):
+        for _ in iterator:
+            pass
+
+    return {
+        "get_recipe_by_id": lambda i: repository.get_recipe_by_id(ids[i % len(ids)]),
+        "get_recipe_by_id[fields]": lambda i: repository.get_recipe_by_id(ids[i % len(ids)], ("title", "cuisine")),
+        "get_recipe_document": lambda i: repository.get_recipe_document(ids[i % len(ids)]),
+        "get_recipe_version": lambda i: repository.get_recipe_version(ids[i % len(ids)]),
+        "get_catalog_version": lambda i: repository.get_catalog_version(),
+        "get_recipes_by_ids[100]": lambda i: repository.get_recipes_by_ids(ids[i * 100 % len(ids):][:100]),
+        "get_recipes_page[first]": lambda i: repository.get_recipes_page(batch_size),
+        "get_recipes_page[middle]": lambda i: repository.get_recipes_page(batch_size, middle),
+        "get_recipes_page[filtered]": lambda i: repository.get_recipes_page(batch_size, filters=FILTERS[i % len(FILTERS)]),
+        "get_recipes_page_document[first]": lambda i: repository.get_recipes_page_document(batch_size),
+        "get_recipes_page_document[filtered]": lambda i: repository.get_recipes_page_document(
+            batch_size, filters=FILTERS[i % len(FILTERS)]
+        ),
+        "search_recipes": lambda i: repository.search_recipes(SEARCH_QUERIES[i % len(SEARCH_QUERIES)], batch_size),
+        "fuzzy_search_recipes": lambda i: repository.fuzzy_search_recipes(FUZZY_QUERIES[i % len(FUZZY_QUERIES)], batch_size),
+        "search_by_ingredients": lambda i: repository.search_by_ingredients(
+            *INGREDIENT_QUERIES[i % len(INGREDIENT_QUERIES)], batch_size
+        ),
+        "get_similar_recipes": lambda i: repository.get_similar_recipes(ids[i % len(ids)], 10),
+        "get_facets": lambda i: repository.get_facets(),
+        "get_facets[query]": lambda i: repository.get_facets(SEARCH_QUERIES[i % len(SEARCH_QUERIES)]),
+        "get_diagnostics": lambda i: repository.get_diagnostics(),
+        "get_all_recipes": lambda i: repository.get_all_recipes(),
+        "iter_recipes": lambda i: consume(repository.iter_recipes()),
+        "create_recipe": create,
+        "update_recipe": lambda i: repository.update_recipe(
+            created[i % len(created)] if created else ids[i % len(ids)], next(new_recipes)
+        ),
+        "delete_recipe": lambda i: repository.delete_recipe(written_id(i)),
+        "create_recipes_bulk[100]": lambda i: repository.create_recipes_bulk(next(new_recipes) for _ in range(100))
+    }
+
+# Whole-catalog operations are timed with --scan-repeat calls instead of --repeat
+SCAN_CASES = {"get_all_recipes", "iter_recipes", "get_facets", "get_facets[query]", "create_recipes_bulk[100]"}
+
+def run_backend(name: str, args, directory: str) -> Dict[str, Dict]:
+    repository = open_backend(name, directory, args.tier_capacity)
+    start = time.perf_counter()
+    repository.create_recipes_bulk(generate_recipes(args.recipes, args.seed))
+    print(f"# {name}: loaded {args.recipes} recipes in {time.perf_counter() - start:.1f}s")
+    recipe_count = args.recipes + 3  # plus the seeded sample recipes
+
+    results = {}
+    for case, func in build_cases(repository, recipe_count, args.limit, args.seed).items():
+        if args.only and not any(pattern in case for pattern in args.only):
+            continue
+        repeat = args.scan_repeat if case in SCAN_CASES else args.repeat
+        results[f"{name}/{case}"] = time_calls(func, repeat, warmup=0 if case.startswith(("create", "delete")) else 3)
+    if hasattr(repository, "close"):
+        repository.close()
+    return results
+
+def check_coverage():
+    """Fail loudly when a public RecipeRepository method has no benchmark"""
+    methods = {name for name in dir(RecipeRepository) if not name.startswith("_")}
+    covered = {case.split("[")[0] for case in build_cases(MemoryRecipeRepository(), 3, 1, 0)}
+    missing = methods - covered
+    if missing:
+        raise SystemExit(f"No benchmark for RecipeRepository methods: {', '.join(sorted(missing))}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10000, help="corpus size, 10k to 1M")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per point operation")
+    parser.add_argument("--scan-repeat", type=int, default=5, help="timed calls per whole-catalog operation")
+    parser.add_argument("--limit", type=int, default=50, help="page and search result size")
+    parser.add_argument("--only", nargs="+", help="only run cases whose name contains one of these")
+    parser.add_argument("--tier-capacity", type=int, default=10000, help="memory tier size of the tiered backend")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+    check_coverage()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in args.backends:
+            results.update(run_backend(backend, args, directory))
+
+    print_table(results)
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        write_results(args.output, "repository", params, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare FTS5 search against the LIKE title scan on a file database."""
+import argparse
+import os
+import tempfile
+import time
+
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+
+QUERIES = ["carbonara", "spicy curry", "chick", "garlic", "ramen 99", "tikka masala 4711", "nonexistent"]
+
+def load(repository: SQLiteRecipeRepository, count: int):
+    repository.create_recipes_bulk(generate_recipes(count), batch_size=10000)
+
+def time_query(search, query: str, limit: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search(query, limit)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = SQLiteRecipeRepository(db_path=os.path.join(tmp, "bench.db"))
+        load(repository, args.recipes)
+        print(f"recipes={args.recipes} limit={args.limit} (ms/query)")
+        print(f"{'query':<20} {'LIKE title scan':>16} {'FTS5 bm25':>10}")
+        for query in QUERIES:
+            like_ms = time_query(repository._search_like, query, args.limit, args.repeat)
+            fts_ms = time_query(repository.search_recipes, query, args.limit, args.repeat)
+            print(f"{query:<20} {like_ms:16.3f} {fts_ms:10.3f}")
+        repository.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Write throughput of the file SQLite repository: per-call commits vs group commit.
+
+Each run loads the synthetic corpus into a fresh database file, then
+--writers threads each perform --writes mutations (mostly creates, plus
+updates and deletes of recipes they created) as fast as they can. With
+per-call commits every mutation is its own transaction and fsync; with
+group commit the writer thread merges whatever is queued into one
+transaction. Both are run with the default pragmas (synchronous=FULL) and
+with the performance profile. Results are printed and, with --output,
+written as JSON for `python -m benchmarks.compare`.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict
+
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from benchmarks.corpus import generate_recipes
+from benchmarks.results import print_table, summarize, write_results
+
+MODES = ["per-call", "group"]
+
+def writer(repository: SQLiteRecipeRepository, writes: int, seed: int, latencies: list):
+    rng = random.Random(seed)
+    recipes = generate_recipes(10 ** 9, seed=seed)
+    created = []
+    for _ in range(writes):
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < 0.2 and created:
+            repository.update_recipe(rng.choice(created), next(recipes))
+        elif roll < 0.3 and created:
+            repository.delete_recipe(created.pop(rng.randrange(len(created))))
+        else:
+            created.append(repository.create_recipe(next(recipes))["id"])
+        latencies.append(time.perf_counter() - start)
+
+def run(mode: str, performance_profile: bool, args, directory: str) -> Dict[str, float]:
+    db_path = os.path.join(directory, f"{mode}-{int(performance_profile)}.db")
+    loader = SQLiteRecipeRepository(db_path=db_path, performance_profile=performance_profile)
+    loader.create_recipes_bulk(generate_recipes(args.recipes), batch_size=10000)
+    loader.close()
+
+    repository = SQLiteRecipeRepository(
+        db_path=db_path,
+        pool_size=args.writers + 1,
+        performance_profile=performance_profile,
+        group_commit=mode == "group",
+        group_commit_interval=args.interval,
+        group_commit_max_batch=args.max_batch
+    )
+    try:
+        latencies = []
+        threads = [
+            threading.Thread(target=writer, args=(repository, args.writes, seed, latencies))
+            for seed in range(args.writers)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stats = summarize(latencies)
+        stats["requests_per_sec"] = len(latencies) / elapsed
+        group_commit = repository.get_diagnostics()["group_commit"]
+        if group_commit:
+            stats["mean_group"] = group_commit["writes"] / group_commit["groups"]
+        return stats
+    finally:
+        repository.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200, help="mutations per writer thread")
+    parser.add_argument("--interval", type=float, default=0.002, help="group commit interval in seconds")
+    parser.add_argument("--max-batch", type=int, default=200, help="most writes per group commit")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for performance_profile in (False, True):
+            profile = "performance" if performance_profile else "default"
+            for mode in MODES:
+                results[f"{profile}/{mode}"] = run(mode, performance_profile, args, tmp)
+
+    print(f"recipes={args.recipes} writers={args.writers} writes/writer={args.writes} "
+          f"interval={args.interval * 1000:g}ms max_batch={args.max_batch}")
+    print_table(results)
+    for name, stats in results.items():
+        if "mean_group" in stats:
+            print(f"{name}: {stats['mean_group']:.1f} writes per commit")
+    if args.output:
+        write_results(args.output, "writes", vars(args), results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.15
+
+Each benchmark present in both files is compared on --metric (p50 latency by
+default). A change is a regression when the candidate is worse by more than
+--threshold (relative) and --min-delta-ms (absolute, so sub-microsecond
+jitter on very fast operations is ignored). Exits with status 1 when any
+regression is found, so it can gate CI.
+"""
+import argparse
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.results import load_results
+
+# Metrics where a larger value is better; every *_ms metric is the opposite
+HIGHER_IS_BETTER = {"ops_per_sec", "requests_per_sec"}
+
+def compare(
+    baseline: Dict[str, Dict],
+    candidate: Dict[str, Dict],
+    metric: str,
+    threshold: float,
+    min_delta_ms: float
+) -> List[Tuple[str, float, float, float, str]]:
+    """(name, baseline value, candidate value, relative change, verdict) per shared benchmark"""
+    higher_is_better = metric in HIGHER_IS_BETTER
+    rows = []
+    for name in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[name].get(metric), candidate[name].get(metric)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = change < -threshold if higher_is_better else change > threshold
+        better = change > threshold if higher_is_better else change < -threshold
+        significant = higher_is_better or abs(new - old) >= min_delta_ms
+        if worse and significant:
+            verdict = "REGRESSION"
+        elif better and significant:
+            verdict = "improved"
+        else:
+            verdict = ""
+        rows.append((name, old, new, change, verdict))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change that counts, e.g. 0.15 for 15%%")
+    parser.add_argument("--min-delta-ms", type=float, default=0.005)
+    args = parser.parse_args()
+
+    baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+    if baseline["suite"] != candidate["suite"]:
+        sys.exit(f"Cannot compare a {baseline['suite']!r} run with a {candidate['suite']!r} run")
+    for key in ("params", "environment"):
+        differing = sorted(
+            name for name in set(baseline[key]) | set(candidate[key])
+            if name != "git_revision" and baseline[key].get(name) != candidate[key].get(name)
+        )
+        if differing:
+            print(f"warning: runs differ in {key}: {', '.join(differing)}", file=sys.stderr)
+
+    rows = compare(baseline["results"], candidate["results"], args.metric, args.threshold, args.min_delta_ms)
+    print(f"{'benchmark':<48} {'baseline':>10} {'candidate':>10} {'change':>8}  ({args.metric})")
+    for name, old, new, change, verdict in rows:
+        print(f"{name:<48} {old:10.3f} {new:10.3f} {change:+8.1%}  {verdict}")
+    for label, names in (("only in baseline", set(baseline["results"]) - set(candidate["results"])),
+                         ("only in candidate", set(candidate["results"]) - set(baseline["results"]))):
+        if names:
+            print(f"{len(names)} benchmark(s) {label}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} in {len(rows)} benchmarks")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Synthetic recipe corpus with realistic ingredient distributions.
+
+Run as a module to write a corpus as NDJSON, e.g.
+`python -m benchmarks.corpus --recipes 1000000 --output corpus.ndjson`.
+"""
+import argparse
+import json
+import random
+import sys
+from itertools import accumulate
+from typing import Dict, Iterator, List
+
+CUISINES = ["Italian", "Indian", "American", "Mexican", "Japanese", "French", "Thai", "Greek"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+DISHES = [
+    "Carbonara", "Tikka Masala", "Toast", "Tacos", "Ramen", "Ratatouille",
+    "Curry", "Salad", "Risotto", "Stew", "Soup", "Pie", "Burger", "Stir Fry"
+]
+ADJECTIVES = ["Spicy", "Classic", "Quick", "Creamy", "Smoky", "Crispy", "Herbed", "Garlic"]
+# Shared staples, most common first
+INGREDIENTS = [
+    "salt", "pepper", "olive oil", "garlic", "onion", "butter", "eggs", "flour",
+    "tomato", "chicken", "rice", "lemon", "parmesan", "basil", "cumin", "yogurt",
+    "beef", "pork", "tofu", "spinach", "mushrooms", "avocado", "bread", "pasta",
+    "ginger", "soy sauce", "coconut milk", "chili", "cilantro", "potato"
+]
+# Ingredients that mostly appear in one cuisine's recipes
+CUISINE_INGREDIENTS = {
+    "Italian": ["mozzarella", "oregano", "pancetta", "ricotta", "balsamic vinegar", "pine nuts", "arborio rice"],
+    "Indian": ["garam masala", "turmeric", "ghee", "cardamom", "lentils", "paneer", "mustard seeds"],
+    "American": ["cheddar", "bacon", "ketchup", "maple syrup", "cornmeal", "brown sugar", "pickles"],
+    "Mexican": ["black beans", "tortillas", "jalapeno", "lime", "corn", "queso fresco", "chipotle"],
+    "Japanese": ["miso", "mirin", "nori", "dashi", "sake", "wasabi", "sesame oil"],
+    "French": ["shallots", "thyme", "dijon mustard", "cream", "white wine", "gruyere", "tarragon"],
+    "Thai": ["fish sauce", "lemongrass", "galangal", "thai basil", "palm sugar", "kaffir lime", "peanuts"],
+    "Greek": ["feta", "kalamata olives", "oregano", "cucumber", "dill", "phyllo", "lamb"]
+}
+# Long tail of rare ingredients, each used by a tiny fraction of recipes
+RARE_INGREDIENTS = [
+    f"{variety} {base}"
+    for base in ["pepper", "mushroom", "salt", "vinegar", "cheese", "honey", "chili", "oil"]
+    for variety in ["smoked", "wild", "aged", "heirloom", "black", "pink", "truffle", "fermented",
+                    "roasted", "dried", "pickled", "infused"]
+]
+
+# Share of a recipe's ingredients drawn from staples, its cuisine's pantry and the long tail
+SOURCE_WEIGHTS = (0.6, 0.32, 0.08)
+
+def _zipf_cumulative(size: int, exponent: float = 1.0) -> List[float]:
+    # Cumulative weights let rng.choices skip re-summing on every call
+    return list(accumulate(1.0 / (rank + 1) ** exponent for rank in range(size)))
+
+def generate_recipes(count: int, seed: int = 42) -> Iterator[Dict]:
+    """Yield synthetic recipes in RecipeCreate shape
+
+    Ingredient popularity follows Zipf-like curves: a few pantry staples
+    appear in most recipes, each cuisine has characteristic ingredients,
+    and a long tail of rare ones keeps postings lists skewed like real
+    data. Output is deterministic for a given seed and streamed, so corpora
+    of a million recipes never need to be held in memory.
+    """
+    rng = random.Random(seed)
+    staples = _zipf_cumulative(len(INGREDIENTS))
+    pantries = {cuisine: _zipf_cumulative(len(items), 0.8) for cuisine, items in CUISINE_INGREDIENTS.items()}
+    rare = _zipf_cumulative(len(RARE_INGREDIENTS), 0.5)
+    sources = list(accumulate(SOURCE_WEIGHTS))
+    for i in range(count):
+        cuisine = rng.choice(CUISINES)
+        # Most recipes use 5-10 ingredients; a few use many more
+        size = min(25, max(3, int(rng.lognormvariate(2.0, 0.35))))
+        picks = []
+        for source in rng.choices((0, 1, 2), cum_weights=sources, k=size):
+            if source == 0:
+                picks.append(rng.choices(INGREDIENTS, cum_weights=staples)[0])
+            elif source == 1:
+                picks.append(rng.choices(CUISINE_INGREDIENTS[cuisine], cum_weights=pantries[cuisine])[0])
+            else:
+                picks.append(rng.choices(RARE_INGREDIENTS, cum_weights=rare)[0])
+        ingredients = list(dict.fromkeys(picks))
+        yield {
+            "title": f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)} {i}",
+            "ingredients": ingredients,
+            "steps": [f"Step {n + 1}: prepare the {rng.choice(ingredients)}" for n in range(rng.randint(2, 8))],
+            "prepTime": f"{rng.choice([5, 10, 15, 20, 30, 45])} minutes",
+            "cookTime": f"{rng.choice([0, 5, 10, 20, 30, 60, 90])} minutes",
+            "difficulty": rng.choice(DIFFICULTIES),
+            "cuisine": cuisine
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="NDJSON file to write (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for recipe in generate_recipes(args.recipes, args.seed):
+            out.write(json.dumps(recipe) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == "__main__":
+    main()
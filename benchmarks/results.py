@@ -0,0 +1,90 @@
+"""Timing statistics and the JSON result format shared by the benchmark suite.
+
+A result file looks like:
+
+    {"suite": "repository", "created": "...", "environment": {...},
+     "params": {"recipes": 10000, ...},
+     "results": {"sqlite-file/get_recipe_by_id": {"mean_ms": ..., "p50_ms": ...}}}
+
+`benchmarks.compare` diffs two such files.
+"""
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    ordered = sorted(samples)
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+    mean = statistics.fmean(ordered)
+    return {
+        "samples": len(ordered),
+        "mean_ms": mean * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "ops_per_sec": 1 / mean if mean else float("inf")
+    }
+
+def time_calls(func: Callable[[int], object], repeat: int, warmup: int = 3) -> Dict[str, float]:
+    """Time `func(i)` for i in range(repeat) after a few untimed warm-up calls"""
+    for i in range(min(warmup, repeat)):
+        func(i)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict:
+    """What a result depends on besides the code, so runs can be compared fairly"""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git_revision": _git_revision()
+    }
+
+def write_results(path: str, suite: str, params: Dict, results: Dict[str, Dict]):
+    document = {
+        "suite": suite,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "params": params,
+        "results": results
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load_results(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+def print_table(results: Dict[str, Dict], out=sys.stdout):
+    print(f"{'benchmark':<48} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'ops/s':>10}", file=out)
+    for name, stats in results.items():
+        # Concurrent runs report aggregate throughput rather than 1 / mean latency
+        throughput = stats.get("requests_per_sec", stats["ops_per_sec"])
+        print(f"{name:<48} {stats['mean_ms']:9.3f} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} "
+              f"{throughput:10.0f}", file=out)
@@ -1,8 +1,33 @@
+import asyncio
+import cProfile
+import json
+import sqlite3
+import threading
+import time
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from main import app
-from app.dependencies import get_recipe_repository
+from app.dependencies import get_recipe_repository, get_recipe_cache, reset_recipe_repository
+from app.models.recipe import RecipeCreate
+from app.services.cache import LRUCache, RedisCache
+from app.repositories.durations import parse_minutes
+from app.repositories.filters import RecipeFilter
+from app.repositories.pagination import encode_cursor
+from app.repositories.projection import RECIPE_FIELDS, InvalidFieldsError
+from app.services.recipe_service import AsyncRecipeService, RecipeService
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
 from app.repositories.test_sqlite_repository import InMemorySQLiteRecipeRepository
+from app.repositories.async_repository import AsyncSQLiteRecipeRepository, as_async_repository
+from app.repositories.recipe_repository import MemoryRecipeRepository
+from app.repositories.sqlite_repository import SQLiteRecipeRepository
+from app.repositories.connection_pool import SQLiteConnectionPool, PoolTimeoutError
+from app.repositories.instrumentation import instrument_repository
+from app.repositories.tiered_repository import TieredRecipeRepository
+from app.repositories.tiering import LFUPolicy
+from app.config import get_settings
+from app.main import create_app
+from app.metrics import METRICS, HTTP_REQUEST_SECONDS, REPOSITORY_OPERATION_SECONDS, REPOSITORY_ROWS_RETURNED, SQLITE_VM_STEPS, MetricsRegistry
 
 # Test data for creating recipes
 sample_recipe = {
@@ -25,6 +50,14 @@ updated_recipe = {
     "cuisine": "Updated Test"
 }
 
+@pytest.fixture(params=[MemoryRecipeRepository, InMemorySQLiteRecipeRepository], ids=lambda cls: cls.__name__)
+def repository(request):
+    """A fresh repository of each backend, for tests every backend must pass"""
+    repository = request.param()
+    yield repository
+    if hasattr(repository, "close"):
+        repository.close()
+
 @pytest.fixture
 def client():
     """Create a test client with dependency override"""
@@ -243,5 +276,1413 @@ def test_happy_path_crud_and_search(client):
     final_get_response = client.get(f"/recipes/{recipe_id}")
     assert final_get_response.status_code == 404
 
+def test_sqlite_file_repository_reuses_pooled_connections(tmp_path):
+    """Test that a file database reuses pooled connections instead of reconnecting"""
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"), pool_size=2)
+    
+    created = repository.create_recipe(sample_recipe)
+    assert repository.get_recipe_by_id(created["id"])["title"] == sample_recipe["title"]
+    assert repository.update_recipe(created["id"], updated_recipe)["title"] == updated_recipe["title"]
+    assert len(repository.get_all_recipes()) == 4
+    assert repository.delete_recipe(created["id"])
+    
+    stats = repository.get_pool_stats()
+    assert stats["connections"] == 1
+    assert stats["checkouts"] >= 7
+    assert stats["timeouts"] == 0
+    repository.close()
+
+def test_connection_pool_is_bounded(tmp_path):
+    """Test that the pool never opens more than max_size connections"""
+    pool = SQLiteConnectionPool(
+        str(tmp_path / "pool.db"), max_size=1, timeout=0.05, pragmas={"foreign_keys": "ON"}
+    )
+    
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+    
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    
+    stats = pool.stats()
+    assert stats["connections"] == 1
+    assert stats["waits"] == 0
+    assert stats["timeouts"] == 1
+    pool.close()
+
+def test_diagnostics_endpoint(client):
+    """Test that the diagnostics endpoint reports the SQLite settings"""
+    response = client.get("/diagnostics")
+    assert response.status_code == 200
+    diagnostics = response.json()
+    assert diagnostics["backend"] == "sqlite"
+    assert diagnostics["performance_profile"] is False
+    assert diagnostics["pragmas"]["foreign_keys"] == 1
+
+def test_sqlite_performance_profile_pragmas(tmp_path):
+    """Test that the performance profile enables WAL and the tuned PRAGMAs"""
+    repository = SQLiteRecipeRepository(
+        db_path=str(tmp_path / "recipes.db"), performance_profile=True
+    )
+    pragmas = repository.get_diagnostics()["pragmas"]
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1  # NORMAL
+    assert pragmas["mmap_size"] == 268435456
+    assert pragmas["cache_size"] == -64000
+    assert pragmas["busy_timeout"] == 5000
+    repository.close()
+
+def test_sqlite_reads_continue_during_writes(tmp_path):
+    """Test that readers are not blocked by a stream of writes in WAL mode"""
+    repository = SQLiteRecipeRepository(
+        db_path=str(tmp_path / "recipes.db"), pool_size=4, performance_profile=True
+    )
+    errors = []
+    writes_done = threading.Event()
+    
+    def writer():
+        try:
+            for _ in range(200):
+                repository.create_recipe(sample_recipe)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            writes_done.set()
+    
+    def reader(counts):
+        try:
+            while not writes_done.is_set():
+                repository.get_all_recipes()
+                counts.append(1)
+        except Exception as exc:
+            errors.append(exc)
+    
+    read_counts = [[], []]
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(counts,)) for counts in read_counts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    
+    assert errors == []
+    assert all(len(counts) > 0 for counts in read_counts)
+    assert len(repository.get_all_recipes()) == 203
+    repository.close()
+
+def test_search_recipes_full_text(client):
+    """Test full-text search across ingredients with ranking and limits"""
+    # Ingredient-only match
+    response = client.get("/recipes/search?q=pancetta")
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["title"] for r in results] == ["Spaghetti Carbonara"]
+    
+    # Title matches rank above ingredient matches
+    client.post("/recipes", json={**sample_recipe, "title": "Avocado Salad"})
+    response = client.get("/recipes/search?q=avocado")
+    titles = [r["title"] for r in response.json()]
+    assert set(titles) == {"Avocado Toast", "Avocado Salad"}
+    
+    client.post("/recipes", json={**sample_recipe, "ingredients": ["avocado"]})
+    response = client.get("/recipes/search?q=avocado")
+    titles = [r["title"] for r in response.json()]
+    assert titles[-1] == "Test Recipe"
+    
+    response = client.get("/recipes/search?q=avocado&limit=1")
+    assert len(response.json()) == 1
+    
+    response = client.get("/recipes/search?q=avocado&limit=0")
+    assert response.status_code == 422
+
+def test_search_index_stays_in_sync(client):
+    """Test that the search index follows updates and deletes"""
+    recipe_id = client.post("/recipes", json=sample_recipe).json()["id"]
+    client.put(f"/recipes/{recipe_id}", json=updated_recipe)
+    assert client.get("/recipes/search?q=ingredient1").json()[0]["id"] == recipe_id
+    
+    client.delete(f"/recipes/{recipe_id}")
+    assert client.get("/recipes/search?q=updated").json() == []
+
+def test_search_index_backfills_existing_database(tmp_path):
+    """Test that opening a database created before the FTS index backfills it"""
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE recipes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                ingredients TEXT NOT NULL,
+                steps TEXT NOT NULL,
+                prep_time TEXT NOT NULL,
+                cook_time TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                cuisine TEXT NOT NULL
+            )
+        """)
+        conn.execute(
+            "INSERT INTO recipes (title, ingredients, steps, prep_time, cook_time, difficulty, cuisine) "
+            "VALUES ('Legacy Lasagna', '[\"pasta\"]', '[\"Bake\"]', '1 hour', '1 hour', 'Hard', 'Italian')"
+        )
+    conn.close()
+    
+    repository = SQLiteRecipeRepository(db_path=db_path)
+    results = repository.search_recipes("lasag")
+    assert [r["title"] for r in results] == ["Legacy Lasagna"]
+    
+    # Parsed time columns are backfilled too
+    page, _ = repository.get_recipes_page(10, filters=RecipeFilter(min_total_minutes=120))
+    assert [r["title"] for r in page] == ["Legacy Lasagna"]
+    repository.close()
+
+@pytest.mark.parametrize("query", ["simmer", "italian", "chicken", "spag", "avocado toast", "pepper"])
+def test_search_backends_agree(query):
+    """Test both backends search the same columns: title and ingredients, not steps or cuisine"""
+    memory = MemoryRecipeRepository()
+    sqlite_repository = InMemorySQLiteRecipeRepository()
+    try:
+        found = [{r["id"] for r in repository.search_recipes(query)} for repository in (memory, sqlite_repository)]
+    finally:
+        sqlite_repository.close()
+    assert found[0] == found[1]
+
+def test_search_index_drops_steps_and_cuisine(tmp_path):
+    """Test that an index over the old four columns is rebuilt over title and ingredients"""
+    db_path = str(tmp_path / "recipes.db")
+    SQLiteRecipeRepository(db_path=db_path).close()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("""
+            DROP TRIGGER recipes_fts_insert;
+            DROP TRIGGER recipes_fts_delete;
+            DROP TRIGGER recipes_fts_update;
+            DROP TABLE recipes_fts;
+            CREATE VIRTUAL TABLE recipes_fts USING fts5(
+                title, ingredients, steps, cuisine, content = 'recipes', content_rowid = 'id'
+            );
+            INSERT INTO recipes_fts (recipes_fts) VALUES ('rebuild');
+        """)
+    conn.close()
+    
+    repository = SQLiteRecipeRepository(db_path=db_path)
+    try:
+        assert repository.search_recipes("simmer") == []
+        assert [r["title"] for r in repository.search_recipes("chicken")] == ["Chicken Tikka Masala"]
+    finally:
+        repository.close()
+
+def test_get_recipes_keyset_pagination(client):
+    """Test walking the catalog page by page with the next cursor"""
+    for _ in range(3):
+        client.post("/recipes", json=sample_recipe)
+    
+    seen = []
+    response = client.get("/recipes?limit=2")
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(recipe["id"] for recipe in page)
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            break
+        assert 'rel="next"' in response.headers["Link"]
+        response = client.get("/recipes", params={"limit": 2, "cursor": next_cursor})
+    
+    assert seen == sorted(seen)
+    assert len(seen) == 6
+    
+    response = client.get("/recipes?cursor=not-a-cursor")
+    assert response.status_code == 400
+    
+    # Well-formed but beyond SQLite's integer range
+    for after in (10 ** 30, -1):
+        response = client.get("/recipes", params={"cursor": encode_cursor(after)})
+        assert response.status_code == 400
+    
+    response = client.get("/recipes?limit=0")
+    assert response.status_code == 422
+
+def test_memory_repository_pagination():
+    """Test keyset pagination in the in-memory repository"""
+    repository = MemoryRecipeRepository()
+    page, next_cursor = repository.get_recipes_page(2)
+    assert [recipe["id"] for recipe in page] == [1, 2]
+    
+    repository.delete_recipe(3)
+    repository.create_recipe(sample_recipe)
+    page, next_cursor = repository.get_recipes_page(2, next_cursor)
+    assert [recipe["id"] for recipe in page] == [4]
+    assert next_cursor is None
+
+def test_export_recipes_ndjson(client):
+    """Test streaming the catalog as NDJSON"""
+    client.post("/recipes", json=sample_recipe)
+    
+    response = client.get("/recipes/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    recipes = [json.loads(line) for line in lines]
+    assert [recipe["id"] for recipe in recipes] == [1, 2, 3, 4]
+    assert recipes[3]["ingredients"] == sample_recipe["ingredients"]
+
+def test_sqlite_iter_recipes_in_batches(tmp_path):
+    """Test that iter_recipes yields every row across batches without holding a connection between them"""
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"))
+    for _ in range(4):
+        repository.create_recipe(sample_recipe)
+    
+    ids = [recipe["id"] for recipe in repository.iter_recipes(batch_size=2)]
+    assert ids == list(range(1, 8))
+    assert repository.get_pool_stats()["idle"] == 1
+    repository.close()
+    
+    # A paused iterator must not hold the in-memory connection's lock
+    repository = InMemorySQLiteRecipeRepository()
+    paused = repository.iter_recipes(batch_size=2)
+    assert next(paused)["id"] == 1
+    other_thread = threading.Thread(target=lambda: repository.create_recipe(sample_recipe), daemon=True)
+    other_thread.start()
+    other_thread.join(timeout=5)
+    assert not other_thread.is_alive()
+    assert [recipe["id"] for recipe in paused][-1] == 4
+    repository.close()
+
+def test_bulk_create_recipes_json_array(client):
+    """Test bulk import from a JSON array with per-item errors"""
+    payload = [sample_recipe, {"title": "Missing fields"}, updated_recipe]
+    response = client.post("/recipes/bulk", json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["ids"] == [4, 5]
+    assert [error["index"] for error in result["errors"]] == [1]
+    
+    assert client.get("/recipes/5").json()["title"] == updated_recipe["title"]
+    
+    response = client.post("/recipes/bulk", json={"not": "a list"})
+    assert response.status_code == 400
+
+def test_bulk_create_recipes_ndjson(client):
+    """Test bulk import from a streamed NDJSON body"""
+    body = "\n".join([json.dumps(sample_recipe), "{not json", "", json.dumps(updated_recipe)]) + "\n"
+    response = client.post(
+        "/recipes/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["errors"] == [{"index": 1, "detail": "Invalid JSON"}]
+    titles = [client.get(f"/recipes/{recipe_id}").json()["title"] for recipe_id in result["ids"]]
+    assert titles == [sample_recipe["title"], updated_recipe["title"]]
+
+def test_sqlite_create_recipes_bulk_batches(tmp_path):
+    """Test that bulk inserts across several batches return the right ids"""
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"))
+    repository.delete_recipe(3)
+    recipes = [{**sample_recipe, "title": f"Bulk {n}"} for n in range(5)]
+    
+    recipe_ids = repository.create_recipes_bulk(recipes, batch_size=2)
+    assert recipe_ids == [4, 5, 6, 7, 8]
+    assert [repository.get_recipe_by_id(recipe_id)["title"] for recipe_id in recipe_ids] == [
+        f"Bulk {n}" for n in range(5)
+    ]
+    assert repository.search_recipes("bulk", limit=10)
+    repository.close()
+
+class FakeRedis:
+    """Minimal stand-in for a redis-py client"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, name):
+        return self.data.get(name)
+    
+    def set(self, name, value, ex=None):
+        self.data[name] = value.encode() if isinstance(value, str) else value
+    
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+    
+    def scan_iter(self, match=None):
+        prefix = match.rstrip("*") if match else ""
+        return [name for name in list(self.data) if name.startswith(prefix)]
+
+def test_lru_cache_bounds_and_ttl():
+    """Test LRU eviction order and TTL expiry"""
+    cache = LRUCache(max_size=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    
+    expiring = LRUCache(max_size=2, ttl=0.01)
+    expiring.set("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+    assert expiring.stats()["expirations"] == 1
+
+@pytest.mark.parametrize("cache_factory", [
+    lambda: LRUCache(max_size=100),
+    lambda: RedisCache(FakeRedis())
+])
+def test_recipe_service_cache_invalidation(cache_factory):
+    """Test read-through caching and precise invalidation on writes"""
+    repository = InMemorySQLiteRecipeRepository()
+    service = RecipeService(repository, cache_factory())
+    
+    assert service.get_recipe_by_id(1)["title"] == "Spaghetti Carbonara"
+    assert service.get_recipe_by_id(1)["title"] == "Spaghetti Carbonara"
+    assert len(service.search_recipes("Chicken")) == 1
+    assert len(service.search_recipes("  chicken ")) == 1
+    assert service.get_cache_stats()["hits"] >= 2
+    
+    # Writes that bypass the service are not seen until invalidated
+    repository.delete_recipe(2)
+    assert len(service.search_recipes("chicken")) == 1
+    
+    service.update_recipe(1, RecipeCreate(**updated_recipe))
+    assert service.get_recipe_by_id(1)["title"] == updated_recipe["title"]
+    assert service.search_recipes("chicken") == []
+    
+    created = service.create_recipe(RecipeCreate(**{**sample_recipe, "title": "Chicken Soup"}))
+    assert [recipe["id"] for recipe in service.search_recipes("chicken")] == [created["id"]]
+    
+    service.delete_recipe(created["id"])
+    assert service.get_recipe_by_id(created["id"]) is None
+    assert service.search_recipes("chicken") == []
+
+def test_sync_and_async_services_share_cache():
+    """Test both services build the same keys, so each sees the other's entries and invalidations"""
+    repository = InMemorySQLiteRecipeRepository()
+    cache = LRUCache(max_size=100)
+    service = RecipeService(repository, cache)
+    async_service = AsyncRecipeService(as_async_repository(repository), cache)
+    
+    async def scenario():
+        assert service.get_recipe_by_id(1)["title"] == "Spaghetti Carbonara"
+        assert len(service.search_recipes("chicken")) == 1
+        hits = cache.stats()["hits"]
+        assert (await async_service.get_recipe_by_id(1))["title"] == "Spaghetti Carbonara"
+        assert len(await async_service.search_recipes(" Chicken ")) == 1
+        assert cache.stats()["hits"] >= hits + 2
+        
+        await async_service.update_recipe(1, RecipeCreate(**updated_recipe))
+        assert service.get_recipe_by_id(1)["title"] == updated_recipe["title"]
+        service.delete_recipe(2)
+        assert await async_service.search_recipes("chicken") == []
+    
+    asyncio.run(scenario())
+
+def test_recipe_cache_ignores_loads_overlapping_writes():
+    """Test a value loaded before an update is not cached after the update invalidated it"""
+    class SlowReadRepository(InMemorySQLiteRecipeRepository):
+        during_read = None
+        
+        def get_recipe_by_id(self, recipe_id, fields=None):
+            recipe = super().get_recipe_by_id(recipe_id, fields)
+            self._overlap()
+            return recipe
+        
+        def get_recipe_document(self, recipe_id):
+            document = super().get_recipe_document(recipe_id)
+            self._overlap()
+            return document
+        
+        def _overlap(self):
+            during_read, self.during_read = self.during_read, None
+            if during_read is not None:
+                during_read()
+    
+    repository = SlowReadRepository()
+    service = RecipeService(repository, LRUCache(max_size=100))
+    
+    repository.during_read = lambda: service.update_recipe(1, RecipeCreate(**updated_recipe))
+    assert service.get_recipe_by_id(1)["title"] == "Spaghetti Carbonara"
+    assert service.get_recipe_by_id(1)["title"] == updated_recipe["title"]
+    
+    repository.during_read = lambda: service.delete_recipe(1)
+    assert service.get_recipe_document(1) is not None
+    assert service.get_recipe_document(1) is None
+    assert service.get_recipe_by_id(1, ["title"]) is None
+
+def test_cache_stats_in_diagnostics(client):
+    """Test that cache counters are exposed when caching is enabled"""
+    cache = LRUCache(max_size=10)
+    app.dependency_overrides[get_recipe_cache] = lambda: cache
+    
+    client.get("/recipes/1")
+    client.get("/recipes/1")
+    stats = client.get("/diagnostics").json()["cache"]
+    # The recipe's generation token and the recipe itself
+    assert stats["hits"] == 2
+    assert stats["size"] >= 1
+
+def test_recipe_etag_conditional_get(client):
+    """Test strong ETags and 304 responses on GET /recipes/{id}"""
+    response = client.get("/recipes/1")
+    etag = response.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    
+    response = client.get("/recipes/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    
+    client.put("/recipes/1", json=updated_recipe)
+    response = client.get("/recipes/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    
+    # Changes to other recipes keep this recipe's ETag
+    etag = response.headers["ETag"]
+    client.put("/recipes/2", json=updated_recipe)
+    assert client.get("/recipes/1", headers={"If-None-Match": etag}).status_code == 304
+
+def test_recipe_list_etag_changes_on_mutation(client):
+    """Test that the catalog ETag changes on every create, update and delete"""
+    etag = client.get("/recipes").headers["ETag"]
+    assert client.get("/recipes", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/recipes?limit=1").headers["ETag"] != etag
+    
+    recipe_id = client.post("/recipes", json=sample_recipe).json()["id"]
+    seen = {etag}
+    for mutate in (
+        lambda: client.put(f"/recipes/{recipe_id}", json=updated_recipe),
+        lambda: client.delete(f"/recipes/{recipe_id}")
+    ):
+        response = client.get("/recipes", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag not in seen
+        seen.add(etag)
+        mutate()
+
+def test_memory_repository_versions():
+    """Test per-recipe and catalog versions in the in-memory repository"""
+    repository = MemoryRecipeRepository()
+    catalog_version = repository.get_catalog_version()
+    recipe_version = repository.get_recipe_version(1)
+    
+    repository.update_recipe(1, sample_recipe)
+    assert repository.get_recipe_version(1) > recipe_version
+    assert repository.get_catalog_version() > catalog_version
+    
+    repository.delete_recipe(1)
+    assert repository.get_recipe_version(1) is None
+
+def test_memory_repository_indexes_follow_mutations():
+    """Test id, cuisine/difficulty and token indexes in the in-memory repository"""
+    repository = MemoryRecipeRepository()
+    assert [r["title"] for r in repository.search_recipes("pancet")] == ["Spaghetti Carbonara"]
+    assert [r["id"] for r in repository.find_recipes(cuisine="italian")] == [1]
+    
+    repository.update_recipe(1, {**sample_recipe, "cuisine": "Indian", "difficulty": "Hard"})
+    assert repository.search_recipes("pancetta") == []
+    assert [r["id"] for r in repository.search_recipes("ingredient1")] == [1]
+    assert [r["id"] for r in repository.find_recipes(cuisine="Indian", difficulty="hard")] == [1, 2]
+    
+    # Title matches rank ahead of ingredient-only matches
+    repository.create_recipe({**sample_recipe, "title": "Avocado Salad"})
+    repository.create_recipe({**sample_recipe, "ingredients": ["avocado"]})
+    assert [r["title"] for r in repository.search_recipes("avocado", limit=2)] == [
+        "Avocado Toast", "Avocado Salad"
+    ]
+    
+    assert repository.delete_recipe(1)
+    assert repository.get_recipe_by_id(1) is None
+    assert [r["id"] for r in repository.search_recipes("ingredient1")] == [4]
+    assert repository.find_recipes(cuisine="Indian")[0]["id"] == 2
+
+def test_memory_repository_concurrent_writes():
+    """Test that concurrent creates from many threads keep ids and indexes consistent"""
+    repository = MemoryRecipeRepository()
+    
+    def create_many():
+        for _ in range(100):
+            repository.create_recipe(sample_recipe)
+    
+    threads = [threading.Thread(target=create_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(repository.get_all_recipes()) == 403
+    assert len(repository.search_recipes("ingredient1")) == 400
+    assert len(repository.find_recipes(cuisine="Test")) == 400
+
+def test_search_by_ingredients(repository):
+    """Test include/exclude ingredient search and coverage ranking in both backends"""
+    omelette = repository.create_recipe({**sample_recipe, "title": "Omelette", "ingredients": ["Eggs", " salt "]})
+    
+    def titles(*args, **kwargs):
+        return [r["title"] for r in repository.search_by_ingredients(*args, **kwargs)]
+    
+    assert titles(["eggs"]) == ["Omelette", "Spaghetti Carbonara"]
+    assert titles(["eggs", "salt"]) == ["Omelette"]
+    assert titles(["eggs", "salt"], match_all=False) == [
+        "Omelette", "Spaghetti Carbonara", "Avocado Toast"
+    ]
+    # Equal matches rank by coverage: 1 of 4 ingredients beats 1 of 5
+    assert titles(["salt", "yogurt"], match_all=False)[1:] == ["Chicken Tikka Masala", "Avocado Toast"]
+    assert titles(["eggs", "salt"], exclude=["pancetta"], match_all=False) == ["Omelette", "Avocado Toast"]
+    assert titles(["eggs"], limit=1) == ["Omelette"]
+    assert titles([" "]) == []
+    
+    repository.update_recipe(omelette["id"], {**sample_recipe, "ingredients": ["tofu"]})
+    assert titles(["eggs"]) == ["Spaghetti Carbonara"]
+    repository.delete_recipe(omelette["id"])
+    assert titles(["tofu"]) == []
+
+def test_search_by_ingredients_endpoint(client):
+    """Test the by-ingredients endpoint with list parameters and modes"""
+    response = client.get("/recipes/search/by-ingredients?include=lemon,bread&include=salt")
+    assert response.status_code == 200
+    assert [r["title"] for r in response.json()] == ["Avocado Toast"]
+    
+    response = client.get("/recipes/search/by-ingredients?include=chicken,eggs&mode=any&exclude=yogurt")
+    assert [r["title"] for r in response.json()] == ["Spaghetti Carbonara"]
+    
+    assert client.get("/recipes/search/by-ingredients").json() == []
+    assert client.get("/recipes/search/by-ingredients?include=eggs&mode=some").status_code == 422
+
+@pytest.mark.parametrize("text, minutes", [
+    ("10 minutes", 10),
+    ("1 hour 30 minutes", 90),
+    ("1h30m", 90),
+    ("1.5 hrs", 90),
+    ("45", 45),
+    ("10-15 min", 15),
+    ("Overnight", None),
+])
+def test_parse_minutes(text, minutes):
+    """Test parsing free-text durations into minutes"""
+    assert parse_minutes(text) == minutes
+
+def test_filter_recipes(repository):
+    """Test equality and time-range filters in both backends"""
+    slow = repository.create_recipe({**sample_recipe, "cuisine": "Italian", "cookTime": "2 hours"})
+    repository.create_recipe({**sample_recipe, "cuisine": "Italian", "cookTime": "a while"})
+    
+    def ids(**kwargs):
+        return [r["id"] for r in repository.get_recipes_page(100, filters=RecipeFilter(**kwargs))[0]]
+    
+    assert ids(cuisine="italian") == [1, 4, 5]
+    assert ids(cuisine="Italian", difficulty="medium") == [1]
+    assert ids(max_total_minutes=30) == [1, 3]
+    assert ids(min_total_minutes=55, max_total_minutes=55) == [2]
+    assert ids(cuisine="Italian", min_total_minutes=60) == [4]
+    assert ids(max_prep_minutes=10, min_cook_minutes=10) == [1]
+    
+    page, next_cursor = repository.get_recipes_page(1, filters=RecipeFilter(cuisine="Italian"))
+    assert [r["id"] for r in page] == [1]
+    page, _ = repository.get_recipes_page(1, next_cursor, RecipeFilter(cuisine="Italian"))
+    assert [r["id"] for r in page] == [slow["id"]]
+    
+    repository.update_recipe(slow["id"], {**sample_recipe, "cuisine": "Italian", "cookTime": "5 minutes"})
+    assert ids(cuisine="Italian", max_total_minutes=30) == [1, 4]
+    repository.delete_recipe(1)
+    assert ids(max_total_minutes=30) == [3, 4]
+
+def test_get_recipes_with_filters(client):
+    """Test filter query parameters on GET /recipes"""
+    response = client.get("/recipes?cuisine=indian&max_total_minutes=60")
+    assert [r["title"] for r in response.json()] == ["Chicken Tikka Masala"]
+    
+    all_etag = client.get("/recipes").headers["ETag"]
+    assert response.headers["ETag"] != all_etag
+    
+    assert client.get("/recipes?max_total_minutes=10").json()[0]["title"] == "Avocado Toast"
+    assert client.get("/recipes?max_total_minutes=-1").status_code == 422
+
+def test_facet_counts(repository):
+    """Test facet aggregates stay current across writes in both backends"""
+    facets = repository.get_facets()
+    assert facets["total"] == 3
+    assert facets["cuisine"] == {"American": 1, "Indian": 1, "Italian": 1}
+    assert facets["total_time"] == {"0-15": 1, "16-30": 1, "31-60": 1, "60+": 0, "unknown": 0}
+    
+    created = repository.create_recipe({**sample_recipe, "cookTime": "2 hours"})
+    repository.create_recipe({**sample_recipe, "cookTime": "a while"})
+    facets = repository.get_facets()
+    assert facets["total"] == 5
+    assert facets["cuisine"]["Test"] == 2
+    assert facets["difficulty"]["Easy"] == 3
+    assert facets["total_time"]["60+"] == 1
+    assert facets["total_time"]["unknown"] == 1
+    
+    repository.update_recipe(created["id"], {**sample_recipe, "cuisine": "Italian"})
+    repository.delete_recipe(3)
+    facets = repository.get_facets()
+    assert facets["cuisine"] == {"Italian": 2, "Indian": 1, "Test": 1}
+    assert facets["total_time"] == {"0-15": 0, "16-30": 1, "31-60": 2, "60+": 0, "unknown": 1}
+    
+    scoped = repository.get_facets("chicken")
+    assert scoped["total"] == 1
+    assert scoped["cuisine"] == {"Indian": 1}
+    scoped = repository.get_facets(filters=RecipeFilter(cuisine="italian"))
+    assert scoped["difficulty"] == {"Easy": 1, "Medium": 1}
+    assert repository.get_facets("nonexistent")["total"] == 0
+
+def test_get_recipe_facets(client):
+    """Test GET /recipes/facets with and without scoping"""
+    response = client.get("/recipes/facets")
+    assert response.status_code == 200
+    assert response.json()["total"] == 3
+    
+    client.post("/recipes", json=sample_recipe)
+    assert client.get("/recipes/facets").json()["cuisine"]["Test"] == 1
+    
+    scoped = client.get("/recipes/facets?q=chicken&max_total_minutes=60").json()
+    assert scoped["cuisine"] == {"Indian": 1}
+    assert client.get("/recipes/facets?min_total_minutes=-1").status_code == 422
+
+def test_async_repository(repository):
+    """Test the async repository views over both backends"""
+    repository = as_async_repository(repository)
+    
+    async def scenario():
+        created = await repository.create_recipe(sample_recipe)
+        assert (await repository.get_recipe_by_id(created["id"]))["title"] == "Test Recipe"
+        ids = await repository.create_recipes_bulk({**sample_recipe, "title": f"Bulk {i}"} for i in range(3))
+        assert len(ids) == 3
+        
+        # Concurrent reads all complete, whether inline or on the DB executor
+        found = await asyncio.gather(*(repository.get_recipe_by_id(recipe_id) for recipe_id in ids))
+        assert [recipe["title"] for recipe in found] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+        
+        exported = [recipe["id"] async for recipe in repository.iter_recipes(batch_size=2)]
+        assert exported == [1, 2, 3, created["id"], *ids]
+        
+        assert (await repository.update_recipe(ids[0], updated_recipe))["title"] == "Updated Test Recipe"
+        assert await repository.delete_recipe(ids[1]) is True
+        assert (await repository.get_facets())["total"] == 6
+        assert (await repository.search_recipes("updated"))[0]["id"] == ids[0]
+    
+    asyncio.run(scenario())
+    if hasattr(repository, "close"):
+        repository.close()
+
+def test_single_flight_coalesces_threads():
+    """Test concurrent identical sync reads share one execution"""
+    flights = SingleFlight()
+    release = threading.Event()
+    executions = []
+    
+    def load():
+        executions.append(1)
+        release.wait(5)
+        return {"id": 1}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("recipe:1", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while flights.stats()["calls"] < 8:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(executions) == 1
+    assert results == [{"id": 1}] * 8
+    assert flights.stats() == {"calls": 8, "executions": 1, "coalesced": 7, "in_flight": 0}
+    
+    # Errors reach the caller and nothing is remembered afterwards
+    with pytest.raises(ValueError):
+        flights.do("recipe:1", lambda: int("x"))
+    assert flights.do("recipe:1", lambda: "fresh") == "fresh"
+
+def test_async_single_flight_coalesces_and_survives_cancellation():
+    """Test async coalescing, and that one cancelled waiter does not cancel the rest"""
+    flights = AsyncSingleFlight()
+    executions = []
+    
+    async def load():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+    
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("search:chicken", load))
+        others = [asyncio.ensure_future(flights.do("search:chicken", load)) for _ in range(4)]
+        await asyncio.sleep(0)
+        first.cancel()
+        results = await asyncio.gather(*others)
+        assert results == [[1, 2, 3]] * 4
+        assert await flights.do("search:chicken", load) == [1, 2, 3]
+    
+    asyncio.run(scenario())
+    assert len(executions) == 2
+    assert flights.stats() == {"calls": 6, "executions": 2, "coalesced": 4, "in_flight": 0}
+
+def test_recipe_service_coalesces_reads():
+    """Test RecipeService merges identical concurrent reads into one repository call"""
+    repository = MemoryRecipeRepository()
+    original = repository.search_recipes
+    calls = []
+    
+    def slow_search(query, limit=None, fields=None):
+        calls.append(query)
+        time.sleep(0.05)
+        return original(query, limit, fields)
+    
+    repository.search_recipes = slow_search
+    service = RecipeService(repository, flights=SingleFlight())
+    results = []
+    threads = [
+        threading.Thread(target=lambda q=q: results.append(service.search_recipes(q)))
+        for q in ["Chicken", "chicken ", "CHICKEN"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert [[r["id"] for r in result] for result in results] == [[2]] * 3
+    assert service.get_coalescing_stats()["coalesced"] == 2
+
+def test_recipe_documents_follow_writes(repository):
+    """Test pre-serialized documents match the decoded recipes after every write"""
+    created = repository.create_recipe({**sample_recipe, "title": "Crème brûlée"})
+    assert json.loads(repository.get_recipe_document(created["id"])) == created
+    
+    ids = repository.create_recipes_bulk([{**sample_recipe, "title": f"Bulk {i}"} for i in range(3)])
+    repository.update_recipe(ids[0], updated_recipe)
+    repository.delete_recipe(ids[1])
+    assert json.loads(repository.get_recipe_document(ids[0]))["title"] == "Updated Test Recipe"
+    assert repository.get_recipe_document(ids[1]) is None
+    
+    for filters in (None, RecipeFilter(cuisine="test")):
+        document, next_cursor = repository.get_recipes_page_document(2, filters=filters)
+        recipes, expected_cursor = repository.get_recipes_page(2, filters=filters)
+        assert json.loads(document) == recipes
+        assert next_cursor == expected_cursor
+        document, _ = repository.get_recipes_page_document(100, next_cursor, filters)
+        assert json.loads(document) == repository.get_recipes_page(100, next_cursor, filters)[0]
+
+def test_recipe_documents_backfilled(tmp_path):
+    """Test documents are built for existing rows when the table is first created"""
+    db_path = str(tmp_path / "recipes.db")
+    repository = SQLiteRecipeRepository(db_path=db_path)
+    created = repository.create_recipe({**sample_recipe, "title": "Crème brûlée"})
+    repository.close()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE recipe_documents")
+    
+    repository = SQLiteRecipeRepository(db_path=db_path)
+    assert json.loads(repository.get_recipe_document(created["id"])) == created
+    document, _ = repository.get_recipes_page_document(100)
+    assert json.loads(document) == repository.get_recipes_page(100)[0]
+    repository.close()
+
+@pytest.mark.parametrize("fast_path", ["1", "0"])
+def test_fast_json_responses(client, monkeypatch, fast_path):
+    """Test recipe and list responses match with and without the stored-document fast path"""
+    monkeypatch.setenv("RECIPE_JSON_FAST_PATH", fast_path)
+    get_settings.cache_clear()
+    try:
+        response = client.get("/recipes/1")
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["ETag"] == '"recipe-1-1"'
+        assert response.json()["title"] == "Spaghetti Carbonara"
+        
+        response = client.get("/recipes?limit=2")
+        assert [r["id"] for r in response.json()] == [1, 2]
+        assert "X-Next-Cursor" in response.headers
+        assert client.get("/recipes/999").status_code == 404
+    finally:
+        get_settings.cache_clear()
+
+def test_get_recipes_by_ids(repository, monkeypatch):
+    """Test batch lookup keeps request order, drops repeats and reports missing ids"""
+    monkeypatch.setattr("app.repositories.sqlite_repository.ID_LOOKUP_CHUNK_SIZE", 2)
+    repository.create_recipes_bulk([{**sample_recipe, "title": f"Bulk {i}"} for i in range(3)])
+    
+    recipes, missing = repository.get_recipes_by_ids([6, 99, 1, 4, 6, 42, 2])
+    assert [recipe["id"] for recipe in recipes] == [6, 1, 4, 2]
+    assert recipes[0]["title"] == "Bulk 2"
+    assert missing == [99, 42]
+    assert repository.get_recipes_by_ids([]) == ([], [])
+
+def test_get_recipes_batch_endpoint(client):
+    """Test GET and POST /recipes/batch"""
+    response = client.get("/recipes/batch?ids=3,1&ids=999")
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()["recipes"]] == [3, 1]
+    assert response.json()["missing"] == [999]
+    
+    assert client.get("/recipes/batch?ids=1,x").status_code == 400
+    assert client.get(f"/recipes/batch?ids=1,{2 ** 63}").status_code == 400
+    assert client.get("/recipes/batch?ids=0").status_code == 400
+    assert client.post("/recipes/batch", json={"ids": [1, 10 ** 30]}).status_code == 422
+    assert client.post("/recipes/batch", json={"ids": [-1]}).status_code == 422
+    assert client.get(f"/recipes/{2 ** 63}").status_code == 422
+    assert client.delete(f"/recipes/{2 ** 63}").status_code == 422
+    assert client.get(f"/recipes/{2 ** 63 - 1}").status_code == 404
+    too_many = ",".join(str(i) for i in range(201))
+    assert client.get(f"/recipes/batch?ids={too_many}").status_code == 400
+    
+    response = client.post("/recipes/batch", json={"ids": list(range(1, 301))})
+    assert [r["id"] for r in response.json()["recipes"]] == [1, 2, 3]
+    assert len(response.json()["missing"]) == 297
+    assert client.post("/recipes/batch", json={"ids": list(range(1001))}).status_code == 422
+
+def test_field_projection(repository):
+    """Test fields= selections in both backends"""
+    fields = ["title", "cuisine"]
+    assert repository.get_recipe_by_id(2, fields) == {"id": 2, "title": "Chicken Tikka Masala", "cuisine": "Indian"}
+    assert repository.get_recipe_by_id(999, fields) is None
+    
+    page, next_cursor = repository.get_recipes_page(2, fields=["steps"])
+    assert [set(recipe) for recipe in page] == [{"id", "steps"}] * 2
+    assert page[0]["steps"] == repository.get_recipe_by_id(1)["steps"]
+    assert next_cursor is not None
+    
+    results = repository.search_recipes("chicken", fields=["prepTime", "ingredients"])
+    assert list(results[0]) == ["id", "ingredients", "prepTime"]
+    
+    # Selecting every field is the same as selecting none
+    assert repository.get_recipe_by_id(1, list(RECIPE_FIELDS)) == repository.get_recipe_by_id(1)
+    with pytest.raises(InvalidFieldsError):
+        repository.get_recipe_by_id(1, ["title", "calories"])
+
+def test_fields_query_parameter(client):
+    """Test fields= on the list, search and single-recipe endpoints"""
+    response = client.get("/recipes?fields=title,difficulty&limit=1")
+    assert response.json() == [{"id": 1, "title": "Spaghetti Carbonara", "difficulty": "Medium"}]
+    
+    response = client.get("/recipes/search?q=chicken&fields=title")
+    assert response.json() == [{"id": 2, "title": "Chicken Tikka Masala"}]
+    
+    full = client.get("/recipes/1")
+    partial = client.get("/recipes/1?fields=cuisine")
+    assert partial.json() == {"id": 1, "cuisine": "Italian"}
+    assert partial.headers["ETag"] != full.headers["ETag"]
+    assert client.get("/recipes/1?fields=cuisine", headers={"If-None-Match": partial.headers["ETag"]}).status_code == 304
+    
+    response = client.get("/recipes?fields=calories")
+    assert response.status_code == 400
+    assert "calories" in response.json()["detail"]
+
+def test_metrics_registry_renders_prometheus_text():
+    """Test counter and cumulative histogram output in the text format"""
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs run", ("queue",))
+    histogram = registry.histogram("job_seconds", "Job time", ("queue",), buckets=(0.1, 1.0))
+    counter.inc(("a",))
+    counter.inc(("a",), 2)
+    histogram.observe(("a",), 0.05)
+    histogram.observe(("a",), 0.5)
+    histogram.observe(("a",), 5)
+    
+    lines = registry.render().splitlines()
+    assert "# TYPE jobs_total counter" in lines
+    assert 'jobs_total{queue="a"} 3' in lines
+    assert 'job_seconds_bucket{queue="a",le="0.1"} 1' in lines
+    assert 'job_seconds_bucket{queue="a",le="1"} 2' in lines
+    assert 'job_seconds_bucket{queue="a",le="+Inf"} 3' in lines
+    assert 'job_seconds_count{queue="a"} 3' in lines
+    with pytest.raises(ValueError):
+        registry.counter("jobs_total", "Duplicate")
+
+def test_instrument_repository(repository):
+    """Test per-method timings and returned-row counts for both backends"""
+    repository_class = type(repository)
+    instrument_repository(repository, backend="test")
+    labels = ("search_recipes", "test")
+    timed_before = REPOSITORY_OPERATION_SECONDS.count(labels)
+    rows_before = REPOSITORY_ROWS_RETURNED.value(labels)
+    
+    assert len(repository.search_recipes("chicken")) == 1
+    assert REPOSITORY_OPERATION_SECONDS.count(labels) == timed_before + 1
+    assert REPOSITORY_ROWS_RETURNED.value(labels) == rows_before + 1
+    # Instrumenting again must not double count
+    instrument_repository(repository, backend="test")
+    repository.search_recipes("chicken")
+    assert REPOSITORY_OPERATION_SECONDS.count(labels) == timed_before + 2
+    assert isinstance(repository, repository_class)
+
+def test_instrument_tiered_point_reads():
+    """Test async point reads of the tiered backend are timed as hits or loads, and sync ones once"""
+    repository = instrument_repository(TieredRecipeRepository(InMemorySQLiteRecipeRepository(), capacity=2), backend="tiered-test")
+    async_repository = as_async_repository(repository)
+    hits = ("get_recipe_by_id", "tiered-test")
+    loads = ("load_recipe", "tiered-test")
+    hits_before = REPOSITORY_OPERATION_SECONDS.count(hits)
+    loads_before = REPOSITORY_OPERATION_SECONDS.count(loads)
+    
+    async def read():
+        return [await async_repository.get_recipe_by_id(1) for _ in range(2)]
+    
+    try:
+        first, second = asyncio.run(read())
+        assert first == second and first["title"] == "Spaghetti Carbonara"
+        assert REPOSITORY_OPERATION_SECONDS.count(loads) == loads_before + 1
+        assert REPOSITORY_OPERATION_SECONDS.count(hits) == hits_before + 1
+        
+        # The sync read times itself; its nested tier calls are not counted again
+        assert repository.get_recipe_by_id(2)["title"] == "Chicken Tikka Masala"
+        assert REPOSITORY_OPERATION_SECONDS.count(hits) == hits_before + 2
+        assert REPOSITORY_OPERATION_SECONDS.count(loads) == loads_before + 1
+    finally:
+        async_repository.close()
+        repository.close()
+
+def test_sqlite_metrics_count_vm_steps_and_checkouts(tmp_path):
+    """Test scan work attribution and pool checkout timing for file databases"""
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "metrics.db"), pool_size=2)
+    repository.create_recipes_bulk([{**sample_recipe, "title": f"Recipe {i}"} for i in range(300)])
+    instrument_repository(repository, backend="sqlite")
+    steps_before = SQLITE_VM_STEPS.value(("get_all_recipes",))
+    
+    assert len(repository.get_all_recipes()) == 303
+    assert SQLITE_VM_STEPS.value(("get_all_recipes",)) > steps_before
+    assert "recipe_db_checkout_duration_seconds_count" in METRICS.render()
+    repository.close()
+
+def test_metrics_endpoint(monkeypatch):
+    """Test the /metrics endpoint and per-route request histograms when enabled"""
+    monkeypatch.setenv("RECIPE_METRICS_ENABLED", "1")
+    get_settings.cache_clear()
+    try:
+        metrics_app = create_app()
+        repository = instrument_repository(InMemorySQLiteRecipeRepository(), backend="sqlite")
+        metrics_app.dependency_overrides[get_recipe_repository] = lambda: repository
+        ok_before = HTTP_REQUEST_SECONDS.count(("GET", "/recipes/{id}", "200"))
+        with TestClient(metrics_app) as metrics_client:
+            assert metrics_client.get("/recipes/1").status_code == 200
+            assert metrics_client.get("/recipes/999").status_code == 404
+            response = metrics_client.get("/metrics")
+    finally:
+        METRICS.enabled = False
+        get_settings.cache_clear()
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert HTTP_REQUEST_SECONDS.count(("GET", "/recipes/{id}", "200")) == ok_before + 1
+    assert 'route="/recipes/{id}",status="404"' in response.text
+    assert 'recipe_repository_operation_duration_seconds_count{method="get_recipe_version",backend="sqlite"}' in response.text
+    # Disabled apps do not expose the endpoint
+    assert TestClient(app).get("/metrics").status_code == 404
+
+def test_request_profiling(monkeypatch):
+    """Test opt-in profiling of a single request, guarded by the configured token"""
+    monkeypatch.setenv("RECIPE_PROFILING_ENABLED", "1")
+    monkeypatch.setenv("RECIPE_PROFILING_TOKEN", "s3cret")
+    get_settings.cache_clear()
+    try:
+        profiling_app = create_app()
+        repository = InMemorySQLiteRecipeRepository()
+        profiling_app.dependency_overrides[get_recipe_repository] = lambda: repository
+        with TestClient(profiling_app) as profiling_client:
+            plain = profiling_client.get("/recipes/search?q=chicken")
+            wrong_token = profiling_client.get("/recipes/search?q=chicken", headers={"X-Profile": "guess"})
+            profiled = profiling_client.get("/recipes/search?q=chicken", headers={"X-Profile": "s3cret"})
+            forbidden = profiling_client.get("/profiles")
+            report = profiling_client.get(
+                f"/profiles/{profiled.headers['X-Profile-Id']}", headers={"X-Profile": "s3cret"}
+            ).json()
+            listed = profiling_client.get("/profiles", headers={"X-Profile": "s3cret"}).json()
+    finally:
+        get_settings.cache_clear()
+    
+    assert "X-Profile-Id" not in plain.headers
+    assert "X-Profile-Id" not in wrong_token.headers
+    assert profiled.json() == plain.json()
+    assert "sql;dur=" in profiled.headers["Server-Timing"]
+    assert forbidden.status_code == 403
+    
+    assert report["path"] == "/recipes/search" and report["status"] == 200
+    searches = [statement for statement in report["sql"]["log"] if "recipes_fts" in statement["sql"]]
+    assert searches and searches[0]["rows"] == 1
+    # Repository calls on the DB worker thread are merged into the cProfile output
+    assert "search_recipes" in report["profile"]
+    assert report["id"] in [summary["id"] for summary in listed]
+
+def test_profiling_requires_token(monkeypatch):
+    """Test an app with profiling enabled but no token refuses to start"""
+    monkeypatch.setenv("RECIPE_PROFILING_ENABLED", "1")
+    monkeypatch.delenv("RECIPE_PROFILING_TOKEN", raising=False)
+    get_settings.cache_clear()
+    try:
+        with pytest.raises(ValueError):
+            create_app()
+    finally:
+        get_settings.cache_clear()
+
+def test_overlapping_profiled_requests(monkeypatch):
+    """Test overlapping profiled requests all succeed, profiling one at a time"""
+    class ExclusiveProfile(cProfile.Profile):
+        """Fails like cProfile on Python 3.12 when another profiler is active"""
+        active = None
+        
+        def enable(self, *args, **kwargs):
+            if ExclusiveProfile.active is not None:
+                raise ValueError("Another profiling tool is already active")
+            ExclusiveProfile.active = self
+            super().enable(*args, **kwargs)
+        
+        def disable(self):
+            super().disable()
+            ExclusiveProfile.active = None
+    
+    monkeypatch.setattr(cProfile, "Profile", ExclusiveProfile)
+    monkeypatch.setenv("RECIPE_PROFILING_ENABLED", "1")
+    monkeypatch.setenv("RECIPE_PROFILING_TOKEN", "s3cret")
+    get_settings.cache_clear()
+    try:
+        profiling_app = create_app()
+        repository = InMemorySQLiteRecipeRepository()
+        profiling_app.dependency_overrides[get_recipe_repository] = lambda: repository
+        
+        async def send_requests():
+            transport = httpx.ASGITransport(app=profiling_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                overlapping = await asyncio.gather(*(
+                    async_client.get(f"/recipes/search?q=chicken&n={i}", headers={"X-Profile": "s3cret"})
+                    for i in range(20)
+                ))
+                after = await async_client.get("/recipes/1", headers={"X-Profile": "s3cret"})
+            return overlapping, after
+        
+        overlapping, after = asyncio.run(send_requests())
+    finally:
+        get_settings.cache_clear()
+    
+    assert [response.status_code for response in overlapping] == [200] * 20
+    profiled = [response for response in overlapping if "X-Profile-Id" in response.headers]
+    assert 1 <= len(profiled) < 20
+    assert all(response.json() == overlapping[0].json() for response in overlapping)
+    # The lock is released once the profiled request finishes
+    assert after.status_code == 200 and "X-Profile-Id" in after.headers
+
+def test_fuzzy_search_recipes(repository):
+    """Test typo-tolerant search and that its vocabulary follows writes in both backends"""
+    
+    def titles(query, **kwargs):
+        return [r["title"] for r in repository.fuzzy_search_recipes(query, **kwargs)]
+    
+    assert titles("carbonarra") == ["Spaghetti Carbonara"]
+    assert titles("tikka masalla") == ["Chicken Tikka Masala"]
+    assert titles("chiken avocdo")[0] in ("Chicken Tikka Masala", "Avocado Toast")
+    assert titles("xyzzy") == []
+    assert titles("  ") == []
+    assert repository.fuzzy_search_recipes("avocdo", fields=["title"]) == [{"id": 3, "title": "Avocado Toast"}]
+    
+    ratatouille = repository.create_recipe({**sample_recipe, "title": "Ratatouille", "ingredients": ["Aubergine"]})
+    assert titles("ratatouile") == ["Ratatouille"]
+    assert titles("aubergin") == ["Ratatouille"]
+    repository.delete_recipe(ratatouille["id"])
+    assert titles("ratatouile") == []
+
+def test_fuzzy_search_endpoint(client):
+    """Test the fuzzy search endpoint"""
+    response = client.get("/recipes/search/fuzzy?q=spagetti&fields=title")
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "title": "Spaghetti Carbonara"}]
+    assert client.get("/recipes/search/fuzzy").json() == []
+
+def test_get_similar_recipes(repository):
+    """Test similar-recipe ranking and that the index follows writes in both backends"""
+    aglio = repository.create_recipe({
+        **sample_recipe,
+        "title": "Spaghetti Aglio e Olio",
+        "ingredients": ["Spaghetti", "garlic", "parmesan", "black pepper"],
+        "cuisine": "Italian"
+    })
+    
+    def similar_ids(recipe_id, k=10):
+        return [r["id"] for r in repository.get_similar_recipes(recipe_id, k)]
+    
+    # Shares three ingredients and the cuisine with the carbonara, nothing with the others
+    assert similar_ids(1) == [aglio["id"]]
+    assert similar_ids(aglio["id"]) == [1]
+    assert repository.get_similar_recipes(1, fields=["title"]) == [{"id": aglio["id"], "title": "Spaghetti Aglio e Olio"}]
+    assert repository.get_similar_recipes(999) is None
+    
+    toast = repository.create_recipe({**sample_recipe, "title": "Bruschetta", "ingredients": ["bread", "salt", "tomato"]})
+    assert similar_ids(3) == [toast["id"]]
+    repository.update_recipe(aglio["id"], {**sample_recipe, "ingredients": ["rice"]})
+    assert similar_ids(1) == []
+    repository.delete_recipe(toast["id"])
+    assert similar_ids(3) == []
+
+def test_similar_recipes_endpoint(client):
+    """Test the similar recipes endpoint"""
+    created = client.post("/recipes", json={**sample_recipe, "ingredients": ["chicken", "yogurt", "rice"]}).json()
+    response = client.get("/recipes/2/similar?k=5&fields=title")
+    assert response.status_code == 200
+    assert response.json() == [{"id": created["id"], "title": sample_recipe["title"]}]
+    assert client.get("/recipes/999/similar").status_code == 404
+    assert client.get("/recipes/2/similar?k=0").status_code == 422
+
+def test_memory_records_are_shared_read_only_views():
+    """Test the memory backend hands out its compact records without copying them"""
+    repository = MemoryRecipeRepository()
+    created = repository.create_recipe({**sample_recipe, "ingredients": ["Eggs", "salt"], "steps": ["Whisk", "Fry"]})
+    recipe = repository.get_recipe_by_id(created["id"])
+    assert recipe is created
+    assert recipe == {"id": created["id"], **sample_recipe, "ingredients": ["Eggs", "salt"], "steps": ["Whisk", "Fry"]}
+    assert json.loads(json.dumps(recipe, default=dict)) == recipe
+    
+    with pytest.raises(TypeError):
+        recipe["title"] = "Changed"
+    recipe["ingredients"].append("butter")
+    assert repository.get_recipe_by_id(created["id"])["ingredients"] == ["Eggs", "salt"]
+    
+    # Ingredient names are stored once however many recipes use them
+    other = repository.create_recipe({**sample_recipe, "ingredients": ["salt", "Eggs"]})
+    assert sorted(other.ingredient_ids) == sorted(recipe.ingredient_ids)
+    assert repository.get_recipe_version(created["id"]) == recipe.version < other.version
+
+def test_tiered_repository_write_through():
+    """Test the memory tier answers hot reads, evicts past capacity and drops written recipes"""
+    store = InMemorySQLiteRecipeRepository()
+    repository = TieredRecipeRepository(store, capacity=2)
+    try:
+        assert repository.get_recipe_by_id(1)["title"] == "Spaghetti Carbonara"
+        assert repository.get_recipe_version(1) == store.get_recipe_version(1)
+        assert repository.get_recipe_by_id(2, ["title"]) == {"id": 2, "title": "Chicken Tikka Masala"}
+        assert json.loads(repository.get_recipe_document(1)) == store.get_recipe_by_id(1)
+        assert sorted(repository.hot.recipes) == [1, 2]
+        
+        # Least recently used (2) makes room for 3
+        assert repository.get_recipes_by_ids([3, 1, 999]) == (
+            [store.get_recipe_by_id(3), store.get_recipe_by_id(1)], [999]
+        )
+        assert sorted(repository.hot.recipes) == [1, 3]
+        
+        updated = repository.update_recipe(1, updated_recipe)
+        assert updated["title"] == "Updated Test Recipe"
+        assert 1 not in repository.hot.recipes
+        assert repository.get_recipe_version(1) == store.get_recipe_version(1) == 2
+        assert repository.delete_recipe(3)
+        assert repository.get_recipe_by_id(3) is None
+        assert repository.update_recipe(999, updated_recipe) is None
+        
+        stats = repository.get_diagnostics()["tier"]
+        assert stats["size"] <= 2 and stats["hits"] >= 1 and stats["evictions"] >= 1
+    finally:
+        repository.close()
+
+def test_tiered_repository_write_behind():
+    """Test queued writes are visible at once, reach SQLite on flush and keep SQLite's versions"""
+    store = InMemorySQLiteRecipeRepository()
+    repository = TieredRecipeRepository(store, capacity=1, write_mode="write-behind", flush_interval=60)
+    try:
+        assert repository.update_recipe(1, updated_recipe)["title"] == "Updated Test Recipe"
+        assert repository.update_recipe(1, {**updated_recipe, "title": "Twice Updated"})["title"] == "Twice Updated"
+        assert repository.delete_recipe(2)
+        assert store.get_recipe_by_id(1)["title"] == "Spaghetti Carbonara"
+        assert store.get_recipe_by_id(2) is not None
+        assert repository.get_recipe_by_id(1)["title"] == "Twice Updated"
+        assert repository.get_recipe_version(1) == 3
+        assert repository.get_recipe_by_id(2) is None
+        assert not repository.delete_recipe(2)
+        # Pinned until flushed, so reading 3 cannot evict 1
+        assert repository.get_recipe_by_id(3)["title"] == "Avocado Toast"
+        assert 1 in repository.hot.recipes
+        
+        # Catalog-wide reads flush the queue first
+        assert [r["title"] for r in repository.search_recipes("twice")] == ["Twice Updated"]
+        assert store.get_recipe_version(1) == 3
+        assert store.get_recipe_by_id(2) is None
+        assert repository.get_tier_stats()["pending_writes"] == 0
+        
+        repository.update_recipe(3, updated_recipe)
+        repository.flush()
+        assert store.get_recipe_by_id(3)["title"] == "Updated Test Recipe"
+    finally:
+        repository.close()
+
+def test_tiered_repository_warms_up_from_read_counts(tmp_path):
+    """Test read counts saved on close pick the recipes a new tier starts with"""
+    db_path = str(tmp_path / "recipes.db")
+    repository = TieredRecipeRepository(SQLiteRecipeRepository(db_path=db_path), capacity=2)
+    for recipe_id in (3, 3, 3, 1, 1, 2):
+        repository.get_recipe_document(recipe_id)
+    repository.close()
+    
+    repository = TieredRecipeRepository(SQLiteRecipeRepository(db_path=db_path), capacity=2, eviction="lfu")
+    try:
+        assert repository.warmed_up == 2
+        assert sorted(repository.hot.recipes) == [1, 3]
+        assert repository.store.get_most_accessed_ids(3) == [3, 1, 2]
+    finally:
+        repository.close()
+
+def test_tier_policies():
+    """Test LFU eviction order and frequency-based admission"""
+    lfu = LFUPolicy()
+    for key in (1, 2, 3):
+        lfu.add(key)
+    lfu.touch(1)
+    lfu.touch(1)
+    lfu.touch(3)
+    assert list(lfu.candidates()) == [2, 3, 1]
+    lfu.remove(2)
+    assert next(lfu.candidates()) == 3
+    
+    repository = TieredRecipeRepository(InMemorySQLiteRecipeRepository(), capacity=1, admission="frequency")
+    try:
+        for _ in range(3):
+            repository.get_recipe_by_id(1)
+        # Read once, 2 is not worth evicting the more popular 1
+        repository.get_recipe_by_id(2)
+        assert list(repository.hot.recipes) == [1]
+        assert repository.get_tier_stats()["rejected_admissions"] == 1
+    finally:
+        repository.close()
+    
+    with pytest.raises(ValueError):
+        TieredRecipeRepository(InMemorySQLiteRecipeRepository(), eviction="fifo")
+
+def test_tiered_backend_selected_by_settings(monkeypatch, tmp_path):
+    """Test RECIPE_REPOSITORY_BACKEND=tiered serves the API through the memory tier"""
+    monkeypatch.setenv("RECIPE_REPOSITORY_BACKEND", "tiered")
+    monkeypatch.setenv("RECIPE_DB_PATH", str(tmp_path / "recipes.db"))
+    get_settings.cache_clear()
+    reset_recipe_repository()
+    try:
+        with TestClient(create_app()) as tiered_client:
+            first = tiered_client.get("/recipes/1")
+            second = tiered_client.get("/recipes/1", headers={"If-None-Match": first.headers["ETag"]})
+            updated = tiered_client.put("/recipes/1", json=updated_recipe)
+            after = tiered_client.get("/recipes/1")
+            assert isinstance(get_recipe_repository(), TieredRecipeRepository)
+    finally:
+        reset_recipe_repository()
+        get_settings.cache_clear()
+    
+    assert first.json()["title"] == "Spaghetti Carbonara"
+    assert second.status_code == 304
+    assert updated.status_code == 200
+    assert after.json()["title"] == "Updated Test Recipe"
+    assert after.headers["ETag"] != first.headers["ETag"]
+
+def test_shutdown_flushes_tiered_writes(monkeypatch, tmp_path):
+    """Test app shutdown and reset_recipe_repository close the repository, keeping queued writes"""
+    db_path = str(tmp_path / "recipes.db")
+    monkeypatch.setenv("RECIPE_REPOSITORY_BACKEND", "tiered")
+    monkeypatch.setenv("RECIPE_TIER_WRITE_MODE", "write-behind")
+    monkeypatch.setenv("RECIPE_TIER_FLUSH_INTERVAL", "60")
+    monkeypatch.setenv("RECIPE_DB_PATH", db_path)
+    get_settings.cache_clear()
+    reset_recipe_repository()
+    try:
+        with TestClient(create_app()) as tiered_client:
+            assert tiered_client.put("/recipes/1", json=updated_recipe).status_code == 200
+            tiered_client.get("/recipes/3")
+        
+        store = SQLiteRecipeRepository(db_path=db_path)
+        try:
+            assert store.get_recipe_by_id(1)["title"] == "Updated Test Recipe"
+            assert store.get_most_accessed_ids(1) == [3]
+        finally:
+            store.close()
+        
+        repository = get_recipe_repository()
+        repository.update_recipe(2, updated_recipe)
+        reset_recipe_repository()
+        assert SQLiteRecipeRepository(db_path=db_path).get_recipe_by_id(2)["title"] == "Updated Test Recipe"
+    finally:
+        reset_recipe_repository()
+        get_settings.cache_clear()
+
+def test_async_group_commit_writes_skip_the_executor(tmp_path):
+    """Test async writes under group commit are awaited without holding DB workers"""
+    repository = instrument_repository(SQLiteRecipeRepository(
+        db_path=str(tmp_path / "recipes.db"),
+        group_commit=True,
+        group_commit_interval=0.05,
+        group_commit_queue_size=4
+    ), backend="group-commit")
+    labels = ("create_recipe", "group-commit")
+    timed_before = REPOSITORY_OPERATION_SECONDS.count(labels)
+    async_repository = AsyncSQLiteRecipeRepository(repository, max_workers=1)
+    
+    async def write():
+        created = await asyncio.gather(*(async_repository.create_recipe(sample_recipe) for _ in range(20)))
+        updated = await async_repository.update_recipe(created[0]["id"], updated_recipe)
+        deleted = await async_repository.delete_recipe(created[1]["id"])
+        return created, updated, deleted
+    
+    try:
+        created, updated, deleted = asyncio.run(write())
+        # A single DB worker no longer limits a group to one write; a full queue
+        # (4 here) makes the rest wait for room on that worker instead
+        assert repository.get_diagnostics()["group_commit"]["largest_group"] > 1
+        assert len({recipe["id"] for recipe in created}) == 20
+        assert updated["title"] == "Updated Test Recipe"
+        assert deleted
+        assert REPOSITORY_OPERATION_SECONDS.count(labels) == timed_before + 20
+    finally:
+        async_repository.close()
+        repository.close()
+
+def test_sqlite_group_commit(tmp_path):
+    """Test concurrent writes share commits, return their results and fail independently"""
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"), group_commit=True, group_commit_interval=0.05)
+    try:
+        created = []
+        def create():
+            created.append(repository.create_recipe(sample_recipe)["id"])
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(created)) == 8
+        stats = repository.get_diagnostics()["group_commit"]
+        assert stats["writes"] == 8
+        assert stats["groups"] < 8
+        
+        assert repository.update_recipe(created[0], updated_recipe)["title"] == "Updated Test Recipe"
+        assert repository.update_recipe(999, updated_recipe) is None
+        assert repository.delete_recipe(created[1])
+        assert not repository.delete_recipe(created[1])
+        
+        # A failing write is rolled back alone
+        with pytest.raises(KeyError):
+            repository.create_recipe({"title": "Incomplete"})
+        assert repository.get_recipe_by_id(created[0])["title"] == "Updated Test Recipe"
+        assert not repository.search_recipes("incomplete")
+        
+        # Bulk batches are queued too, so their ids stay right beside single inserts
+        singles = threading.Thread(target=lambda: [create() for _ in range(5)])
+        singles.start()
+        titles = [f"Bulk {i}" for i in range(30)]
+        bulk_ids = repository.create_recipes_bulk(({**sample_recipe, "title": title} for title in titles), batch_size=7)
+        singles.join()
+        assert [repository.get_recipe_by_id(recipe_id)["title"] for recipe_id in bulk_ids] == titles
+        assert not set(bulk_ids) & set(created)
+    finally:
+        repository.close()
+    
+    # Everything acknowledged was committed
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"))
+    try:
+        assert repository.get_recipe_by_id(created[0])["title"] == "Updated Test Recipe"
+        assert repository.get_recipe_by_id(created[1]) is None
+        assert repository.get_recipe_by_id(created[7]) is not None
+        assert repository.get_diagnostics()["group_commit"] is None
+    finally:
+        repository.close()
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file